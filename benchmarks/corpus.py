@@ -0,0 +1,124 @@
+# Synthetic markdown corpora for the benchmarks.
+#
+# Every knob scales one shape of content the generator has to deal with:
+# long paragraphs, long lists, link/image heavy text, big code blocks and
+# boilerplate blocks repeated verbatim on every page.
+# Generation is seeded, so the same settings always give the same corpus.
+
+import random
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+WORDS = (
+    "the",
+    "quick",
+    "brown",
+    "fox",
+    "jumps",
+    "over",
+    "lazy",
+    "dog",
+    "elves",
+    "of",
+    "rivendell",
+    "sing",
+    "under",
+    "old",
+    "forest",
+    "stars",
+    "while",
+    "tom",
+    "bombadil",
+    "walks",
+    "merry",
+    "down",
+    "the",
+    "hill",
+)
+
+
+@dataclass
+class CorpusShape:
+    pages: int = 200
+    paragraphs: int = 8  # per page
+    paragraph_words: int = 120
+    list_items: int = 20  # per list, two lists per page
+    links: int = 6  # links and images per paragraph
+    code_lines: int = 40  # one code block per page
+    shared_blocks: int = 0  # identical on every page, like disclaimers or nav
+    seed: int = 1
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+def _inline_text(rng: random.Random, words: int, links: int) -> str:
+    parts: list[str] = []
+    link_every = max(1, words // (links + 1)) if links else 0
+    for i in range(words):
+        word = rng.choice(WORDS)
+        if link_every and i and i % link_every == 0:
+            if rng.random() < 0.5:
+                parts.append(f"[{word}](/blog/{word}/)")
+            else:
+                parts.append(f"![{word}](/images/{word}.png)")
+            continue
+        roll = rng.random()
+        if roll < 0.04:
+            word = f"**{word}**"
+        elif roll < 0.08:
+            word = f"_{word}_"
+        elif roll < 0.10:
+            word = f"`{word}`"
+        parts.append(word)
+    return " ".join(parts)
+
+
+def make_shared_blocks(shape: CorpusShape) -> list[str]:
+    rng = random.Random(-shape.seed)
+    return [
+        _inline_text(rng, shape.paragraph_words, shape.links)
+        for _ in range(shape.shared_blocks)
+    ]
+
+
+def make_page(
+    shape: CorpusShape, rng: random.Random, index: int, shared: list[str]
+) -> str:
+    blocks: list[str] = [f"# Page {index}"]
+    for p in range(shape.paragraphs):
+        if p % 3 == 0:
+            blocks.append(f"## Section {p}")
+        blocks.append(_inline_text(rng, shape.paragraph_words, shape.links))
+
+    blocks.append(
+        "\n".join(f"- {_inline_text(rng, 8, 1)}" for _ in range(shape.list_items))
+    )
+    blocks.append(
+        "\n".join(
+            f"{n + 1}. {_inline_text(rng, 8, 0)}" for n in range(shape.list_items)
+        )
+    )
+    blocks.append("> " + _inline_text(rng, 40, 1))
+
+    code = "\n".join(
+        f"    value_{n} = compute({n}, '{rng.choice(WORDS)}')"
+        for n in range(shape.code_lines)
+    )
+    blocks.append(f"```\n{code}\n```")
+    blocks.extend(shared)
+    return "\n\n".join(blocks) + "\n"
+
+
+def make_corpus(shape: CorpusShape) -> list[str]:
+    rng = random.Random(shape.seed)
+    shared = make_shared_blocks(shape)
+    return [make_page(shape, rng, i, shared) for i in range(shape.pages)]
+
+
+# lays the corpus out like content/: one directory per page with an index.md
+def write_corpus(pages: list[str], content_dir: Path) -> None:
+    for i, page in enumerate(pages):
+        page_dir = content_dir / f"page{i}"
+        page_dir.mkdir(parents=True, exist_ok=True)
+        _ = (page_dir / "index.md").write_text(page, encoding="utf-8")
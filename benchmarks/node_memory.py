@@ -0,0 +1,79 @@
+# Measures how many bytes the node graph of a rendered page costs.
+#
+# usage: PYTHONPATH=$(pwd) python3 benchmarks/node_memory.py [--pages N]
+#
+# Run it on two commits to compare node layouts, the numbers are
+# per node, so they do not depend on the size of the sample.
+
+import argparse
+import gc
+import tracemalloc
+from collections.abc import Callable
+
+from src.conversions import markdown_to_html_node
+from src.htmlnode import HTMLNode, LeafNode
+from src.text_parsing import tokenize_inline
+from src.textnode import TextNode, TextType
+
+SAMPLE_PAGE = """# A sample page
+
+This paragraph has **bold**, _italic_ and `code` runs plus a [link](/somewhere).
+
+- first item with **emphasis**
+- second item with a [link](/else)
+- third item
+
+> a quote spanning
+> a couple of lines
+
+![an image](/images/tom.png)
+"""
+
+
+def count_nodes(node: HTMLNode) -> int:
+    return 1 + sum(count_nodes(child) for child in node.children or [])
+
+
+def measure(label: str, build: Callable[[], object], count: int) -> None:
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    keep = build()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<12} {count:>9} nodes {(after - before) / count:>8.1f} bytes/node")
+    del keep
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the memory cost per node")
+    _ = parser.add_argument("--pages", type=int, default=2000)
+    args = parser.parse_args()
+    pages: int = args.pages
+
+    text = "plain **bold** and _italic_ with a [link](/x) and `code` " * 4
+    text_nodes_per_call = len(tokenize_inline(text))
+    measure(
+        "TextNode",
+        lambda: [tokenize_inline(text) for _ in range(pages)],
+        text_nodes_per_call * pages,
+    )
+
+    html_nodes_per_page = count_nodes(markdown_to_html_node(SAMPLE_PAGE, memo=None))
+    measure(
+        "HTMLNode",
+        lambda: [markdown_to_html_node(SAMPLE_PAGE, memo=None) for _ in range(pages)],
+        html_nodes_per_page * pages,
+    )
+
+    # bare instances, without any of the str/list/dict payload
+    measure(
+        "TextNode*",
+        lambda: [TextNode("", TextType.NORMAL) for _ in range(pages)],
+        pages,
+    )
+    measure("LeafNode*", lambda: [LeafNode(None, "") for _ in range(pages)], pages)
+
+
+if __name__ == "__main__":
+    main()
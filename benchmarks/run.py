@@ -0,0 +1,272 @@
+# Times every stage of the generator on a synthetic corpus.
+#
+# usage: PYTHONPATH=$(pwd) python3 -m benchmarks.run [--pages N ...]
+#            [--output results.json] [--baseline old.json --threshold 0.1]
+#
+# Results are written as JSON so runs on different commits can be compared:
+# with --baseline, any stage slower than baseline * (1 + threshold) is
+# reported and the run exits with status 1.
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path, PurePosixPath
+
+from benchmarks.corpus import CorpusShape, make_corpus, write_corpus
+from src.conversions import (
+    BlockMemo,
+    block_memo,
+    markdown_to_document,
+    markdown_to_html_node,
+)
+from src.html_generation import generate_pages_recursive
+from src.htmlnode import ParentNode
+from src.links import page_links
+from src.md import BlockType, iter_blocks
+from src.metadata import MetadataIndex
+from src.minify import MinifyingSink
+from src.template import compile_template
+from src.text_parsing import text_to_textnodes, tokenize_inline
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+
+# best of `repeat` runs, the minimum is the least noisy estimate
+def best_time(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _ = fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def time_stages(pages: list[str], repeat: int) -> dict[str, float]:
+    inline_texts = [
+        block.replace("\n", " ")
+        for page in pages
+        for block_type, block in iter_blocks(page.split("\n"))
+        if block_type is BlockType.TEXT
+    ]
+    trees: list[ParentNode] = [markdown_to_html_node(p, memo=None) for p in pages]
+
+    stages: dict[str, Callable[[], object]] = {
+        # block splitting and classification, as builds do it
+        "iter_blocks": lambda: [list(iter_blocks(page.split("\n"))) for page in pages],
+        "text_to_textnodes": lambda: [text_to_textnodes(t) for t in inline_texts],
+        "tokenize_inline": lambda: [tokenize_inline(t) for t in inline_texts],
+        "markdown_to_html_node": lambda: [
+            markdown_to_html_node(p, memo=None) for p in pages
+        ],
+        # the same parse plus title, anchors and toc
+        "markdown_to_document": lambda: [
+            markdown_to_document(p, memo=None) for p in pages
+        ],
+        # a fresh memo per run, so this is what one build gains from it
+        "markdown_to_html_node_memo": lambda: render_memoized(pages),
+        "to_html": lambda: [tree.to_html() for tree in trees],
+        # whole documents, the template carries most of the whitespace
+        "write_page": lambda: write_pages(trees, minify=False),
+        "write_page_minified": lambda: write_pages(trees, minify=True),
+        # what the link graph extracts from a changed page
+        "page_links": lambda: [page_links(p, PurePosixPath("page.md")) for p in pages],
+    }
+    return {name: best_time(fn, repeat) for name, fn in stages.items()}
+
+
+# serializes every tree into the benchmark template, returns total
+# characters before and after minification (equal without it)
+def write_pages(trees: list[ParentNode], minify: bool) -> tuple[int, int]:
+    template = compile_template(TEMPLATE)
+    chars_in = chars_out = 0
+    for tree in trees:
+        parts: list[str] = []
+        values = {"Title": "Benchmark", "Content": tree}
+        if minify:
+            sink = MinifyingSink(parts.append)
+            template.write(sink.write, values)
+            sink.close()
+            chars_in += sink.chars_in
+            chars_out += sink.chars_out
+        else:
+            template.write(parts.append, values)
+            chars_in += sum(len(part) for part in parts)
+            chars_out = chars_in
+    return chars_in, chars_out
+
+
+# what the generated documents weigh, with and without --minify
+def output_sizes(pages: list[str]) -> dict[str, int]:
+    trees = [markdown_to_html_node(page, memo=None) for page in pages]
+    chars, minified_chars = write_pages(trees, minify=True)
+    return {"chars": chars, "minified_chars": minified_chars}
+
+
+def render_memoized(pages: list[str]) -> list[ParentNode]:
+    memo = BlockMemo()
+    return [markdown_to_html_node(page, memo=memo) for page in pages]
+
+
+def time_full_build(pages: list[str], repeat: int, jobs: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        write_corpus(pages, root / "content")
+        _ = (root / "template.html").write_text(TEMPLATE, encoding="utf-8")
+
+        def build() -> object:
+            # every run starts cold, like a fresh build process would
+            block_memo.clear()
+            # keep the per-page log lines out of the JSON on stdout
+            with contextlib.redirect_stdout(io.StringIO()):
+                return generate_pages_recursive(
+                    "/",
+                    str(root / "content"),
+                    str(root / "template.html"),
+                    str(root / "docs"),
+                    jobs=jobs,
+                )
+
+        return best_time(build, repeat)
+
+
+# metadata of the corpus on disk: header-only reads into an empty
+# index, then a run that finds every page unchanged in the index
+def time_metadata(pages: list[str], repeat: int) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        write_corpus(pages, root / "content")
+        index_path = root / "metadata.json"
+
+        def collect(cold: bool) -> object:
+            if cold:
+                index_path.unlink(missing_ok=True)
+            return MetadataIndex(index_path).collect(root / "content")
+
+        return {
+            "read_metadata": best_time(lambda: collect(cold=True), repeat),
+            "read_metadata_cached": best_time(lambda: collect(cold=False), repeat),
+        }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# returns (stage, baseline seconds, current seconds) for every stage
+# that got slower than the allowed threshold
+def find_regressions(
+    baseline: dict[str, float], current: dict[str, float], threshold: float
+) -> list[tuple[str, float, float]]:
+    regressions: list[tuple[str, float, float]] = []
+    for stage, old in baseline.items():
+        new = current.get(stage)
+        if new is not None and new > old * (1 + threshold):
+            regressions.append((stage, old, new))
+    return regressions
+
+
+def main() -> None:
+    defaults = CorpusShape()
+    parser = argparse.ArgumentParser(description="Benchmark the site generator")
+    for name, value in defaults.as_dict().items():
+        _ = parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=value)
+    _ = parser.add_argument("--repeat", type=int, default=3)
+    _ = parser.add_argument("--jobs", type=int, default=1)
+    _ = parser.add_argument("--output", type=Path, help="write results JSON here")
+    _ = parser.add_argument("--baseline", type=Path, help="results JSON to compare to")
+    _ = parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="allowed slowdown per stage before failing, 0.10 = 10%%",
+    )
+    args = parser.parse_args()
+
+    shape = CorpusShape(**{name: getattr(args, name) for name in defaults.as_dict()})
+    pages = make_corpus(shape)
+    print(
+        f"Corpus: {shape.pages} pages, {sum(len(p) for p in pages) / 1e6:.1f} MB",
+        file=sys.stderr,
+    )
+
+    stages = time_stages(pages, args.repeat)
+    stages.update(time_metadata(pages, args.repeat))
+    stages["generate_pages_recursive"] = time_full_build(pages, args.repeat, args.jobs)
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "corpus": shape.as_dict(),
+            "repeat": args.repeat,
+            "jobs": args.jobs,
+        },
+        "stages": stages,
+        "output": output_sizes(pages),
+    }
+
+    for stage, seconds in stages.items():
+        per_page = seconds / shape.pages * 1e6
+        print(
+            f"{stage:<26} {seconds:>9.4f} s {per_page:>10.1f} us/page", file=sys.stderr
+        )
+
+    # --minify is opt-in, this is what turning it on trades
+    sizes = results["output"]
+    saved = sizes["chars"] - sizes["minified_chars"]
+    cost = stages["write_page_minified"] - stages["write_page"]
+    print(
+        f"minify saves {saved} of {sizes['chars']} chars "
+        f"({saved / max(1, sizes['chars']):.1%}) for "
+        f"{cost / shape.pages * 1e6:+.1f} us/page "
+        f"({cost / max(1e-9, stages['write_page']):+.0%} write time), "
+        f"{cost / max(1, saved) * 1e9:.0f} ns per char saved",
+        file=sys.stderr,
+    )
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        _ = args.output.write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = find_regressions(baseline["stages"], stages, args.threshold)
+        for stage, old, new in regressions:
+            print(
+                f"REGRESSION {stage}: {old:.4f} s -> {new:.4f} s "
+                f"(+{(new / old - 1) * 100:.0f}%)",
+                file=sys.stderr,
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
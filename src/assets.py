@@ -0,0 +1,67 @@
+import json
+from pathlib import Path, PurePosixPath
+from typing import final
+
+from src.manifest import combine_hashes, hash_file
+
+# files referenced by pages and templates that are safe to rename,
+# things fetched by fixed name (favicon.ico, robots.txt, *.html) are not
+FINGERPRINT_SUFFIXES = frozenset(
+    {
+        ".css",
+        ".js",
+        ".mjs",
+        ".png",
+        ".jpg",
+        ".jpeg",
+        ".gif",
+        ".svg",
+        ".webp",
+        ".avif",
+        ".woff",
+        ".woff2",
+    }
+)
+
+# hex digits of the content hash kept in a fingerprinted name
+HASH_LENGTH = 10
+
+# written to the output root, logical name -> fingerprinted name
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+
+
+# "images/cat.png" + digest -> "images/cat.3f2a9c01bd.png"
+def fingerprint_name(rel_path: str, digest: str) -> str:
+    path = PurePosixPath(rel_path)
+    return str(path.with_name(f"{path.stem}.{digest[:HASH_LENGTH]}{path.suffix}"))
+
+
+@final
+class AssetMap:
+    """Root-relative static paths mapped to their content-hashed names"""
+
+    def __init__(self, names: dict[str, str]):
+        self.names: dict[str, str] = names
+        # identifies the whole mapping, part of cache keys and build digests
+        self.digest: str = combine_hashes(
+            *(f"{name}={hashed}" for name, hashed in sorted(names.items()))
+        )
+
+    # url path without the leading slash, anything not fingerprinted passes through
+    def get(self, path: str) -> str:
+        return self.names.get(path, path)
+
+    def manifest_json(self) -> str:
+        return json.dumps(self.names, indent=1, sort_keys=True)
+
+
+# same content always gives the same name, so unchanged
+# assets keep their urls (and their browser caches) between builds
+def build_asset_map(static_dir: Path) -> AssetMap:
+    names: dict[str, str] = {}
+    for path in sorted(static_dir.rglob("*")):
+        if not path.is_file() or path.suffix not in FINGERPRINT_SUFFIXES:
+            continue
+        rel_path = path.relative_to(static_dir).as_posix()
+        names[rel_path] = fingerprint_name(rel_path, hash_file(path))
+    return AssetMap(names)
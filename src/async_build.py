@@ -0,0 +1,141 @@
+import asyncio
+import os
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.conversions import markdown_to_document
+from src.html_generation import PageGenerationError, page_title
+from src.htmlnode import SerializedNode
+from src.metadata import split_front_matter
+from src.minify import MinifyingSink
+from src.render_cache import CachedRender, RenderCache
+from src.sync import sync_tree
+from src.template import Template, load_template
+
+
+@dataclass(frozen=True)
+class SiteConfig:
+    """Everything one build needs, with explicit roots instead of the project layout"""
+
+    content_dir: Path
+    template_path: Path
+    output_dir: Path
+    static_dir: Path | None = None
+    basepath: str = "/"
+    # pages read, rendered or written at the same time
+    concurrency: int = 8
+    render_cache: RenderCache | None = None
+    minify: bool = False
+
+
+# CPU half of a page, module level so it also runs in a process pool.
+# Fragments keep root-relative links, templates rebase them when writing.
+# Pages render concurrently on executor threads, so they stay off the
+# process-wide block memo and never share subtrees
+def render_fragment(markdown: str) -> str:
+    _, body = split_front_matter(markdown)
+    return markdown_to_document(body, memo=None).node.to_html()
+
+
+def render_content(markdown: str) -> CachedRender:
+    fields, body = split_front_matter(markdown)
+    document = markdown_to_document(body, memo=None)
+    title = page_title(fields, document)
+    content = SerializedNode.of(document.node)
+    return CachedRender(content.parts, title, document.toc.to_html())
+
+
+# renders a markdown document to an HTML fragment off the event loop,
+# on `executor` or the loop's default thread pool
+async def render_markdown(text: str, executor: Executor | None = None) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, render_fragment, text)
+
+
+# builds content_dir into output_dir. File reads and writes run in threads
+# while pages render on `executor`, at most config.concurrency pages at once.
+# Cancelling the returned coroutine cancels every page still in flight;
+# pages are swapped in whole, so output_dir never holds a half-written one
+async def build_site(
+    config: SiteConfig, executor: Executor | None = None
+) -> list[Path]:
+    if not config.content_dir.exists():
+        raise FileNotFoundError(f"Content directory not found: {config.content_dir}")
+
+    if config.static_dir is not None:
+        _ = await asyncio.to_thread(sync_tree, config.static_dir, config.output_dir)
+
+    template = await asyncio.to_thread(
+        load_template, config.template_path, config.basepath
+    )
+    sources = await asyncio.to_thread(lambda: sorted(config.content_dir.rglob("*.md")))
+
+    limit = asyncio.Semaphore(config.concurrency)
+    loop = asyncio.get_running_loop()
+
+    async def build_one(source: Path) -> Path:
+        dest = config.output_dir / source.relative_to(config.content_dir)
+        dest = dest.with_suffix(".html")
+        async with limit:
+            try:
+                await _build_page(source, dest, template, config, render)
+            except Exception as e:
+                raise PageGenerationError(
+                    str(source), f"{type(e).__name__}: {e}"
+                ) from e
+        return dest
+
+    def render(markdown: str) -> Awaitable[CachedRender]:
+        return loop.run_in_executor(executor, render_content, markdown)
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(build_one(source)) for source in sources]
+    except ExceptionGroup as group_error:
+        # the first failing page, like the blocking build reports it
+        raise group_error.exceptions[0] from None
+    return [task.result() for task in tasks]
+
+
+async def _build_page(
+    source: Path,
+    dest: Path,
+    template: Template,
+    config: SiteConfig,
+    render: Callable[[str], Awaitable[CachedRender]],
+) -> None:
+    markdown = await asyncio.to_thread(source.read_text, encoding="utf-8")
+    render_cache = config.render_cache
+
+    cached = None
+    if render_cache is not None:
+        cached = await asyncio.to_thread(render_cache.get, markdown)
+    if cached is None:
+        cached = await render(markdown)
+        if render_cache is not None:
+            await asyncio.to_thread(render_cache.put, markdown, cached)
+
+    await asyncio.to_thread(_write_page, dest, template, cached, config.minify)
+
+
+def _write_page(
+    dest: Path, template: Template, render: CachedRender, minify: bool
+) -> None:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = dest.with_name(f".{dest.name}.tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        # the template rebases the fragment's links for its basepath
+        values = {
+            "Title": render.title,
+            "Content": SerializedNode(render.parts),
+            "TOC": render.toc,
+        }
+        if minify:
+            sink = MinifyingSink(f.write)
+            template.write(sink.write, values)
+            sink.close()
+        else:
+            template.write(f.write, values)
+    os.replace(tmp_file, dest)
@@ -0,0 +1,122 @@
+import gzip
+import os
+from collections.abc import Callable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from src.manifest import combine_hashes, hash_file
+
+# zstd is optional: the standard library has it from 3.14 on,
+# before that only through the zstandard package
+_zstd_compress: Callable[[bytes], bytes] | None
+try:
+    from compression import zstd  # pyright: ignore
+
+    def _zstd_compress(data: bytes) -> bytes:
+        return zstd.compress(data, level=19)  # pyright: ignore
+
+except ImportError:
+    try:
+        import zstandard  # pyright: ignore
+
+        def _zstd_compress(data: bytes) -> bytes:
+            return zstandard.ZstdCompressor(level=19).compress(data)  # pyright: ignore
+
+    except ImportError:
+        _zstd_compress = None
+
+# text formats worth precompressing, images and fonts already are compressed
+COMPRESSIBLE_SUFFIXES = frozenset(
+    {".html", ".htm", ".css", ".js", ".mjs", ".json", ".xml", ".svg", ".txt"}
+)
+
+
+# mtime=0 keeps the output byte-identical between builds
+def _gzip_compress(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+# sidecar suffix -> compressor, in the order servers prefer them
+ENCODINGS: dict[str, Callable[[bytes], bytes]] = {".gz": _gzip_compress}
+if _zstd_compress is not None:
+    ENCODINGS[".zst"] = _zstd_compress
+
+# rel path -> {"digest", "sidecars"}, kept in the build manifest
+CompressRecords = dict[str, dict[str, str | list[str]]]
+
+
+@dataclass
+class CompressResult:
+    # root-relative posix paths
+    compressed: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+
+def is_compressible(path: Path) -> bool:
+    return path.suffix in COMPRESSIBLE_SUFFIXES
+
+
+# writes one sidecar per encoding next to path, keeping only those that came
+# out smaller than the original. Returns the suffixes of the kept sidecars
+def compress_file(path: Path) -> list[str]:
+    data = path.read_bytes()
+    kept: list[str] = []
+    for suffix, compress in ENCODINGS.items():
+        sidecar = path.with_name(path.name + suffix)
+        compressed = compress(data)
+        if len(compressed) >= len(data):
+            sidecar.unlink(missing_ok=True)
+            continue
+        tmp_path = sidecar.with_name(f".{sidecar.name}.tmp")
+        _ = tmp_path.write_bytes(compressed)
+        os.replace(tmp_path, sidecar)
+        kept.append(suffix)
+    return kept
+
+
+def remove_sidecars(path: Path, sidecars: list[str]) -> None:
+    for suffix in sidecars:
+        path.with_name(path.name + suffix).unlink(missing_ok=True)
+
+
+# compresses every text file under root whose content changed since
+# `previous` was recorded, in `jobs` threads (zlib and zstd release the GIL).
+# Returns the records to keep for the next run
+def compress_tree(
+    root: Path, previous: Mapping[str, Mapping[str, str | list[str]]], jobs: int = 1
+) -> tuple[CompressRecords, CompressResult]:
+    records: CompressRecords = {}
+    result = CompressResult()
+    encodings = sorted(ENCODINGS)
+
+    todo: list[tuple[str, Path, str]] = []
+    for path in sorted(root.rglob("*")):
+        if not path.is_file() or not is_compressible(path):
+            continue
+        rel_path = path.relative_to(root).as_posix()
+        digest = combine_hashes(hash_file(path), *encodings)
+
+        record = previous.get(rel_path)
+        if record is not None and record["digest"] == digest:
+            sidecars = list(record["sidecars"])
+            if all(path.with_name(path.name + s).exists() for s in sidecars):
+                records[rel_path] = {"digest": digest, "sidecars": sidecars}
+                result.unchanged.append(rel_path)
+                continue
+        todo.append((rel_path, path, digest))
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        kept = executor.map(compress_file, [path for _, path, _ in todo])
+        for (rel_path, _, digest), sidecars in zip(todo, kept):
+            records[rel_path] = {"digest": digest, "sidecars": sidecars}
+            result.compressed.append(rel_path)
+
+    # originals that disappeared take their sidecars with them
+    for rel_path, record in previous.items():
+        if rel_path not in records:
+            remove_sidecars(root / rel_path, list(record["sidecars"]))
+            result.removed.append(rel_path)
+
+    return records, result
@@ -1,7 +1,14 @@
-from src.text_parsing import text_to_textnodes
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import NamedTuple, final
+from src.text_parsing import tokenize_inline
 from src.textnode import TextNode, TextType
 from src.htmlnode import HTMLNode, LeafNode, ParentNode
-from src.md import BlockType, markdown_to_blocks, block_to_blocktype
+from src.md import BlockType, iter_blocks
+from src.tracing import span
 
 
 # takes in a single TextNode and converts it to an
@@ -24,10 +31,18 @@ def text_node_to_html_node(text_node: TextNode) -> LeafNode:
             return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
 
 
+# anything turning inline markdown into TextNodes: tokenize_inline (default,
+# single pass) or the original multi-pass text_parsing.text_to_textnodes
+InlineTokenizer = Callable[[str], list[TextNode]]
+
+
 # Util that combines several other steps
 # input: text string -> TextNode list -> HTMLNode list -> return latter
-def text_to_children(text: str) -> list[HTMLNode]:
-    text_nodes: list[TextNode] = text_to_textnodes(text)
+def text_to_children(
+    text: str, tokenizer: InlineTokenizer = tokenize_inline
+) -> list[HTMLNode]:
+    with span(tokenizer.__name__):
+        text_nodes: list[TextNode] = tokenizer(text)
     leaves: list[HTMLNode] = []
     for text_node in text_nodes:
         leaf = text_node_to_html_node(text_node)
@@ -54,92 +69,316 @@ def strip_ordered_list_symbols(block: str) -> list[str]:
     return stripped_lines
 
 
+# the inline markdown of a block, without its block markup: one entry per
+# list item. A quote is one entry, its lines joined like the renderer
+# joins them, so emphasis may run across them. Code blocks have none
+def inline_lines(block_type: BlockType, block: str) -> list[str]:
+    match block_type:
+        case BlockType.CODE:
+            return []
+        case BlockType.HEADER:
+            return [block.lstrip("#").lstrip()]
+        case BlockType.BLOCKQUOTE:
+            return [" ".join(line[1:].lstrip() for line in block.split("\n"))]
+        case BlockType.LIST:
+            return strip_unordered_list_symbols(block)
+        case BlockType.NUMLIST:
+            return strip_ordered_list_symbols(block)
+        case BlockType.TEXT:
+            return [block]
+
+
+class MemoStats(NamedTuple):
+    hits: int
+    misses: int
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def since(self, earlier: "MemoStats") -> "MemoStats":
+        return MemoStats(self.hits - earlier.hits, self.misses - earlier.misses)
+
+    def plus(self, other: "MemoStats") -> "MemoStats":
+        return MemoStats(self.hits + other.hits, self.misses + other.misses)
+
+
+@final
+class BlockMemo:
+    """Bounded LRU of block text -> rendered subtree, shared by all pages and threads in a process"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries: int = max_entries
+        self.entries: OrderedDict[tuple[BlockType, str], HTMLNode] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        # a concurrent eviction between get and move_to_end would raise
+        # KeyError, the block itself is rendered outside the lock
+        self._lock: threading.Lock = threading.Lock()
+
+    # the same subtree object ends up in every page containing the block,
+    # fine since nothing mutates nodes once they are built
+    def render(self, block_type: BlockType, block: str) -> HTMLNode:
+        key = (block_type, block)
+        with self._lock:
+            node = self.entries.get(key)
+            if node is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return node
+            self.misses += 1
+
+        node = block_to_html_node(block_type, block)
+        with self._lock:
+            # another thread may have rendered it meanwhile, either copy is fine
+            self.entries[key] = node
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_entries:
+                _ = self.entries.popitem(last=False)
+        return node
+
+    def stats(self) -> MemoStats:
+        return MemoStats(self.hits, self.misses)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+
+# the memo markdown_to_html_node uses unless told otherwise,
+# each worker process gets its own copy
+block_memo = BlockMemo()
+
+
 # big converter function,
 # input:
-#   raw markdown string
+#   raw markdown string, or any iterable of its lines (e.g. an open file)
+#   memo: where repeated blocks are looked up, None parses every block afresh
 # output:
 #   Parent HTML Node with all elements nested and parsed
-def markdown_to_html_node(markdown: str) -> ParentNode:
+def markdown_to_html_node(
+    markdown: str | Iterable[str], memo: BlockMemo | None = block_memo
+) -> ParentNode:
+    with span("markdown_to_html_node"):
+        return _markdown_to_html_node(markdown, memo)
+
+
+def _markdown_to_html_node(
+    markdown: str | Iterable[str], memo: BlockMemo | None
+) -> ParentNode:
     parent: ParentNode = ParentNode("div", [])
     assert parent.children is not None
 
-    blocks = markdown_to_blocks(markdown)
-
-    for block in blocks:
-        block_type = block_to_blocktype(block)
-        match block_type:
-            case BlockType.TEXT:
-                # in html we don't use \n so we strip them out replacing with spaces
-                text_content = block.replace("\n", " ")
-
-                # continue with rest of processing
-                text_leaves: list[HTMLNode] = text_to_children(text_content)
-                text_html = ParentNode("p", text_leaves)
-                parent.children.append(text_html)
-
-            case BlockType.HEADER:
-                value = len(block) - len(block.lstrip("#"))  # count heading `#`
-                header_text = block.lstrip("#").lstrip()  # strip `#` out
-
-                # continue with rest of processing
-                header_leaves: list[HTMLNode] = text_to_children(header_text)
-                header_html = ParentNode(f"h{value}", header_leaves)
-                parent.children.append(header_html)
-
-            case BlockType.CODE:
-                # this cuts out first ``` + \n and last ```
-                code_block = block[4:-3]
-
-                # continue with rest of processing
-                code_html = ParentNode("pre", [LeafNode("code", code_block)])
-                parent.children.append(code_html)
-
-            case BlockType.BLOCKQUOTE:
-                # this block splits the quote by lines, and removes ">" used in md
-                lines = block.split("\n")
-                stripped_lines = [line[1:].lstrip() for line in lines]
-                quote_block = "\n".join(stripped_lines).replace("\n", " ")
-
-                quote_leaves: list[HTMLNode] = text_to_children(quote_block)
-                quote_html = ParentNode("blockquote", quote_leaves)
-                parent.children.append(quote_html)
-
-            case BlockType.LIST:
-                # first, strip md list fluff
-                uo_ls_lines = strip_unordered_list_symbols(block)
-
-                # each list item will be an inviditual node
-                uo_list_leaves: list[HTMLNode] = []
-
-                # loop over the list items and text parse them,
-                # appending to list of leaves
-                for line in uo_ls_lines:
-                    uo_ls_item_leaves: list[HTMLNode] = text_to_children(line)
-                    uo_ls_item_html = ParentNode("li", uo_ls_item_leaves)
-                    uo_list_leaves.append(uo_ls_item_html)
-
-                # finally, take list of leaves and init the parent node
-                # for the entire list block
-                uo_list_html = ParentNode("ul", uo_list_leaves)
-                parent.children.append(uo_list_html)
-
-            case BlockType.NUMLIST:
-                # first, strip md list fluff
-                o_ls_lines = strip_ordered_list_symbols(block)
-
-                # each list item will be an inviditual node
-                o_list_leaves: list[HTMLNode] = []
-
-                # loop over the list items and text parse them,
-                # appending to list of leaves
-                for line in o_ls_lines:
-                    o_ls_item_leaves: list[HTMLNode] = text_to_children(line)
-                    o_ls_item_html = ParentNode("li", o_ls_item_leaves)
-                    o_list_leaves.append(o_ls_item_html)
-
-                # finally, take list of leaves and init the parent node
-                # for the entire list block
-                o_list_html = ParentNode("ol", o_list_leaves)
-                parent.children.append(o_list_html)
+    lines = markdown.split("\n") if isinstance(markdown, str) else markdown
+
+    for block_type, block in iter_blocks(lines):
+        if memo is None:
+            parent.children.append(block_to_html_node(block_type, block))
+        else:
+            parent.children.append(memo.render(block_type, block))
 
     return parent
+
+
+class Heading(NamedTuple):
+    level: int
+    # plain text, inline markup stripped
+    text: str
+    # id attribute of the rendered heading, unique within its document
+    anchor: str
+
+
+@final
+@dataclass(frozen=True)
+class Document:
+    """A parsed page: the HTML tree plus everything known about it from the same pass"""
+
+    node: ParentNode
+    headings: tuple[Heading, ...]
+    # nested <ul> of links to every heading below the title, empty when none
+    toc: HTMLNode
+
+    # same rule extract_title applies: exactly one level 1 heading
+    @property
+    def title(self) -> str:
+        titles = [heading.text for heading in self.headings if heading.level == 1]
+        if len(titles) == 0:
+            raise ValueError(
+                "No title found: markdown must contain exactly one line starting with '# '"
+            )
+        if len(titles) > 1:
+            raise ValueError(
+                "Multiple titles found: markdown must contain exactly one line starting with '# '"
+            )
+        return titles[0]
+
+
+# parses a page once into its tree, headings and table of contents.
+# Headings get id attributes, so rendered pages can be linked into
+def markdown_to_document(
+    markdown: str | Iterable[str], memo: BlockMemo | None = block_memo
+) -> Document:
+    with span("markdown_to_document"):
+        parent: ParentNode = ParentNode("div", [])
+        assert parent.children is not None
+        headings: list[Heading] = []
+        anchors: set[str] = set()
+
+        lines = markdown.split("\n") if isinstance(markdown, str) else markdown
+
+        for block_type, block in iter_blocks(lines):
+            if memo is None:
+                node = block_to_html_node(block_type, block)
+            else:
+                node = memo.render(block_type, block)
+
+            if block_type == BlockType.HEADER:
+                # memoized nodes are shared between pages, so the heading is
+                # re-wrapped around the same children instead of given an id
+                heading = _heading(node, anchors)
+                headings.append(heading)
+                node = ParentNode(
+                    f"h{heading.level}", node.children or [], {"id": heading.anchor}
+                )
+            parent.children.append(node)
+
+        return Document(parent, tuple(headings), build_toc(headings))
+
+
+_ANCHOR_STRIP_RE = re.compile(r"[^\w\s-]")
+_ANCHOR_SPACE_RE = re.compile(r"\s+")
+
+
+# "Why Tom Bombadil?" -> "why-tom-bombadil", repeats get -1, -2, ...
+def _heading(node: HTMLNode, anchors: set[str]) -> Heading:
+    assert node.tag is not None
+    text = node_text(node)
+    slug = _ANCHOR_STRIP_RE.sub("", text.lower()).strip()
+    slug = _ANCHOR_SPACE_RE.sub("-", slug) or "section"
+
+    anchor = slug
+    count = 0
+    while anchor in anchors:
+        count += 1
+        anchor = f"{slug}-{count}"
+    anchors.add(anchor)
+    return Heading(int(node.tag[1:]), text, anchor)
+
+
+# concatenated text of every leaf below node
+def node_text(node: HTMLNode) -> str:
+    if node.children is None:
+        return node.value or ""
+    return "".join(node_text(child) for child in node.children)
+
+
+# the title is the page itself, so the list starts at level 2.
+# Skipped levels (h2 straight to h4) nest just one step
+def build_toc(headings: Iterable[Heading]) -> HTMLNode:
+    root = ParentNode("ul", [])
+    # (level, node new items nest under), the root list takes anything
+    stack: list[tuple[int, ParentNode]] = [(1, root)]
+
+    for heading in headings:
+        if heading.level == 1:
+            continue
+        while stack[-1][0] >= heading.level:
+            _ = stack.pop()
+
+        container = stack[-1][1]
+        assert container.children is not None
+        if container is not root:
+            # first sub-heading opens a nested list in its parent's item
+            last = container.children[-1]
+            if not (isinstance(last, ParentNode) and last.tag == "ul"):
+                last = ParentNode("ul", [])
+                container.children.append(last)
+            container = last
+            assert container.children is not None
+
+        link = LeafNode("a", heading.text, {"href": f"#{heading.anchor}"})
+        item = ParentNode("li", [link])
+        container.children.append(item)
+        stack.append((heading.level, item))
+
+    if not root.children:
+        return LeafNode(None, "")
+    return root
+
+
+# converts a single block, as split and typed by iter_blocks
+def block_to_html_node(block_type: BlockType, block: str) -> HTMLNode:
+    match block_type:
+        case BlockType.TEXT:
+            # in html we don't use \n so we strip them out replacing with spaces
+            text_content = block.replace("\n", " ")
+
+            # continue with rest of processing
+            text_leaves: list[HTMLNode] = text_to_children(text_content)
+            text_html = ParentNode("p", text_leaves)
+            return text_html
+
+        case BlockType.HEADER:
+            value = len(block) - len(block.lstrip("#"))  # count heading `#`
+            header_text = block.lstrip("#").lstrip()  # strip `#` out
+
+            # continue with rest of processing
+            header_leaves: list[HTMLNode] = text_to_children(header_text)
+            header_html = ParentNode(f"h{value}", header_leaves)
+            return header_html
+
+        case BlockType.CODE:
+            # this cuts out first ``` + \n and last ```
+            code_block = block[4:-3]
+
+            # continue with rest of processing
+            code_html = ParentNode("pre", [LeafNode("code", code_block)])
+            return code_html
+
+        case BlockType.BLOCKQUOTE:
+            # the quote's lines without their ">", joined into one text.
+            # Shared with search and links, so they tokenize what renders
+            (quote_block,) = inline_lines(block_type, block)
+
+            quote_leaves: list[HTMLNode] = text_to_children(quote_block)
+            quote_html = ParentNode("blockquote", quote_leaves)
+            return quote_html
+
+        case BlockType.LIST:
+            # first, strip md list fluff
+            uo_ls_lines = strip_unordered_list_symbols(block)
+
+            # each list item will be an inviditual node
+            uo_list_leaves: list[HTMLNode] = []
+
+            # loop over the list items and text parse them,
+            # appending to list of leaves
+            for line in uo_ls_lines:
+                uo_ls_item_leaves: list[HTMLNode] = text_to_children(line)
+                uo_ls_item_html = ParentNode("li", uo_ls_item_leaves)
+                uo_list_leaves.append(uo_ls_item_html)
+
+            # finally, take list of leaves and init the parent node
+            # for the entire list block
+            uo_list_html = ParentNode("ul", uo_list_leaves)
+            return uo_list_html
+
+        case BlockType.NUMLIST:
+            # first, strip md list fluff
+            o_ls_lines = strip_ordered_list_symbols(block)
+
+            # each list item will be an inviditual node
+            o_list_leaves: list[HTMLNode] = []
+
+            # loop over the list items and text parse them,
+            # appending to list of leaves
+            for line in o_ls_lines:
+                o_ls_item_leaves: list[HTMLNode] = text_to_children(line)
+                o_ls_item_html = ParentNode("li", o_ls_item_leaves)
+                o_list_leaves.append(o_ls_item_html)
+
+            # finally, take list of leaves and init the parent node
+            # for the entire list block
+            o_list_html = ParentNode("ol", o_list_leaves)
+            return o_list_html
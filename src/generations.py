@@ -0,0 +1,154 @@
+import errno
+import os
+import shutil
+from collections.abc import Sequence
+from pathlib import Path
+from typing import final
+
+# builds kept around for rollback, besides the live one
+DEFAULT_KEEP = 3
+
+
+@final
+class GenerationStore:
+    """Numbered output directories, the live one published through a symlink"""
+
+    def __init__(self, directory: Path, link: Path, keep: int = DEFAULT_KEEP):
+        # resolved, so it compares equal to the symlink's resolved target
+        self.directory: Path = directory.resolve()
+        # what the web server serves, e.g. docs -> .build/generations/000012
+        self.link: Path = link
+        self.keep: int = keep
+        # build state files as they were when the staging directory was
+        # made, None for ones that did not exist yet
+        self.saved_state: dict[Path, bytes | None] = {}
+
+    # oldest first, half-finished staging directories are not generations
+    def generations(self) -> list[Path]:
+        if not self.directory.exists():
+            return []
+        return sorted(
+            path
+            for path in self.directory.iterdir()
+            if path.is_dir() and path.name.isdigit()
+        )
+
+    def current(self) -> Path | None:
+        if not self.link.is_symlink():
+            return None
+        return self.link.resolve()
+
+    # new generation pre-filled with hardlinks to every file of the live one,
+    # the build then only replaces what changed. Writers must replace files
+    # (tmp + rename), never write into them, or older generations change too.
+    # `state` are the build's records of what it wrote (manifest and such),
+    # discard puts them back so they keep describing the live generation
+    def stage(self, empty: bool = False, state: Sequence[Path] = ()) -> Path:
+        self.saved_state = {}
+        for path in state:
+            try:
+                self.saved_state[path] = path.read_bytes()
+            except FileNotFoundError:
+                self.saved_state[path] = None
+
+        existing = self.generations()
+        number = int(existing[-1].name) + 1 if existing else 1
+        staging = self.directory / f"{number:06d}.staging"
+        if staging.exists():
+            shutil.rmtree(staging)  # leftover of a build that crashed
+        staging.mkdir(parents=True)
+
+        source = self.current()
+        if source is None and self.link.is_dir():
+            # first atomic build, the published tree is still a plain directory
+            source = self.link
+        if source is not None and not empty:
+            link_tree(source, staging)
+        return staging
+
+    # finished staging directory becomes the live generation in one rename
+    def activate(self, staging: Path) -> Path:
+        generation = staging.with_suffix("")
+        os.rename(staging, generation)
+        self.publish(generation)
+        self.prune()
+        return generation
+
+    # throws a failed or interrupted build away. State it already saved
+    # would call its pages fresh, the next build would then skip them
+    def discard(self, staging: Path) -> None:
+        shutil.rmtree(staging, ignore_errors=True)
+        for path, data in self.saved_state.items():
+            if data is None:
+                path.unlink(missing_ok=True)
+                continue
+            tmp_path = path.with_name(path.name + ".tmp")
+            _ = tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        self.saved_state = {}
+
+    def publish(self, generation: Path) -> None:
+        if self.link.exists() and not self.link.is_symlink():
+            # a real directory cannot be swapped atomically, move it aside
+            # once so that every later swap is a single rename
+            retired = self.directory / "000000"
+            print(f"Moving {self.link} to {retired}, it becomes a symlink")
+            shutil.rmtree(retired, ignore_errors=True)
+            os.rename(self.link, retired)
+
+        # relative, so the project can be moved or mounted elsewhere
+        target = os.path.relpath(generation, self.link.parent)
+        tmp_link = self.link.with_name(f".{self.link.name}.swap")
+        tmp_link.unlink(missing_ok=True)
+        tmp_link.symlink_to(target, target_is_directory=True)
+        os.replace(tmp_link, self.link)
+        print(f"Published {generation.name} at {self.link}")
+
+    # drops everything but the live generation and the `keep` before it
+    def prune(self) -> list[Path]:
+        current = self.current()
+        generations = self.generations()
+        if current in generations:
+            generations = generations[: generations.index(current)]
+        removed = generations[: max(0, len(generations) - self.keep)]
+        for generation in removed:
+            shutil.rmtree(generation)
+        return removed
+
+    # points the link at the generation before the live one (or a named one).
+    # `state` described the generation rolled back from and is deleted, the
+    # next build then starts over (mostly from the render cache)
+    def rollback(self, name: str | None = None, state: Sequence[Path] = ()) -> Path:
+        generations = self.generations()
+        current = self.current()
+        if name is not None:
+            target = self.directory / name
+            if target not in generations:
+                raise ValueError(f"No generation named {name} in {self.directory}")
+        else:
+            older = [g for g in generations if current is None or g < current]
+            if not older:
+                raise ValueError("No older generation to roll back to")
+            target = older[-1]
+        self.publish(target)
+        for path in state:
+            path.unlink(missing_ok=True)
+        return target
+
+
+# cp -al: recreates the directory tree, hardlinking every file
+def link_tree(src: Path, dst: Path) -> None:
+    for dirpath, dirnames, filenames in os.walk(src):
+        rel_dir = Path(dirpath).relative_to(src)
+        for dirname in dirnames:
+            (dst / rel_dir / dirname).mkdir(exist_ok=True)
+        for filename in filenames:
+            src_file = Path(dirpath) / filename
+            dst_file = dst / rel_dir / filename
+            try:
+                os.link(src_file, dst_file)
+            except OSError as e:
+                # other filesystem or link count limit, copying still works
+                if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                    raise
+                _ = shutil.copy2(src_file, dst_file)
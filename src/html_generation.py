@@ -1,74 +1,409 @@
+import os
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from src.md import extract_title
-from src.conversions import markdown_to_html_node
+from typing import override
+from src.assets import AssetMap
+from src.conversions import Document, MemoStats, block_memo, markdown_to_document
+from src.listings import (
+    LISTING_SOURCE,
+    PER_PAGE,
+    ListingPage,
+    listing_node,
+    plan_listings,
+)
+from src.metadata import FrontMatter, PageMeta, split_front_matter
+from src.manifest import BuildManifest, combine_hashes, generator_version, hash_file
+from src.minify import MinifyingSink
+from src.render_cache import CachedRender, RenderCache
+from src.htmlnode import HTMLNode, SerializedNode
+from src.template import load_template
+from src import tracing
+from src.tracing import TraceEvent, span
+
+
+class PageGenerationError(Exception):
+    """Raised when a single page fails to render, naming its source file"""
+
+    def __init__(self, source: str, reason: str):
+        # both values go to Exception so the error survives
+        # being pickled back from a worker process
+        super().__init__(source, reason)
+        self.source: str = source
+        self.reason: str = reason
+
+    @override
+    def __str__(self):
+        return f"Failed to generate page from {self.source}: {self.reason}"
+
+
+# (basepath, dest_path): one output tree per URL prefix the site is served from
+OutputTarget = tuple[str, str]
+
+
+@dataclass(frozen=True)
+class PageOptions:
+    """Build-wide settings every page is rendered with"""
+
+    render_cache: RenderCache | None = None
+    assets: AssetMap | None = None
+    minify: bool = False
+
+    # the parts that change the output, for the build digest
+    def digest_parts(self) -> tuple[str, ...]:
+        assets = self.assets.digest if self.assets is not None else ""
+        return (assets, "minify" if self.minify else "")
+
+
+# (from_path, template_path, targets, options), exactly render_page's arguments
+PageTask = tuple[str, str, tuple[OutputTarget, ...], PageOptions]
 
 
 def generate_page(
-    basepath: str, from_path: str, template_path: str, dest_path: str
+    basepath: str,
+    from_path: str,
+    template_path: str,
+    dest_path: str,
+    render_cache: RenderCache | None = None,
+) -> None:
+    render_page(
+        from_path,
+        template_path,
+        ((basepath, dest_path),),
+        PageOptions(render_cache=render_cache),
+    )
+
+
+# parses and renders a page once, then writes it out for every target,
+# rebasing root-relative links while the content is serialized
+def render_page(
+    from_path: str,
+    template_path: str,
+    targets: tuple[OutputTarget, ...],
+    options: PageOptions | None = None,
 ) -> None:
+    options = options if options is not None else PageOptions()
     # Get project root (assuming this file is in src/)
     project_root = Path(__file__).parent.parent
 
     # Convert to absolute paths
     from_abs = project_root / from_path
     template_abs = project_root / template_path
-    dest_abs = project_root / dest_path
+    dests = ", ".join(str(project_root / dest_path) for _, dest_path in targets)
+
+    print(f"Generating page from {from_abs} to {dests} using {template_abs}")
+
+    with span("generate_page", page=str(from_path)):
+        # Read markdown file
+        with span("read_markdown"):
+            markdown_content = Path(from_abs).read_text(encoding="utf-8")
+
+        values = _render_content(markdown_content, options.render_cache, len(targets))
+
+        _write_targets(values, template_abs, targets, options)
+
 
-    print(f"Generating page from {from_abs} to {dest_abs} using {template_abs}")
+# a generated section listing, written like any page
+def render_listing(
+    listing: ListingPage,
+    template_path: str,
+    targets: tuple[OutputTarget, ...],
+    options: PageOptions | None = None,
+) -> None:
+    options = options if options is not None else PageOptions()
+    project_root = Path(__file__).parent.parent
+    print(f"Generating listing of {listing.section}/, page {listing.number}")
+    with span("generate_listing", page=listing.output_key):
+        values: dict[str, str | HTMLNode] = {
+            "Title": listing.title,
+            "Content": listing_node(listing),
+        }
+        _write_targets(values, project_root / template_path, targets, options)
+
+
+def _write_targets(
+    values: Mapping[str, str | HTMLNode],
+    template_abs: Path,
+    targets: tuple[OutputTarget, ...],
+    options: PageOptions,
+) -> None:
+    project_root = Path(__file__).parent.parent
+    for basepath, dest_path in targets:
+        # Compiled once per build and basepath, only re-read when the file changes
+        with span("load_template"):
+            template = load_template(template_abs, basepath, options.assets)
 
-    # Read markdown file
-    markdown_content = Path(from_abs).read_text(encoding="utf-8")
+        # Create destination directory if it doesn't exist
+        dest_file = project_root / dest_path
+        dest_file.parent.mkdir(parents=True, exist_ok=True)
 
-    # Read template file
-    template_content = Path(template_abs).read_text(encoding="utf-8")
+        # Stream the filled template into the destination file, the
+        # template's own links were already rebased when it was compiled.
+        # Written next to it and renamed over it, so a page is never seen
+        # half-written and a hardlinked older copy is replaced, not changed
+        with span("serialize_and_write"):
+            tmp_file = dest_file.with_name(f".{dest_file.name}.tmp")
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                if options.minify:
+                    sink = MinifyingSink(f.write)
+                    template.write(sink.write, values)
+                    sink.close()
+                else:
+                    template.write(f.write, values)
+            os.replace(tmp_file, dest_file)
 
-    # Convert markdown to HTML (placeholder for your function)
-    html_content = markdown_to_html_node(markdown_content).to_html()
 
-    # Extract title from markdown
-    title = extract_title(markdown_content)
+# returns the template values of a page: Title, Content and TOC (its table
+# of contents). Nodes that are written more than once (several targets, or
+# the render cache) are serialized once up front
+def _render_content(
+    markdown: str, render_cache: RenderCache | None, targets: int
+) -> dict[str, str | HTMLNode]:
+    # Identical markdown was rendered by this generator before, in this
+    # build or an earlier one on any branch: reuse fragment, title and toc
+    if render_cache is not None:
+        with span("render_cache_get"):
+            cached = render_cache.get(markdown)
+        if cached is not None:
+            return {
+                "Title": cached.title,
+                "Content": SerializedNode(cached.parts),
+                "TOC": cached.toc,
+            }
 
-    # Replace placeholders in template
-    full_html = template_content.replace("{{ Title }}", title)
-    full_html = full_html.replace("{{ Content }}", html_content)
-    full_html = full_html.replace('href="/', f'href="{basepath}')
-    full_html = full_html.replace('src="/', f'src="{basepath}')
+    # One pass for the HTML tree, the title and the headings
+    fields, body = split_front_matter(markdown)
+    document = markdown_to_document(body)
+    title = page_title(fields, document)
 
-    # Create destination directory if it doesn't exist
-    dest_file = Path(dest_abs)
-    dest_file.parent.mkdir(parents=True, exist_ok=True)
+    if render_cache is None and targets == 1:
+        return {"Title": title, "Content": document.node, "TOC": document.toc}
 
-    # Write the generated HTML to destination
-    _ = dest_file.write_text(full_html, encoding="utf-8")
+    # root-relative links are kept, every target rebases them for its basepath
+    with span("serialize"):
+        content = SerializedNode.of(document.node)
+        toc = document.toc.to_html()
+    if render_cache is not None:
+        with span("render_cache_put"):
+            render_cache.put(markdown, CachedRender(content.parts, title, toc))
+    return {"Title": title, "Content": content, "TOC": toc}
+
+
+# a title in the front matter wins, otherwise the page
+# needs exactly one `# ` heading
+def page_title(fields: FrontMatter, document: Document) -> str:
+    title = fields.get("title")
+    return title if isinstance(title, str) else document.title
+
+
+def run_page_task(task: PageTask) -> None:
+    try:
+        render_page(*task)
+    except Exception as e:
+        raise PageGenerationError(task[0], f"{type(e).__name__}: {e}") from e
+
+
+# worker entry point, one call handles a whole chunk of pages
+# so process start-up and pickling costs are paid per chunk.
+# The worker's block memo counts (and spans, with tracing on)
+# are shipped back to the parent.
+def run_page_chunk(
+    tasks: list[PageTask], trace: bool = False
+) -> tuple[list[TraceEvent], MemoStats]:
+    if trace:
+        _ = tracing.enable()
+    memo_before = block_memo.stats()
+    try:
+        for task in tasks:
+            run_page_task(task)
+    finally:
+        tracer = tracing.disable() if trace else None
+    events = tracer.events if tracer is not None else []
+    return events, block_memo.stats().since(memo_before)
+
+
+# returns how the block memo did across all pages
+def run_page_tasks(tasks: list[PageTask], jobs: int = 1) -> MemoStats:
+    if jobs <= 1 or len(tasks) <= 1:
+        memo_before = block_memo.stats()
+        for task in tasks:
+            run_page_task(task)
+        return block_memo.stats().since(memo_before)
+
+    # a few chunks per worker keeps the load balanced
+    # when some pages are much bigger than others
+    chunk_size = max(1, len(tasks) // (jobs * 4))
+    chunks = [tasks[i : i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+
+    tracer = tracing.active()
+    worker = partial(run_page_chunk, trace=tracer is not None)
+    memo_stats = MemoStats(0, 0)
+    with ProcessPoolExecutor(max_workers=min(jobs, len(chunks))) as executor:
+        # consuming the iterator re-raises the first worker failure
+        for events, chunk_stats in executor.map(worker, chunks):
+            if tracer is not None:
+                tracer.add_events(events)
+            memo_stats = memo_stats.plus(chunk_stats)
+    return memo_stats
 
 
 def generate_pages_recursive(
-    basepath: str, dir_path_content: str, template_path: str, dest_dir_path: str
-) -> None:
+    basepath: str,
+    dir_path_content: str,
+    template_path: str,
+    dest_dir_path: str,
+    manifest: BuildManifest | None = None,
+    jobs: int = 1,
+    render_cache: RenderCache | None = None,
+    extra_targets: Sequence[OutputTarget] = (),
+    assets: AssetMap | None = None,
+    minify: bool = False,
+    listings: Mapping[str, PageMeta] | None = None,
+    per_page: int = PER_PAGE,
+) -> list[Path]:
     # Get project root (assuming this file is in src/)
     project_root = Path(__file__).parent.parent
 
     # Convert to absolute paths
     content_dir = project_root / dir_path_content
-    dest_dir = project_root / dest_dir_path
+    targets = [
+        (target_basepath, project_root / target_dir)
+        for target_basepath, target_dir in ((basepath, dest_dir_path), *extra_targets)
+    ]
 
     if not content_dir.exists():
         raise FileNotFoundError(f"Content directory not found: {content_dir}")
 
-    # Recursively process all .md files
-    for item in content_dir.rglob("*.md"):
+    options = PageOptions(render_cache=render_cache, assets=assets, minify=minify)
+
+    # Everything except the page source itself that affects the output,
+    # hashed once per build rather than once per page
+    build_inputs = ""
+    if manifest is not None:
+        template = load_template(project_root / template_path, basepath)
+        build_inputs = combine_hashes(
+            generator_version(),
+            basepath,
+            *(f"{bp}={target_dir}" for bp, target_dir in targets[1:]),
+            *options.digest_parts(),
+            *(hash_file(path) for path in template.dependencies),
+        )
+
+    with span("generate_pages_recursive"):
+        return _generate_pages(
+            content_dir,
+            targets,
+            template_path,
+            build_inputs,
+            manifest,
+            jobs,
+            options,
+            plan_listings(listings, per_page) if listings is not None else [],
+        )
+
+
+# generated pages are listed for the first target only, the others mirror it
+def _generate_pages(
+    content_dir: Path,
+    targets: list[tuple[str, Path]],
+    template_path: str,
+    build_inputs: str,
+    manifest: BuildManifest | None,
+    jobs: int,
+    options: PageOptions,
+    listings: list[ListingPage],
+) -> list[Path]:
+    tasks: list[PageTask] = []
+    generated: list[Path] = []
+    records: list[tuple[str, str, str]] = []
+    seen_outputs: set[str] = set()
+
+    # Recursively collect all .md files
+    for item in sorted(content_dir.rglob("*.md")):
         # Calculate relative path from content dir
         rel_path = item.relative_to(content_dir)
 
         # Change extension from .md to .html
         html_rel_path = rel_path.with_suffix(".html")
 
-        # Build destination path
-        dest_file_path = dest_dir / html_rel_path
+        # Build destination paths, one per target
+        dest_file_paths = [dest_dir / html_rel_path for _, dest_dir in targets]
+
+        # Skip pages whose inputs are unchanged since the last build
+        if manifest is not None:
+            output_key = html_rel_path.as_posix()
+            seen_outputs.add(output_key)
+            digest = combine_hashes(build_inputs, manifest.source_hash(item))
+            if manifest.is_fresh(output_key, digest, dest_file_paths[0]) and all(
+                path.exists() for path in dest_file_paths[1:]
+            ):
+                continue
+            records.append((output_key, str(item), digest))
+
+        # absolute paths pass through render_page's
+        # project root resolution untouched
+        page_targets = tuple(
+            (basepath, str(path))
+            for (basepath, _), path in zip(targets, dest_file_paths)
+        )
+        tasks.append((str(item), template_path, page_targets, options))
+        generated.append(dest_file_paths[0])
+
+    # Generate the pages, only recording them once they were all written
+    memo_stats = run_page_tasks(tasks, jobs)
+    if memo_stats.hits:
+        print(
+            f"Block memo: {memo_stats.hits} of {memo_stats.hits + memo_stats.misses} "
+            f"blocks reused ({memo_stats.hit_rate():.0%})"
+        )
+
+    # Listings are built from page metadata, not from the rendered posts,
+    # so they are cheap enough for the parent. A listing page is only
+    # rewritten when the posts on it or its links to other pages changed
+    for listing in listings:
+        dest_file_paths = [dest_dir / listing.output_key for _, dest_dir in targets]
+        if manifest is not None:
+            seen_outputs.add(listing.output_key)
+            digest = combine_hashes(build_inputs, listing.digest())
+            if manifest.is_fresh(
+                listing.output_key, digest, dest_file_paths[0]
+            ) and all(path.exists() for path in dest_file_paths[1:]):
+                continue
+            source_key = LISTING_SOURCE + listing.section
+            records.append((listing.output_key, source_key, digest))
+
+        page_targets = tuple(
+            (basepath, str(path))
+            for (basepath, _), path in zip(targets, dest_file_paths)
+        )
+        render_listing(listing, template_path, page_targets, options)
+        generated.append(dest_file_paths[0])
+
+    if manifest is not None:
+        for output_key, source_key, digest in records:
+            manifest.record(output_key, source_key, digest)
+
+        # Outputs whose markdown source is gone get removed
+        for output_key in manifest.prune(seen_outputs):
+            for _, dest_dir in targets:
+                remove_output(dest_dir, dest_dir / output_key)
+        manifest.save()
+
+    return generated
+
 
-        # Convert back to relative paths for generate_page
-        from_path_rel = str(item.relative_to(project_root))
-        dest_path_rel = str(dest_file_path.relative_to(project_root))
+# deletes a generated file and any directories left empty by it,
+# never climbing above the destination root
+def remove_output(dest_dir: Path, output: Path) -> None:
+    print(f"Removing stale output {output}")
+    output.unlink(missing_ok=True)
 
-        # Generate the page
-        generate_page(basepath, from_path_rel, template_path, dest_path_rel)
+    parent = output.parent
+    while parent != dest_dir and dest_dir in parent.parents:
+        try:
+            parent.rmdir()
+        except OSError:
+            break  # not empty
+        parent = parent.parent
@@ -1,7 +1,18 @@
+from collections.abc import Callable
 from typing import final, override
 
+# anything that accepts text chunks: file.write, io.StringIO.write, list.append...
+HTMLSink = Callable[[str], object]
+
+# attributes holding a url, root-relative values of these are what
+# targets rebase for their basepath
+URL_ATTRIBUTES = frozenset(("href", "src"))
+
 
 class HTMLNode:
+    # no per-instance __dict__, a page build creates (and drops) a lot of these
+    __slots__ = ("children", "props", "tag", "value")
+
     def __init__(
         self,
         tag: str | None = None,
@@ -18,9 +29,18 @@ class HTMLNode:
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
 
-    def to_html(self) -> str:
+    # serializes the node into the sink chunk by chunk,
+    # without building intermediate strings for subtrees. With a `url` sink,
+    # root-relative href/src values go there instead of into `write`, so
+    # they can be rebased without touching any text
+    def write_html(self, write: HTMLSink, url: HTMLSink | None = None) -> None:
         raise NotImplementedError
 
+    def to_html(self) -> str:
+        parts: list[str] = []
+        self.write_html(parts.append)
+        return "".join(parts)
+
     def props_to_html(self):
         if self.props:
             all_props = ""
@@ -30,9 +50,32 @@ class HTMLNode:
         else:
             return ""
 
+    # opening tag with attributes, props are only serialized once
+    def start_tag(self) -> str:
+        if self.props:
+            return f"<{self.tag} {self.props_to_html()}>"
+        return f"<{self.tag}>"
+
+    # start_tag with its root-relative url values split out into `url`
+    def write_start_tag(self, write: HTMLSink, url: HTMLSink | None) -> None:
+        if url is None or not self.props:
+            _ = write(self.start_tag())
+            return
+        pending = f"<{self.tag}"
+        for key, value in self.props.items():
+            if key in URL_ATTRIBUTES and value.startswith("/"):
+                _ = write(f'{pending} {key}="')
+                _ = url(value)
+                pending = '"'
+            else:
+                pending += f' {key}="{value}"'
+        _ = write(f"{pending}>")
+
 
 @final
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
         tag: str | None = None,
@@ -44,19 +87,23 @@ class LeafNode(HTMLNode):
         super().__init__(tag, value, None, props)
 
     @override
-    def to_html(self) -> str:
+    def write_html(self, write: HTMLSink, url: HTMLSink | None = None) -> None:
         if self.tag is None and self.value is not None:
-            return self.value
-        elif self.tag == "img":  # Add this
-            props_str = " " + self.props_to_html() if self.props_to_html() else ""
-            return f"<{self.tag}{props_str}>"
+            _ = write(self.value)
+        elif url is not None and self.props:
+            self.write_start_tag(write, url)
+            if self.tag != "img":
+                _ = write(f"{self.value}</{self.tag}>")
+        elif self.tag == "img":  # void element, no closing tag
+            _ = write(self.start_tag())
         else:
-            props_str = " " + self.props_to_html() if self.props_to_html() else ""
-            return f"<{self.tag}{props_str}>{self.value}</{self.tag}>"
+            _ = write(f"{self.start_tag()}{self.value}</{self.tag}>")
 
 
 @final
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
         tag: str,
@@ -64,20 +111,49 @@ class ParentNode(HTMLNode):
         props: dict[str, str] | None = None,
     ):
         super().__init__(tag, None, children, props)
-        self.tag = tag
-        self.children = children
-        self.props = props
 
     @override
-    def to_html(self) -> str:
+    def write_html(self, write: HTMLSink, url: HTMLSink | None = None) -> None:
         if self.tag is None:
             raise ValueError("All parent nodes need to be tagged")
         if self.children is None:
             raise ValueError("All parent nodes need to have children")
 
-        props_str = " " + self.props_to_html() if self.props_to_html() else ""
-        html_str = f"<{self.tag}{props_str}>"
+        self.write_start_tag(write, url)
         for child in self.children:
-            html_str += child.to_html()
-        html_str += f"</{self.tag}>"
-        return html_str
+            child.write_html(write, url)
+        _ = write(f"</{self.tag}>")
+
+
+@final
+class SerializedNode(HTMLNode):
+    """An already serialized subtree, replayed into any sink"""
+
+    __slots__ = ("parts",)
+
+    def __init__(self, parts: list[str]):
+        super().__init__(None, None, None, None)
+        # text, url, text, url, ..., text: like a template's literals and
+        # slots, the root-relative href/src values stay separate
+        self.parts: list[str] = parts
+
+    # serializes a tree once so it can be written many times,
+    # for any basepath
+    @classmethod
+    def of(cls, node: HTMLNode) -> "SerializedNode":
+        parts: list[str] = []
+        text: list[str] = []
+
+        def split(value: str) -> None:
+            parts.append("".join(text))
+            parts.append(value)
+            text.clear()
+
+        node.write_html(text.append, split)
+        parts.append("".join(text))
+        return cls(parts)
+
+    @override
+    def write_html(self, write: HTMLSink, url: HTMLSink | None = None) -> None:
+        for index, part in enumerate(self.parts):
+            _ = (url if url is not None and index % 2 else write)(part)
@@ -0,0 +1,218 @@
+import json
+import os
+import posixpath
+import re
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import TypedDict, final
+from urllib.parse import unquote
+
+from src.conversions import inline_lines
+from src.manifest import combine_hashes, generator_version
+from src.md import iter_blocks
+from src.metadata import split_front_matter
+from src.search import page_path
+from src.text_parsing import tokenize_inline
+from src.textnode import TextType
+
+# bump when the state layout or the extraction rules change,
+# older state is simply discarded
+STATE_FORMAT = 1
+
+_SCHEME_RE = re.compile(r"[A-Za-z][A-Za-z0-9+.-]*:")
+
+
+# root-relative path (no leading slash, no basepath) a link points to, or
+# None for external urls and same-page anchors. Relative links are resolved
+# against `base`, the url path of the page they are on
+def internal_target(url: str, base: str) -> str | None:
+    if url.startswith("//") or _SCHEME_RE.match(url):
+        return None
+    path = unquote(url.split("#", 1)[0].split("?", 1)[0])
+    if not path:
+        return None
+    if not path.startswith("/"):
+        path = posixpath.join(posixpath.dirname("/" + base), path)
+    target = posixpath.normpath(path).lstrip("/")
+    if path.endswith("/") and target:
+        target += "/"
+    return target
+
+
+# output files a target may be served from, in the order a static host
+# tries them: "blog/tom" -> blog/tom/index.html, then blog/tom.html
+def output_candidates(target: str) -> tuple[str, ...]:
+    if not target or target.endswith("/"):
+        return (f"{target}index.html",)
+    if "." in target.rsplit("/", 1)[-1]:
+        return (target,)
+    return (f"{target}/index.html", f"{target}.html")
+
+
+# (kind, target) of every internal link and image on a page, in order and
+# without repeats. Same blocks and TextNodes the renderer sees, so links in
+# code are not links
+def page_links(markdown: str, rel_source: PurePosixPath) -> list[tuple[str, str]]:
+    base = page_path(rel_source)
+    edges: dict[tuple[str, str], None] = {}
+    for block_type, block in iter_blocks(markdown.split("\n")):
+        for line in inline_lines(block_type, block):
+            # most lines hold no link or image at all
+            if "](" not in line:
+                continue
+            for node in tokenize_inline(line.replace("\n", " ")):
+                if node.url is None:
+                    continue
+                target = internal_target(node.url, base)
+                if target is None:
+                    continue
+                kind = "image" if node.text_type == TextType.IMAGE else "link"
+                edges[(kind, target)] = None
+    return list(edges)
+
+
+# every file a built site serves, as output-relative posix paths:
+# generated pages plus everything under static/
+def site_outputs(pages: Iterable[str], static_dir: Path) -> set[str]:
+    outputs = set(pages)
+    root = str(static_dir)
+    for directory, _, names in os.walk(root):
+        prefix = os.path.relpath(directory, root).replace(os.sep, "/")
+        prefix = "" if prefix == "." else f"{prefix}/"
+        outputs.update(prefix + name for name in names)
+    return outputs
+
+
+class Edge(TypedDict):
+    kind: str
+    # as resolved by internal_target
+    target: str
+    # output file the target was found as, None when it is broken
+    output: str | None
+
+
+class PageLinks(TypedDict):
+    # generator version + source hash the edges were taken from
+    digest: str
+    edges: list[Edge]
+
+
+@dataclass
+class LinkReport:
+    # content-relative source paths whose links were extracted again
+    scanned: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    # edges whose target was looked up again
+    checked: int = 0
+
+
+@final
+class LinkGraph:
+    """Internal links and images of every page, checked against the built site"""
+
+    def __init__(self, state_path: Path):
+        self.state_path: Path = state_path
+        # content-relative source -> its outgoing edges
+        self.pages: dict[str, PageLinks] = {}
+        # site_outputs the edges were last checked against
+        self.outputs: set[str] = set()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if data.get("format") != STATE_FORMAT:
+            return
+        self.pages = data.get("pages", {})
+        self.outputs = set(data.get("outputs", []))
+
+    def save(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "format": STATE_FORMAT,
+            "pages": self.pages,
+            "outputs": sorted(self.outputs),
+        }
+        tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+        _ = tmp_path.write_text(json.dumps(data, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.state_path)
+
+    # extracts edges again for pages whose source changed and checks them.
+    # Edges of unchanged pages are only looked up again when a file they
+    # could point at appeared or disappeared since the last check
+    def update(
+        self,
+        content_dir: Path,
+        outputs: set[str],
+        hash_source: Callable[[Path], str],
+    ) -> LinkReport:
+        report = LinkReport()
+        version = generator_version()
+        shifted = outputs ^ self.outputs
+
+        seen: set[str] = set()
+        for source in sorted(content_dir.rglob("*.md")):
+            rel_source = source.relative_to(content_dir).as_posix()
+            seen.add(rel_source)
+            digest = combine_hashes(version, hash_source(source))
+            entry = self.pages.get(rel_source)
+            if entry is not None and entry["digest"] == digest:
+                if shifted:
+                    for edge in entry["edges"]:
+                        candidates = output_candidates(edge["target"])
+                        if not shifted.isdisjoint(candidates):
+                            edge["output"] = _resolve(candidates, outputs)
+                            report.checked += 1
+                continue
+
+            _, body = split_front_matter(source.read_text(encoding="utf-8"))
+            edges: list[Edge] = [
+                {
+                    "kind": kind,
+                    "target": target,
+                    "output": _resolve(output_candidates(target), outputs),
+                }
+                for kind, target in page_links(body, PurePosixPath(rel_source))
+            ]
+            self.pages[rel_source] = {"digest": digest, "edges": edges}
+            report.scanned.append(rel_source)
+            report.checked += len(edges)
+
+        for rel_source in [key for key in self.pages if key not in seen]:
+            del self.pages[rel_source]
+            report.removed.append(rel_source)
+
+        self.outputs = outputs
+        self.save()
+        return report
+
+    # (source, edge) of every link or image whose target does not exist
+    def broken(self) -> list[tuple[str, Edge]]:
+        return [
+            (rel_source, edge)
+            for rel_source, entry in sorted(self.pages.items())
+            for edge in entry["edges"]
+            if edge["output"] is None
+        ]
+
+    # output file -> sources of the pages linking to it or embedding it
+    def backlinks(self) -> dict[str, list[str]]:
+        incoming: dict[str, list[str]] = {}
+        for rel_source, entry in sorted(self.pages.items()):
+            for output in {edge["output"] for edge in entry["edges"]}:
+                if output is not None:
+                    incoming.setdefault(output, []).append(rel_source)
+        return incoming
+
+    # forgets everything, for builds without --check-links
+    def remove(self) -> None:
+        self.pages.clear()
+        self.outputs.clear()
+        self.state_path.unlink(missing_ok=True)
+
+
+def _resolve(candidates: tuple[str, ...], outputs: set[str]) -> str | None:
+    return next((output for output in candidates if output in outputs), None)
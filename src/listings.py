@@ -0,0 +1,133 @@
+from collections.abc import Mapping
+from pathlib import PurePosixPath
+from typing import NamedTuple
+
+from src.htmlnode import HTMLNode, LeafNode, ParentNode
+from src.manifest import combine_hashes
+from src.metadata import PageMeta
+from src.search import page_path
+
+# posts per listing page
+PER_PAGE = 10
+
+# manifest source of a listing page, "listing:blog". Listings have no
+# markdown source, the prefix also tells watch mode they were built
+LISTING_SOURCE = "listing:"
+
+
+class ListingPage(NamedTuple):
+    # content-relative directory, "blog"
+    section: str
+    # 1-based, page 1 is the section's own index.html
+    number: int
+    # (content-relative source, metadata) of the posts on this page
+    posts: list[tuple[str, PageMeta]]
+    has_older: bool
+
+    @property
+    def output_key(self) -> str:
+        return listing_path(self.section, self.number) + "index.html"
+
+    @property
+    def title(self) -> str:
+        name = section_title(self.section)
+        return name if self.number == 1 else f"{name}, page {self.number}"
+
+    # everything the page is written from, its posts' sources are not part
+    # of it: editing a post's body leaves its listing page alone
+    def digest(self) -> str:
+        return combine_hashes(
+            self.section,
+            str(self.number),
+            str(self.has_older),
+            *(
+                part
+                for rel_path, meta in self.posts
+                for part in (rel_path, meta.title or "", meta.date or "", meta.excerpt)
+            ),
+        )
+
+
+# root-relative url path of a listing page: "blog/", "blog/page/2/"
+def listing_path(section: str, number: int) -> str:
+    return f"{section}/" if number == 1 else f"{section}/page/{number}/"
+
+
+# "book-reviews" -> "Book reviews"
+def section_title(section: str) -> str:
+    name = PurePosixPath(section).name.replace("-", " ").replace("_", " ")
+    return name[:1].upper() + name[1:]
+
+
+# sections are directories without an index.md of their own, their posts the
+# pages right inside them (blog/tom/index.md, blog/notes.md). A hand-written
+# index.md always wins over a generated listing
+def find_sections(pages: Mapping[str, PageMeta]) -> dict[str, list[str]]:
+    sections: dict[str, list[str]] = {}
+    for rel_path in pages:
+        parts = PurePosixPath(rel_path).parts
+        if len(parts) == 3 and parts[2] == "index.md":
+            section = parts[0]
+        elif len(parts) >= 2 and parts[-1] != "index.md":
+            section = "/".join(parts[:-1])
+        else:
+            continue
+        if f"{section}/index.md" not in pages:
+            sections.setdefault(section, []).append(rel_path)
+    return sections
+
+
+# newest first, undated posts after dated ones, then by title. Posts only
+# move between pages when one is added or removed before them, so adding
+# the oldest post rewrites the last page alone
+def plan_listings(
+    pages: Mapping[str, PageMeta], per_page: int = PER_PAGE
+) -> list[ListingPage]:
+    listings: list[ListingPage] = []
+    for section, rel_paths in sorted(find_sections(pages).items()):
+        posts = [(rel_path, pages[rel_path]) for rel_path in rel_paths]
+        posts.sort(key=lambda post: (post[1].title or post[0]).lower())
+        posts.sort(key=lambda post: post[1].date or "", reverse=True)
+        for start in range(0, len(posts), per_page):
+            listings.append(
+                ListingPage(
+                    section,
+                    start // per_page + 1,
+                    posts[start : start + per_page],
+                    start + per_page < len(posts),
+                )
+            )
+    return listings
+
+
+# the page's Content: heading, one entry per post and links to the
+# neighbouring pages. Links are root-relative, targets rebase them
+def listing_node(listing: ListingPage) -> HTMLNode:
+    entries: list[HTMLNode] = []
+    for rel_path, meta in listing.posts:
+        href = "/" + page_path(PurePosixPath(rel_path))
+        # titles are plain text like the page's own <title>, markdown in
+        # them (an unmatched `_` even) must not fail the whole listing
+        entry: list[HTMLNode] = [
+            ParentNode("h2", [LeafNode("a", meta.title or href, {"href": href})])
+        ]
+        if meta.date:
+            entry.append(LeafNode("time", meta.date, {"datetime": meta.date}))
+        if meta.excerpt:
+            entry.append(LeafNode("p", meta.excerpt))
+        entries.append(ParentNode("li", entry))
+
+    children: list[HTMLNode] = [LeafNode("h1", listing.title)]
+    if entries:
+        children.append(ParentNode("ul", entries, {"class": "listing"}))
+
+    pagination: list[HTMLNode] = []
+    if listing.number > 1:
+        href = "/" + listing_path(listing.section, listing.number - 1)
+        pagination.append(LeafNode("a", "Newer posts", {"href": href, "rel": "prev"}))
+    if listing.has_older:
+        href = "/" + listing_path(listing.section, listing.number + 1)
+        pagination.append(LeafNode("a", "Older posts", {"href": href, "rel": "next"}))
+    if pagination:
+        children.append(ParentNode("nav", pagination, {"class": "pagination"}))
+    return ParentNode("div", children)
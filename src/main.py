@@ -1,7 +1,44 @@
+import argparse
+import os
 import shutil
-from pathlib import Path
-from src.html_generation import generate_pages_recursive
 import sys
+from collections.abc import Sequence
+from pathlib import Path, PurePosixPath
+from src.assets import ASSET_MANIFEST_NAME, AssetMap, build_asset_map
+from src.compress import ENCODINGS, compress_tree, remove_sidecars
+from src.generations import DEFAULT_KEEP, GenerationStore
+from src.html_generation import (
+    OutputTarget,
+    PageGenerationError,
+    generate_pages_recursive,
+)
+from src.links import LinkGraph, site_outputs
+from src.listings import LISTING_SOURCE
+from src.manifest import BuildManifest
+from src.metadata import MetadataIndex
+from src.render_cache import DEFAULT_MAX_BYTES, RenderCache
+from src.search import SearchIndex
+from src.sitemap import Sitemap
+from src.sync import LinkMode, sync_tree
+from src.template import PARTIALS_DIR
+from src import tracing
+from src.tracing import span
+from src.watch import watch, within
+
+# build state that has to survive between runs, kept outside docs/
+BUILD_STATE_DIR = ".build"
+
+RENDER_CACHE_DIR = "render-cache"
+
+GENERATIONS_DIR = "generations"
+
+SEARCH_STATE = "search-index.json"
+
+METADATA_INDEX = "metadata.json"
+
+SITEMAP_STATE = "sitemap.json"
+
+LINK_GRAPH = "links.json"
 
 
 def copy_files_recursive(src: Path, dst: Path) -> None:
@@ -23,44 +60,646 @@ def copy_files_recursive(src: Path, dst: Path) -> None:
             _ = shutil.copy2(src_item, dst_item)
 
 
-def deploy_static_to_public() -> None:
+def deploy_static_to_public(
+    clean: bool = True,
+    manifest: BuildManifest | None = None,
+    link_mode: LinkMode = LinkMode.COPY,
+    checksum: bool = False,
+    extra_dirs: Sequence[str] = (),
+    public_dir: str = "docs",
+    assets: AssetMap | None = None,
+) -> None:
     # Get absolute path of the script's directory (project root)
     script_dir = Path(__file__).parent.parent  # Go up from src/ to project root
     static_path = script_dir / "static"
-    public_path = script_dir / "docs"
+    public_paths = [script_dir / public_dir, *(script_dir / d for d in extra_dirs)]
 
     print(f"Static source: {static_path}")
-    print(f"Public target: {public_path}")
+    print(f"Public target: {', '.join(str(path) for path in public_paths)}")
 
     # Safety check - ensure we're in the right directory
     if not static_path.exists():
         raise FileNotFoundError(f"Static directory not found at {static_path}")
 
-    # Clear public directory first
-    if public_path.exists():
-        print(f"Removing existing public directory: {public_path}")
-        shutil.rmtree(public_path)
+    # Clear public directories first, incremental builds keep
+    # previously generated pages around instead
+    for public_path in public_paths:
+        if clean and public_path.exists():
+            print(f"Removing existing public directory: {public_path}")
+            shutil.rmtree(public_path)
 
-    print("Starting recursive copy...")
-    copy_files_recursive(static_path, public_path)
+    if manifest is None:
+        print("Starting recursive copy...")
+        with span("static_copy"):
+            for public_path in public_paths:
+                copy_files_recursive(static_path, public_path)
+        return
 
+    # Only copy what changed and drop what was removed from static/,
+    # every output tree mirrors the same files
+    previous = manifest.static_files
+    for public_path in public_paths:
+        with span("static_sync"):
+            result = sync_tree(
+                static_path,
+                public_path,
+                previous=previous,
+                mode=link_mode,
+                checksum=checksum,
+                rename=assets.names if assets is not None else None,
+            )
+        manifest.static_files = result.files
+        print(
+            f"Static sync to {public_path}: {len(result.copied)} copied, "
+            f"{len(result.deleted)} removed, "
+            f"{len(result.files) - len(result.copied)} unchanged"
+        )
+
+        if assets is not None:
+            # listed with the synced files, so a build
+            # without fingerprints removes it again
+            _ = (public_path / ASSET_MANIFEST_NAME).write_text(
+                assets.manifest_json(), encoding="utf-8"
+            )
+            manifest.static_files = [*result.files, ASSET_MANIFEST_NAME]
+
+
+def build(
+    basepath: str = "/",
+    force: bool = False,
+    jobs: int = 1,
+    link_mode: LinkMode = LinkMode.COPY,
+    checksum: bool = False,
+    extra_targets: Sequence[OutputTarget] = (),
+    atomic: bool = False,
+    keep: int = DEFAULT_KEEP,
+    compress: bool = False,
+    fingerprint: bool = False,
+    minify: bool = False,
+    search: bool = False,
+    site_url: str | None = None,
+    listings: bool = False,
+    check_links: bool = False,
+) -> None:
+    project_root = Path(__file__).parent.parent
+    manifest_path = project_root / BUILD_STATE_DIR / "manifest.json"
+    if force:
+        manifest_path.unlink(missing_ok=True)
+    manifest = BuildManifest.load(manifest_path)
+
+    # atomic builds go into a staging copy of the live generation,
+    # docs/ keeps serving the previous build until the swap. State saved
+    # along the way is put back if the staged build is thrown away
+    store = open_generations(keep) if atomic else None
+    staging = (
+        store.stage(empty=force, state=output_state()) if store is not None else None
+    )
+    public_dir = str(staging) if staging is not None else "docs"
+
+    # content-hashed static names, every href/src pointing at them is rewritten
+    assets = build_asset_map(project_root / "static") if fingerprint else None
 
-def main() -> None:
     try:
-        basepath = sys.argv[1]
-    except IndexError:
-        basepath = "/"
+        print("Starting static deployment...")
+        deploy_static_to_public(
+            clean=force and staging is None,
+            manifest=manifest,
+            link_mode=link_mode,
+            checksum=checksum,
+            extra_dirs=[target_dir for _, target_dir in extra_targets],
+            public_dir=public_dir,
+            assets=assets,
+        )
+        print("Static files deployed to public/")
+
+        # section listings come from page metadata, a build without them
+        # prunes an earlier build's listing pages like removed pages
+        pages = (
+            open_metadata_index().collect(project_root / "content")
+            if listings
+            else None
+        )
+
+        # unlike the manifest the render cache survives --force, a
+        # clean build still reuses every page whose markdown is unchanged
+        render_cache = open_render_cache()
+        _ = generate_pages_recursive(
+            basepath,
+            "content/",
+            "template.html",
+            public_dir,
+            manifest=manifest,
+            jobs=jobs,
+            render_cache=render_cache,
+            extra_targets=extra_targets,
+            assets=assets,
+            minify=minify,
+            listings=pages,
+        )
+        _ = render_cache.gc()
+
+        outputs = [
+            (basepath, project_root / public_dir),
+            *(
+                (target_basepath, project_root / target_dir)
+                for target_basepath, target_dir in extra_targets
+            ),
+        ]
+        search_index = open_search_index()
+        if search:
+            update_search_index(search_index, manifest, [root for _, root in outputs])
+        elif search_index.pages:
+            # an index from an earlier --search build would go stale
+            search_index.remove([root for _, root in outputs])
+
+        sitemap = open_sitemap()
+        if site_url is not None:
+            update_sitemap(sitemap, site_url, manifest, outputs)
+        elif sitemap.entries:
+            sitemap.remove([root for _, root in outputs])
+
+        link_graph = open_link_graph()
+        if check_links:
+            _ = update_link_graph(link_graph, manifest)
+        elif link_graph.pages:
+            link_graph.remove()
+
+        trees = [("docs", public_dir), *((d, d) for _, d in extra_targets)]
+        if compress:
+            compress_outputs(manifest, trees, jobs)
+        elif manifest.compressed:
+            # sidecars of an earlier --compress build would go stale
+            remove_compressed(manifest, trees)
+    except BaseException:
+        if store is not None and staging is not None:
+            store.discard(staging)
+        raise
+
+    if store is not None and staging is not None:
+        _ = store.activate(staging)
+
+
+# writes .gz (and .zst) sidecars next to every text file of each output
+# tree, only for files whose content changed since the last build
+def compress_outputs(
+    manifest: BuildManifest, trees: Sequence[tuple[str, str]], jobs: int
+) -> None:
+    project_root = Path(__file__).parent.parent
+    for label, directory in trees:
+        with span("compress"):
+            records, result = compress_tree(
+                project_root / directory, manifest.compressed.get(label, {}), jobs
+            )
+        manifest.compressed[label] = records
+        print(
+            f"Compressed {len(result.compressed)} files in {directory} "
+            f"({', '.join(ENCODINGS)}), {len(result.unchanged)} unchanged"
+        )
+    manifest.save()
+
+
+def remove_compressed(
+    manifest: BuildManifest, trees: Sequence[tuple[str, str]]
+) -> None:
+    project_root = Path(__file__).parent.parent
+    for label, directory in trees:
+        for rel_path, record in manifest.compressed.pop(label, {}).items():
+            remove_sidecars(
+                project_root / directory / rel_path, list(record["sidecars"])
+            )
+    manifest.compressed.clear()
+    print("Removed precompressed sidecars, pass --compress to keep them")
+    manifest.save()
+
+
+# re-indexes changed pages and rewrites the search shards they touch
+# in every output tree
+def update_search_index(
+    search_index: SearchIndex, manifest: BuildManifest, roots: Sequence[Path]
+) -> None:
+    project_root = Path(__file__).parent.parent
+    with span("search_index"):
+        result = search_index.update(
+            project_root / "content", roots, manifest.source_hash
+        )
+    print(
+        f"Search index: {len(result.indexed)} pages indexed, "
+        f"{len(result.removed)} removed, {len(result.shards)} shards rewritten"
+    )
+
+
+# sitemap.xml (sharded past 50k urls) and blog/atom.xml, lastmod comes
+# from the build that first saw each page's current source
+def update_sitemap(
+    sitemap: Sitemap,
+    site_url: str,
+    manifest: BuildManifest,
+    outputs: Sequence[tuple[str, Path]],
+) -> None:
+    project_root = Path(__file__).parent.parent
+    content_dir = project_root / "content"
+    with span("sitemap"):
+        pages = open_metadata_index().collect(content_dir)
+        result = sitemap.update(
+            site_url, content_dir, pages, outputs, manifest.source_hash
+        )
+    print(
+        f"Sitemap: {len(result.changed)} pages changed, {len(result.removed)} "
+        f"removed, {result.files} files rewritten"
+        + (", feed rewritten" if result.feed else "")
+    )
+
+
+# re-extracts the links of changed pages, looks up the ones whose target
+# may have come or gone, and prints every broken link and missing image.
+# Returns whether none are broken
+def update_link_graph(link_graph: LinkGraph, manifest: BuildManifest) -> bool:
+    project_root = Path(__file__).parent.parent
+    outputs = site_outputs(manifest.pages, project_root / "static")
+    with span("link_graph"):
+        report = link_graph.update(
+            project_root / "content", outputs, manifest.source_hash
+        )
+    broken = link_graph.broken()
+    print(
+        f"Links: {len(report.scanned)} pages scanned, {report.checked} links "
+        f"checked, {len(broken)} broken"
+    )
+    for rel_source, edge in broken:
+        print(f"  {rel_source}: {edge['kind']} to /{edge['target']} not found")
+    return not broken
+
+
+# state describing what the last build wrote rather than the content, it
+# goes with the generation when a staged build is discarded or rolled back
+def output_state() -> list[Path]:
+    state_dir = Path(__file__).parent.parent / BUILD_STATE_DIR
+    return [
+        state_dir / name
+        for name in ("manifest.json", SEARCH_STATE, SITEMAP_STATE, LINK_GRAPH)
+    ]
+
+
+def open_link_graph() -> LinkGraph:
+    project_root = Path(__file__).parent.parent
+    return LinkGraph(project_root / BUILD_STATE_DIR / LINK_GRAPH)
+
+
+def open_sitemap() -> Sitemap:
+    project_root = Path(__file__).parent.parent
+    return Sitemap(project_root / BUILD_STATE_DIR / SITEMAP_STATE)
+
+
+def open_search_index() -> SearchIndex:
+    project_root = Path(__file__).parent.parent
+    return SearchIndex(project_root / BUILD_STATE_DIR / SEARCH_STATE)
+
+
+def open_metadata_index() -> MetadataIndex:
+    project_root = Path(__file__).parent.parent
+    return MetadataIndex(project_root / BUILD_STATE_DIR / METADATA_INDEX)
+
+
+def open_generations(keep: int = DEFAULT_KEEP) -> GenerationStore:
+    project_root = Path(__file__).parent.parent
+    return GenerationStore(
+        project_root / BUILD_STATE_DIR / GENERATIONS_DIR, project_root / "docs", keep
+    )
+
+
+def open_render_cache(max_bytes: int = DEFAULT_MAX_BYTES) -> RenderCache:
+    project_root = Path(__file__).parent.parent
+    return RenderCache(project_root / BUILD_STATE_DIR / RENDER_CACHE_DIR, max_bytes)
+
+
+# rebuild step for watch mode: a static change re-syncs static/ (a stat
+# per file, only changed files are copied), anything else goes through the
+# manifest, which re-renders only pages whose inputs actually changed
+def rebuild_changed(changed: set[Path], basepath: str, jobs: int) -> None:
+    project_root = Path(__file__).parent.parent
+    static_path = project_root / "static"
+    manifest = BuildManifest.load(project_root / BUILD_STATE_DIR / "manifest.json")
+
+    # static/ itself after a watcher overflow, the sync covers the whole tree
+    static_changes = {path for path in changed if within(path, static_path)}
+    if static_changes:
+        deploy_static_to_public(clean=False, manifest=manifest)
+        manifest.save()
+
+    if changed - static_changes:
+        # the last full build had section listings, keep them current
+        listings = any(
+            entry["source"].startswith(LISTING_SOURCE)
+            for entry in manifest.pages.values()
+        )
+        _ = generate_pages_recursive(
+            basepath,
+            "content/",
+            "template.html",
+            "docs/",
+            manifest=manifest,
+            jobs=jobs,
+            render_cache=open_render_cache(),
+            listings=(
+                open_metadata_index().collect(project_root / "content")
+                if listings
+                else None
+            ),
+        )
+
+    # the last full build had a search index, keep it current
+    search_index = open_search_index()
+    if search_index.pages:
+        update_search_index(search_index, manifest, [project_root / "docs"])
+
+    sitemap = open_sitemap()
+    if sitemap.entries:
+        outputs = [(basepath, project_root / "docs")]
+        update_sitemap(sitemap, sitemap.site_url, manifest, outputs)
+
+    link_graph = open_link_graph()
+    if link_graph.pages:
+        _ = update_link_graph(link_graph, manifest)
 
-    print("Starting static deployment...")
-    deploy_static_to_public()
-    print("Static files deployed to public/")
+    # the last full build precompressed docs/, keep its sidecars current
+    if "docs" in manifest.compressed:
+        compress_outputs(manifest, [("docs", "docs")], jobs)
 
-    generate_pages_recursive(
-        basepath,
-        "content/",
-        "template.html",
-        "docs/",
+
+def watch_site(basepath: str, jobs: int, port: int, force_polling: bool) -> None:
+    project_root = Path(__file__).parent.parent
+    build(basepath, jobs=jobs)
+
+    roots = [
+        project_root / "content",
+        project_root / "static",
+        project_root / "template.html",
+    ]
+    partials = project_root / PARTIALS_DIR
+    if partials.is_dir():
+        roots.append(partials)
+
+    watch(
+        roots,
+        lambda changed: rebuild_changed(changed, basepath, jobs),
+        serve_dir=project_root / "docs",
+        port=port,
+        force_polling=force_polling,
+        rebuild_errors=(PageGenerationError, OSError, ValueError),
+    )
+
+
+def cache_command(action: str, max_size: int | None) -> None:
+    cache = open_render_cache()
+    if action == "gc":
+        removed = cache.gc(max_size)
+        print(f"Removed {removed} cached renders")
+    stats = cache.stats()
+    print(
+        f"{stats.entries} cached renders, {stats.total_bytes / 2**20:.1f} MiB "
+        f"of {stats.max_bytes / 2**20:.0f} MiB in {cache.directory}"
+    )
+
+
+def generations_command(action: str, name: str | None) -> None:
+    store = open_generations()
+    if action == "rollback":
+        try:
+            _ = store.rollback(name, state=output_state())
+        except ValueError as e:
+            sys.exit(str(e))
+        return
+
+    current = store.current()
+    for generation in store.generations():
+        marker = "*" if generation == current else " "
+        print(f"{marker} {generation.name}")
+
+
+# newest first, pages without a date last
+def pages_command() -> None:
+    project_root = Path(__file__).parent.parent
+    pages = open_metadata_index().collect(project_root / "content")
+    for rel_path, meta in sorted(
+        pages.items(), key=lambda item: item[1].date or "", reverse=True
+    ):
+        tags = f"  [{', '.join(meta.tags)}]" if meta.tags else ""
+        print(f"{meta.date or '-':<10}  {rel_path}  {meta.title}{tags}")
+
+
+# checks links against the last build's output. With a page (its content
+# path, "blog/tom/index.md") lists the pages linking to it instead
+def links_command(page: str | None) -> bool:
+    project_root = Path(__file__).parent.parent
+    manifest = BuildManifest.load(project_root / BUILD_STATE_DIR / "manifest.json")
+    link_graph = open_link_graph()
+    if page is None:
+        return update_link_graph(link_graph, manifest)
+
+    _ = link_graph.update(
+        project_root / "content",
+        site_outputs(manifest.pages, project_root / "static"),
+        manifest.source_hash,
+    )
+    output = PurePosixPath(page).with_suffix(".html").as_posix()
+    for rel_source in link_graph.backlinks().get(output, []):
+        print(rel_source)
+    return True
+
+
+# `--target /preview/=preview` -> ("/preview/", "preview")
+def parse_target(value: str) -> OutputTarget:
+    basepath, sep, directory = value.partition("=")
+    if not sep or not basepath or not directory:
+        raise argparse.ArgumentTypeError(f"expected BASEPATH=DIR, got {value!r}")
+    return basepath, directory
+
+
+COMMANDS = ("build", "watch", "cache", "generations", "pages", "links")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the static site")
+    commands = parser.add_subparsers(dest="command")
+
+    build_parser = commands.add_parser("build", help="build the site (default)")
+    watch_parser = commands.add_parser(
+        "watch", help="build, serve docs/ and rebuild on changes with live reload"
+    )
+    for command_parser in (build_parser, watch_parser):
+        _ = command_parser.add_argument(
+            "basepath",
+            nargs="?",
+            default="/",
+            help="URL prefix the site is served from",
+        )
+        _ = command_parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=1,
+            help="render pages in N worker processes (0 = one per CPU)",
+        )
+    _ = build_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="ignore the build manifest and rebuild everything from scratch",
+    )
+    _ = build_parser.add_argument(
+        "--link",
+        choices=[mode.value for mode in LinkMode],
+        default=LinkMode.COPY.value,
+        help="how static files are placed in docs/ (falls back to copy)",
+    )
+    _ = build_parser.add_argument(
+        "--trace",
+        type=Path,
+        metavar="TRACE_JSON",
+        help="record build spans as Chrome trace events and print a per-page summary",
+    )
+    _ = build_parser.add_argument(
+        "--target",
+        type=parse_target,
+        action="append",
+        default=[],
+        metavar="BASEPATH=DIR",
+        help="also write the site to DIR for BASEPATH, rendering every page once",
     )
+    _ = build_parser.add_argument(
+        "--atomic",
+        action="store_true",
+        help="build into a new generation and swap docs/ (then a symlink) to it",
+    )
+    _ = build_parser.add_argument(
+        "--keep",
+        type=int,
+        default=DEFAULT_KEEP,
+        help="older generations kept for rollback with --atomic",
+    )
+    _ = build_parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="write .gz (and .zst when available) sidecars next to text files",
+    )
+    _ = build_parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="give static assets content-hashed names and rewrite links to them",
+    )
+    _ = build_parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="collapse whitespace in generated pages, pre/code left as is",
+    )
+    _ = build_parser.add_argument(
+        "--search",
+        action="store_true",
+        help="write a sharded search index to search/, updated incrementally",
+    )
+    _ = build_parser.add_argument(
+        "--site-url",
+        metavar="URL",
+        help="origin the site is served from, writes sitemap.xml and blog/atom.xml",
+    )
+    _ = build_parser.add_argument(
+        "--listings",
+        action="store_true",
+        help="generate paginated listings of directories without an index.md",
+    )
+    _ = build_parser.add_argument(
+        "--check-links",
+        action="store_true",
+        help="report broken internal links and missing images after the build",
+    )
+    _ = build_parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="compare static files by content hash instead of size and mtime",
+    )
+    _ = watch_parser.add_argument("--port", type=int, default=8888)
+    _ = watch_parser.add_argument(
+        "--poll", action="store_true", help="poll for changes instead of inotify"
+    )
+
+    cache_parser = commands.add_parser("cache", help="inspect or trim the render cache")
+    _ = cache_parser.add_argument("action", choices=["stats", "gc"])
+    _ = cache_parser.add_argument(
+        "--max-size",
+        type=int,
+        metavar="BYTES",
+        help="gc down to this many bytes instead of the default cap",
+    )
+
+    generations_parser = commands.add_parser(
+        "generations", help="list atomic build generations or roll back"
+    )
+    _ = generations_parser.add_argument("action", choices=["list", "rollback"])
+    _ = generations_parser.add_argument(
+        "name", nargs="?", help="generation to roll back to (default: previous)"
+    )
+
+    _ = commands.add_parser(
+        "pages", help="list every page's front matter title, date and tags"
+    )
+
+    links_parser = commands.add_parser(
+        "links", help="report broken internal links, or the backlinks of a page"
+    )
+    _ = links_parser.add_argument(
+        "page", nargs="?", help="content path of a page, lists pages linking to it"
+    )
+
+    # `main.py /site-architect/` predates subcommands and still means build
+    argv = sys.argv[1:]
+    if not argv or argv[0] not in (*COMMANDS, "-h", "--help"):
+        argv.insert(0, "build")
+    args = parser.parse_args(argv)
+
+    if args.command == "cache":
+        cache_command(args.action, args.max_size)
+        return
+    if args.command == "generations":
+        generations_command(args.action, args.name)
+        return
+    if args.command == "pages":
+        pages_command()
+        return
+    if args.command == "links":
+        if not links_command(args.page):
+            sys.exit(1)
+        return
+
+    basepath: str = args.basepath
+    jobs: int = args.jobs or os.cpu_count() or 1
+    if args.command == "watch":
+        watch_site(basepath, jobs, args.port, args.poll)
+    else:
+        trace_path: Path | None = args.trace
+        tracer = tracing.enable() if trace_path is not None else None
+        build(
+            basepath,
+            force=args.force,
+            jobs=jobs,
+            link_mode=LinkMode(args.link),
+            checksum=args.checksum,
+            extra_targets=args.target,
+            atomic=args.atomic,
+            keep=args.keep,
+            compress=args.compress,
+            fingerprint=args.fingerprint,
+            minify=args.minify,
+            search=args.search,
+            site_url=args.site_url,
+            listings=args.listings,
+            check_links=args.check_links,
+        )
+        if tracer is not None and trace_path is not None:
+            _ = tracing.disable()
+            tracer.write_chrome_trace(trace_path)
+            print(tracer.format_summary())
+            print(
+                f"Trace written to {trace_path} (open in chrome://tracing or Perfetto)"
+            )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+from functools import cache
+from pathlib import Path
+
+# bump this whenever the manifest layout changes,
+# older manifests are simply discarded
+MANIFEST_FORMAT = 1
+
+
+# hashes raw bytes of a file, used for sources, templates and assets
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# combines several input hashes/values into a single digest
+def combine_hashes(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+# fingerprint of the generator itself: every module in src/ is hashed,
+# so editing the renderer invalidates all previously generated pages
+@cache
+def generator_version() -> str:
+    src_dir = Path(__file__).parent
+    return combine_hashes(
+        *(hash_file(module) for module in sorted(src_dir.glob("*.py")))
+    )
+
+
+class BuildManifest:
+    """Persistent record of what the last build produced and from which inputs"""
+
+    def __init__(self, path: Path):
+        self.path: Path = path
+        # output path (relative to dest dir) -> {"source", "digest"}
+        self.pages: dict[str, dict[str, str]] = {}
+        # source path -> {"mtime_ns", "size", "hash"}, lets us skip
+        # re-reading files that were not touched since the last build
+        self.sources: dict[str, dict[str, int | str]] = {}
+        # dest-relative paths of files synced from static/, so files
+        # removed from static/ can be removed from the output too
+        self.static_files: list[str] = []
+        # output tree -> file -> {"digest", "sidecars"} of its precompressed
+        # copies, so unchanged files are not compressed again
+        self.compressed: dict[str, dict[str, dict[str, str | list[str]]]] = {}
+
+    @classmethod
+    def load(cls, path: Path) -> "BuildManifest":
+        manifest = cls(path)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return manifest
+
+        # anything written by an incompatible version is ignored,
+        # which just means the next build is a full one
+        if data.get("format") != MANIFEST_FORMAT:
+            return manifest
+
+        manifest.pages = data.get("pages", {})
+        manifest.sources = data.get("sources", {})
+        manifest.static_files = data.get("static", [])
+        manifest.compressed = data.get("compressed", {})
+        return manifest
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "format": MANIFEST_FORMAT,
+            "pages": self.pages,
+            "sources": self.sources,
+            "static": self.static_files,
+            "compressed": self.compressed,
+        }
+
+        # write next to the real file and swap it in, so an interrupted
+        # build never leaves a truncated manifest behind
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        _ = tmp_path.write_text(json.dumps(data, indent=1, sort_keys=True), "utf-8")
+        os.replace(tmp_path, self.path)
+
+    # returns content hash of a source file, reusing the recorded one
+    # when size and mtime still match
+    def source_hash(self, path: Path) -> str:
+        key = str(path)
+        stat = path.stat()
+        entry = self.sources.get(key)
+        if (
+            entry is not None
+            and entry["mtime_ns"] == stat.st_mtime_ns
+            and entry["size"] == stat.st_size
+        ):
+            return str(entry["hash"])
+
+        file_hash = hash_file(path)
+        self.sources[key] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "hash": file_hash,
+        }
+        return file_hash
+
+    # a page is fresh when its inputs digest is unchanged
+    # and the output from the last build is still on disk
+    def is_fresh(self, output_key: str, digest: str, output_path: Path) -> bool:
+        entry = self.pages.get(output_key)
+        return entry is not None and entry["digest"] == digest and output_path.exists()
+
+    def record(self, output_key: str, source_key: str, digest: str) -> None:
+        self.pages[output_key] = {"source": source_key, "digest": digest}
+
+    # drops and returns every recorded output that
+    # was not produced (or skipped as fresh) this build
+    def prune(self, seen_outputs: set[str]) -> list[str]:
+        stale = [key for key in self.pages if key not in seen_outputs]
+        for key in stale:
+            source_key = self.pages.pop(key)["source"]
+            _ = self.sources.pop(source_key, None)
+        return stale
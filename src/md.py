@@ -1,3 +1,4 @@
+from collections.abc import Iterable, Iterator
 from enum import Enum
 import re
 
@@ -51,6 +52,105 @@ def block_to_blocktype(block: str) -> BlockType:
     return BlockType.TEXT
 
 
+_HEADER_RE = re.compile(r"#{1,6}\s")
+
+
+# Line-driven replacement for markdown_to_blocks + block_to_blocktype
+#
+# Consumes any iterable of lines (a list, str.split("\n"), an open file)
+# and lazily yields (BlockType, block) pairs, so only the current block is
+# ever held in memory. Block types are worked out while lines arrive
+# instead of re-splitting and re-scanning the finished block.
+#
+# Differences from the split-on-"\n\n" version:
+#   - a fence opened with ``` runs until a line ending in ```, blank
+#     lines inside it no longer cut the code block apart
+#   - whitespace-only lines separate blocks, just like empty ones
+def iter_blocks(lines: Iterable[str]) -> Iterator[tuple[BlockType, str]]:
+    block: list[str] = []
+    in_fence = False
+
+    # "every line so far" flags for the block being collected
+    all_quote = all_list = all_numlist = False
+
+    for raw_line in lines:
+        line = raw_line.rstrip("\r\n")
+
+        if in_fence:
+            block.append(line)
+            if line.rstrip().endswith("```"):
+                yield BlockType.CODE, "\n".join(block).strip()
+                block = []
+                in_fence = False
+            continue
+
+        if not line.strip():
+            if block:
+                yield _finish_block(block, all_quote, all_list, all_numlist)
+                block = []
+            continue
+
+        if not block:
+            # blocks are stripped, so the first line loses its indentation
+            line = line.lstrip()
+            if line.startswith("```"):
+                block.append(line)
+                closing = line.rstrip()
+                # ```code``` on a single line is a complete block
+                if len(closing) >= 6 and closing.endswith("```"):
+                    yield BlockType.CODE, closing
+                    block = []
+                else:
+                    in_fence = True
+                continue
+            all_quote = all_list = all_numlist = True
+
+        all_quote = all_quote and line.startswith(">")
+        all_list = all_list and len(line) > 1 and line[0] == "-" and line[1].isspace()
+        if all_numlist:
+            # numbering has to count up from 1 without gaps
+            number = f"{len(block) + 1}."
+            all_numlist = (
+                line.startswith(number)
+                and len(line) > len(number)
+                and line[len(number)].isspace()
+            )
+        block.append(line)
+
+    if block:
+        if in_fence:
+            # fence never closed, keep it as plain text like block_to_blocktype does
+            yield BlockType.TEXT, "\n".join(block).strip()
+        else:
+            yield _finish_block(block, all_quote, all_list, all_numlist)
+
+
+def _finish_block(
+    block: list[str], all_quote: bool, all_list: bool, all_numlist: bool
+) -> tuple[BlockType, str]:
+    text = "\n".join(block).rstrip()
+
+    # the flags saw the last line before it lost its trailing whitespace,
+    # "- " is a list item but "-" is not
+    last = text[text.rfind("\n") + 1 :]
+    if all_list:
+        all_list = len(last) > 1 and last[1].isspace()
+    if all_numlist:
+        number = f"{len(block)}."
+        all_numlist = len(last) > len(number) and last[len(number)].isspace()
+
+    # same precedence as block_to_blocktype
+    if _HEADER_RE.match(text):
+        return BlockType.HEADER, text
+    if all_quote:
+        return BlockType.BLOCKQUOTE, text
+    if all_list:
+        return BlockType.LIST, text
+    if all_numlist:
+        return BlockType.NUMLIST, text
+    return BlockType.TEXT, text
+
+
 def extract_title(markdown: str) -> str:
     lines = markdown.strip().split("\n")
     title_lines = [line for line in lines if line.startswith("# ")]
@@ -0,0 +1,289 @@
+import json
+import os
+import re
+from collections.abc import Iterable
+from itertools import chain
+from pathlib import Path
+from typing import NamedTuple, TypedDict, final
+
+from src.md import BlockType, iter_blocks
+from src.text_parsing import tokenize_inline
+from src.textnode import TextType
+
+# front matter opens and closes with a line of exactly this
+FENCE = "---"
+
+# a header longer than this is taken for content that happens
+# to start with a horizontal rule, not for front matter
+MAX_HEADER_LINES = 200
+
+# excerpts longer than this are cut at a word boundary
+EXCERPT_LENGTH = 200
+
+# bump when the index layout or the parsing rules change,
+# older indexes are simply discarded
+INDEX_FORMAT = 2
+
+FrontMatter = dict[str, str | list[str]]
+
+_FIELD_RE = re.compile(r"([A-Za-z_][\w-]*)\s*:\s*(.*)")
+
+
+class PageMeta(NamedTuple):
+    # front matter title, else the first `# ` heading
+    title: str | None
+    # as written, ISO dates (2024-05-01) sort correctly as strings
+    date: str | None
+    tags: list[str]
+    # every front matter field, including the ones above
+    fields: FrontMatter
+    # front matter summary, else the plain text of the first paragraph
+    excerpt: str = ""
+
+
+def _unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+# YAML-like subset: `key: value`, `key: [a, b]`, and `key:` followed by
+# `- item` lines. Everything is a string or a list of strings.
+# Returns the fields and how many lines the header took (fences included),
+# or None when the lines do not start with a complete header
+def parse_front_matter(lines: Iterable[str]) -> tuple[FrontMatter, int] | None:
+    fields: FrontMatter = {}
+    current_list: list[str] | None = None
+
+    for count, raw_line in enumerate(lines, start=1):
+        line = raw_line.rstrip("\r\n")
+        if count == 1:
+            if line.rstrip() != FENCE:
+                return None
+            continue
+        if line.rstrip() == FENCE:
+            return fields, count
+        if count > MAX_HEADER_LINES:
+            return None
+
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.startswith("- ") and current_list is not None:
+            current_list.append(_unquote(stripped[2:]))
+            continue
+
+        match = _FIELD_RE.fullmatch(stripped)
+        if match is None:
+            return None  # not front matter after all
+        key, value = match.group(1), match.group(2).strip()
+        current_list = None
+        if not value:
+            current_list = []
+            fields[key] = current_list
+        elif value.startswith("[") and value.endswith("]"):
+            fields[key] = [
+                _unquote(item) for item in value[1:-1].split(",") if item.strip()
+            ]
+        else:
+            fields[key] = _unquote(value)
+
+    return None  # header never closed
+
+
+# splits a page into its front matter (empty without one) and the markdown body
+def split_front_matter(markdown: str) -> tuple[FrontMatter, str]:
+    if not markdown.startswith(FENCE):
+        return {}, markdown
+    lines = markdown.split("\n")
+    parsed = parse_front_matter(lines)
+    if parsed is None:
+        return {}, markdown
+    fields, header_lines = parsed
+    return fields, "\n".join(lines[header_lines:])
+
+
+def _string_field(fields: FrontMatter, key: str) -> str | None:
+    value = fields.get(key)
+    return value if isinstance(value, str) else None
+
+
+def page_meta(
+    fields: FrontMatter, heading: str | None, excerpt: str | None = None
+) -> PageMeta:
+    tags = fields.get("tags", [])
+    return PageMeta(
+        _string_field(fields, "title") or heading,
+        _string_field(fields, "date"),
+        [tags] if isinstance(tags, str) else list(tags),
+        fields,
+        _string_field(fields, "summary") or excerpt or "",
+    )
+
+
+# first `# ` line outside code fences, stops reading as soon as it is found
+def first_heading(lines: Iterable[str]) -> str | None:
+    in_fence = False
+    for raw_line in lines:
+        line = raw_line.rstrip("\r\n")
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        elif not in_fence and line.startswith("# "):
+            return line[2:]
+    return None
+
+
+# plain text of a paragraph, or None for one that is only links and
+# images (a "back home" link, a cover picture). Link text counts
+def excerpt(block: str) -> str | None:
+    nodes = tokenize_inline(block.replace("\n", " "))
+    if all(node.text_type in (TextType.LINK, TextType.IMAGE) for node in nodes):
+        return None
+    text = " ".join(
+        "".join(node.text for node in nodes if node.text_type != TextType.IMAGE).split()
+    )
+    if len(text) <= EXCERPT_LENGTH:
+        return text or None
+    cut = text.rfind(" ", 0, EXCERPT_LENGTH)
+    return text[: cut if cut > 0 else EXCERPT_LENGTH].rstrip(",;:") + "…"
+
+
+# title and excerpt from the body, read block by block and only as far as
+# needed: up to the first heading and the first paragraph, whichever is later
+def _read_body(
+    lines: Iterable[str], title: str | None, summary: str | None
+) -> tuple[str | None, str | None]:
+    if title is not None and summary is not None:
+        return title, summary
+    for block_type, block in iter_blocks(lines):
+        if title is None and block_type == BlockType.HEADER:
+            if block.startswith("# "):
+                title = block.split("\n", 1)[0][2:]
+        elif summary is None and block_type == BlockType.TEXT:
+            summary = excerpt(block)
+        if title is not None and summary is not None:
+            break
+    return title, summary
+
+
+# reads the front matter of a page and as little past it as possible: up to
+# the first heading when there is no title in the front matter, and up to
+# the first paragraph when there is no summary. Lines are decoded one at
+# a time, the rest of a buffered chunk is never looked at
+def read_metadata(path: Path) -> PageMeta:
+    with open(path, "rb") as raw:
+        lines = (line.decode("utf-8") for line in raw)
+        first = next(lines, "")
+        if first.rstrip() != FENCE:
+            return page_meta({}, *_read_body(chain([first], lines), None, None))
+
+        header = [first]
+        parsed = None
+        for line in lines:
+            header.append(line)
+            if line.rstrip() == FENCE or len(header) > MAX_HEADER_LINES:
+                parsed = parse_front_matter(header)
+                break
+        if parsed is None:
+            # a leading horizontal rule, the "header" is content
+            return page_meta({}, *_read_body(chain(header, lines), None, None))
+
+        fields, _ = parsed
+        title, summary = _read_body(
+            lines, _string_field(fields, "title"), _string_field(fields, "summary")
+        )
+        return page_meta(fields, title, summary)
+
+
+class _IndexEntry(TypedDict):
+    mtime_ns: int
+    size: int
+    title: str | None
+    date: str | None
+    tags: list[str]
+    fields: FrontMatter
+    excerpt: str
+
+
+@final
+class MetadataIndex:
+    """Metadata of every page, persisted and only re-read for files that changed"""
+
+    def __init__(self, path: Path):
+        self.path: Path = path
+        # content-relative path -> stat of the file when read, and its metadata
+        self.entries: dict[str, _IndexEntry] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if data.get("format") == INDEX_FORMAT:
+            self.entries = data.get("entries", {})
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"format": INDEX_FORMAT, "entries": self.entries}
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        _ = tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    # metadata of every page under content_dir, keyed by content-relative
+    # posix path. A page is only opened when its size or mtime changed
+    def collect(self, content_dir: Path) -> dict[str, PageMeta]:
+        pages: dict[str, PageMeta] = {}
+        entries: dict[str, _IndexEntry] = {}
+        changed = False
+
+        for rel_path, path in _markdown_files(content_dir):
+            stat = os.stat(path)
+            entry = self.entries.get(rel_path)
+            if (
+                entry is not None
+                and entry["mtime_ns"] == stat.st_mtime_ns
+                and entry["size"] == stat.st_size
+            ):
+                meta = PageMeta(
+                    entry["title"],
+                    entry["date"],
+                    entry["tags"],
+                    entry["fields"],
+                    entry["excerpt"],
+                )
+            else:
+                meta = read_metadata(Path(path))
+                entry = {
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "title": meta.title,
+                    "date": meta.date,
+                    "tags": meta.tags,
+                    "fields": meta.fields,
+                    "excerpt": meta.excerpt,
+                }
+                changed = True
+            entries[rel_path] = entry
+            pages[rel_path] = meta
+
+        if changed or len(entries) != len(self.entries):
+            self.entries = entries
+            self.save()
+        return pages
+
+
+# (content-relative posix path, path) of every page, sorted. Plain
+# strings and os.walk, pathlib would dominate the cost otherwise
+def _markdown_files(content_dir: Path) -> list[tuple[str, str]]:
+    files: list[tuple[str, str]] = []
+    root = str(content_dir)
+    for directory, _, names in os.walk(root):
+        prefix = os.path.relpath(directory, root).replace(os.sep, "/")
+        prefix = "" if prefix == "." else f"{prefix}/"
+        for name in names:
+            if name.endswith(".md"):
+                files.append((prefix + name, os.path.join(directory, name)))
+    files.sort()
+    return files
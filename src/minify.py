@@ -0,0 +1,102 @@
+import re
+from typing import final
+
+from src.htmlnode import HTMLSink
+
+# elements whose whitespace is content, everything inside is passed through
+# untouched. Template literals never split a tag across chunks and the
+# serializer only splits start tags around href/src values, which none of
+# the tags it writes here carry, so matching per chunk is enough
+_PRESERVE_TAG_RE = re.compile(
+    r"<(/?)(?:pre|code|textarea|script|style)\b[^>]*>", re.IGNORECASE
+)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# what actually gets collapsed: two or more whitespace characters, or a
+# single one that is not a plain space. Text without any goes out as is
+_RUN_RE = re.compile(r"\s{2,}|[^\S ]")
+
+
+# a run of whitespace renders as one space anyway, a run with a line break
+# is kept as a line break so the output stays somewhat readable
+def _collapse(match: re.Match[str]) -> str:
+    return "\n" if "\n" in match.group() else " "
+
+
+@final
+class MinifyingSink:
+    """Streaming filter that collapses whitespace runs in serialized HTML"""
+
+    def __init__(self, write: HTMLSink):
+        self._write: HTMLSink = write
+        # how many preserved elements are currently open
+        self.depth: int = 0
+        # whitespace at the end of the last chunk, held back in case
+        # the next chunk starts with more of it
+        self.pending: str = ""
+        self.chars_in: int = 0
+        self.chars_out: int = 0
+
+    def write(self, chunk: str) -> None:
+        self.chars_in += len(chunk)
+        # most chunks are a bare tag or a bit of inline text
+        if "<" not in chunk:
+            self._text(chunk)
+            return
+        pos = 0
+        for match in _PRESERVE_TAG_RE.finditer(chunk):
+            self._text(chunk[pos : match.start()])
+            self._out(self.pending + match.group())
+            self.pending = ""
+            if match.group(1):
+                self.depth = max(0, self.depth - 1)
+            else:
+                self.depth += 1
+            pos = match.end()
+        self._text(chunk[pos:])
+
+    # writes out held back whitespace, call once the document is complete
+    def close(self) -> None:
+        if self.pending:
+            self._out(self.pending)
+            self.pending = ""
+
+    def _text(self, text: str) -> None:
+        if not text:
+            return
+        if self.depth:
+            self._out(text)
+            return
+        if self.pending and not text[0].isspace():
+            # the held back whitespace did not grow into a run
+            text = self.pending + text
+            self.pending = ""
+        if not self.pending and not _RUN_RE.search(text):
+            # a single trailing space may still start a run with the next chunk
+            if text[-1] == " ":
+                self.pending = " "
+                text = text[:-1]
+            if text:
+                self._out(text)
+            return
+
+        text = _WHITESPACE_RE.sub(_collapse, self.pending + text)
+        self.pending = ""
+        if text[-1] in " \n":
+            self.pending = text[-1]
+            text = text[:-1]
+        if text:
+            self._out(text)
+
+    def _out(self, text: str) -> None:
+        self.chars_out += len(text)
+        _ = self._write(text)
+
+
+def minify_html(html: str) -> str:
+    parts: list[str] = []
+    sink = MinifyingSink(parts.append)
+    sink.write(html)
+    sink.close()
+    return "".join(parts)
@@ -0,0 +1,99 @@
+import json
+import os
+from pathlib import Path
+from typing import NamedTuple, final
+
+from src.manifest import combine_hashes, generator_version
+
+# default cap on the total size of cached fragments
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class CachedRender(NamedTuple):
+    # content fragment as SerializedNode parts: text split around its
+    # root-relative href/src values, which every target rebases when writing
+    parts: list[str]
+    title: str
+    # table of contents fragment, only links to anchors within the page
+    toc: str = ""
+
+
+class CacheStats(NamedTuple):
+    entries: int
+    total_bytes: int
+    max_bytes: int
+
+
+@final
+class RenderCache:
+    """Content-addressed store of rendered fragments, shared by every build"""
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory: Path = directory
+        self.max_bytes: int = max_bytes
+
+    # the generator version is part of the key, so editing the renderer
+    # simply makes old entries unreachable until gc evicts them
+    def key(self, markdown: str) -> str:
+        return combine_hashes(generator_version(), markdown)
+
+    def entry_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key[2:]}.json"
+
+    def get(self, markdown: str) -> CachedRender | None:
+        path = self.entry_path(self.key(markdown))
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        # mtime doubles as "last used" for LRU eviction
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # evicted by a concurrent gc, the data we read is still fine
+        return CachedRender(data["parts"], data["title"], data["toc"])
+
+    def put(self, markdown: str, render: CachedRender) -> None:
+        path = self.entry_path(self.key(markdown))
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # pid in the temp name keeps parallel workers from colliding
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        data = {"parts": render.parts, "title": render.title, "toc": render.toc}
+        _ = tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries: list[tuple[float, int, Path]] = []
+        if not self.directory.exists():
+            return entries
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def stats(self) -> CacheStats:
+        entries = self._entries()
+        return CacheStats(
+            len(entries), sum(size for _, size, _ in entries), self.max_bytes
+        )
+
+    # evicts least recently used entries until the cache fits its cap,
+    # returns how many entries were removed
+    def gc(self, max_bytes: int | None = None) -> int:
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self._entries())  # oldest first
+        total = sum(size for _, size, _ in entries)
+
+        removed = 0
+        for _, size, path in entries:
+            if total <= limit:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
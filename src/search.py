@@ -0,0 +1,270 @@
+import json
+import os
+import re
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import TypedDict, final
+
+from src.conversions import inline_lines
+from src.manifest import combine_hashes, generator_version
+from src.md import BlockType, iter_blocks
+from src.metadata import first_heading, page_meta, split_front_matter
+from src.text_parsing import tokenize_inline
+
+# written to every output tree: pages.json plus one shard per term prefix
+SEARCH_DIR = "search"
+
+PAGES_NAME = "pages.json"
+
+# a term in a heading counts this many times a term in the body
+HEADING_WEIGHT = 5
+
+# terms are sharded by their first characters, so a query only
+# fetches the shards its own terms fall in
+SHARD_PREFIX = 2
+
+# bump when the state layout changes, older state is simply discarded
+STATE_FORMAT = 1
+
+_WORD_RE = re.compile(r"\w+")
+
+_SHARD_CHAR_RE = re.compile(r"[a-z0-9]")
+
+
+# lowercase words of at least two characters
+def tokenize(text: str) -> list[str]:
+    return [word for word in _WORD_RE.findall(text.lower()) if len(word) > 1]
+
+
+# shard a term is stored in, "rendering" -> "re". Characters that are
+# not a-z/0-9 become "_" so shard names are always plain file names.
+# The browser has to compute the same thing for its query terms
+def shard_name(term: str) -> str:
+    return "".join(
+        char if _SHARD_CHAR_RE.fullmatch(char) else "_" for char in term[:SHARD_PREFIX]
+    )
+
+
+# term -> weight for one page, from the same blocks and TextNodes the
+# renderer sees, so markup characters never end up in the index
+def page_terms(markdown: str) -> dict[str, int]:
+    terms: dict[str, int] = {}
+    for block_type, block in iter_blocks(markdown.split("\n")):
+        weight = HEADING_WEIGHT if block_type == BlockType.HEADER else 1
+        for text in _block_texts(block_type, block):
+            for term in tokenize(text):
+                terms[term] = terms.get(term, 0) + weight
+    return terms
+
+
+def _block_texts(block_type: BlockType, block: str) -> Iterable[str]:
+    if block_type == BlockType.CODE:
+        return [block[4:-3]]
+
+    # link text and image alt text are searchable, their urls are not
+    return [
+        node.text
+        for line in inline_lines(block_type, block)
+        for node in tokenize_inline(line.replace("\n", " "))
+    ]
+
+
+# root-relative url path of a page: "blog/tom/index.md" -> "blog/tom/",
+# stored without a basepath so every output tree can share one index
+def page_path(rel_source: PurePosixPath) -> str:
+    html = rel_source.with_suffix(".html")
+    if html.name == "index.html":
+        parent = html.parent.as_posix()
+        return "" if parent == "." else f"{parent}/"
+    return html.as_posix()
+
+
+@dataclass
+class IndexResult:
+    # content-relative source paths
+    indexed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    # shards rewritten (or deleted, once empty) in every output tree
+    shards: list[str] = field(default_factory=list)
+
+
+class IndexedPage(TypedDict):
+    id: int
+    # generator version + source hash the terms were taken from
+    digest: str
+    path: str
+    title: str
+    terms: dict[str, int]
+
+
+@final
+class SearchIndex:
+    """Per-page term weights kept between builds, and the sharded index built from them"""
+
+    def __init__(self, state_path: Path):
+        self.state_path: Path = state_path
+        # content-relative source -> what was indexed for it
+        self.pages: dict[str, IndexedPage] = {}
+        # every shard currently written, so emptied ones can be deleted
+        self.shards: set[str] = set()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if data.get("format") != STATE_FORMAT:
+            return
+        self.pages = data.get("pages", {})
+        self.shards = set(data.get("shards", []))
+
+    def save(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "format": STATE_FORMAT,
+            "pages": self.pages,
+            "shards": sorted(self.shards),
+        }
+        tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+        _ = tmp_path.write_text(json.dumps(data, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.state_path)
+
+    # re-indexes pages whose source changed, drops removed ones, and rewrites
+    # only the shards their old or new terms fall in. An output tree without
+    # an index yet (new target, clean build), or any tree when there was no
+    # state, gets every shard written
+    def update(
+        self,
+        content_dir: Path,
+        roots: Sequence[Path],
+        hash_source: Callable[[Path], str],
+    ) -> IndexResult:
+        result = IndexResult()
+        touched: set[str] = set()
+        known = bool(self.pages or self.shards)
+        version = generator_version()
+
+        free_ids = _free_ids({entry["id"] for entry in self.pages.values()})
+
+        seen: set[str] = set()
+        for source in sorted(content_dir.rglob("*.md")):
+            rel_source = source.relative_to(content_dir).as_posix()
+            seen.add(rel_source)
+            digest = combine_hashes(version, hash_source(source))
+            entry = self.pages.get(rel_source)
+            if entry is not None and entry["digest"] == digest:
+                continue
+
+            fields, body = split_front_matter(source.read_text(encoding="utf-8"))
+            terms = page_terms(body)
+            meta = page_meta(fields, first_heading(body.split("\n")))
+            path = page_path(PurePosixPath(rel_source))
+            if entry is not None:
+                touched.update(shard_name(term) for term in entry["terms"])
+            touched.update(shard_name(term) for term in terms)
+            self.pages[rel_source] = {
+                "id": entry["id"] if entry is not None else next(free_ids),
+                "digest": digest,
+                "path": path,
+                "title": meta.title or path,
+                "terms": terms,
+            }
+            result.indexed.append(rel_source)
+
+        for rel_source in [key for key in self.pages if key not in seen]:
+            entry = self.pages.pop(rel_source)
+            touched.update(shard_name(term) for term in entry["terms"])
+            result.removed.append(rel_source)
+
+        pages_changed = bool(result.indexed or result.removed)
+        current = {
+            shard_name(term) for entry in self.pages.values() for term in entry["terms"]
+        }
+        for root in roots:
+            index_dir = root / SEARCH_DIR
+            if known and (index_dir / PAGES_NAME).exists():
+                self._write(index_dir, touched, pages_changed)
+                continue
+            # without state (first build, or dropped by a rollback) an index
+            # already there is not ours to trust, none of its shards may stay
+            for path in index_dir.glob("*.json"):
+                if path.name != PAGES_NAME and path.stem not in current:
+                    path.unlink()
+            self._write(index_dir, current | touched, True)
+
+        self.shards = current
+        result.shards = sorted(touched)
+        self.save()
+        return result
+
+    def _write(self, index_dir: Path, shards: set[str], pages_changed: bool) -> None:
+        index_dir.mkdir(parents=True, exist_ok=True)
+
+        # term -> [id, weight, id, weight, ...], best match first
+        postings: dict[str, dict[str, list[tuple[int, int]]]] = {s: {} for s in shards}
+        for entry in self.pages.values():
+            for term, weight in entry["terms"].items():
+                shard = postings.get(shard_name(term))
+                if shard is not None:
+                    shard.setdefault(term, []).append((entry["id"], weight))
+
+        for name, terms in postings.items():
+            path = index_dir / f"{name}.json"
+            if not terms:
+                path.unlink(missing_ok=True)
+                continue
+            _write_json(
+                path,
+                {
+                    term: [
+                        value
+                        for pair in sorted(hits, key=lambda hit: (-hit[1], hit[0]))
+                        for value in pair
+                    ]
+                    for term, hits in sorted(terms.items())
+                },
+            )
+
+        if pages_changed:
+            # indexed by page id, [path, title], null for unused ids
+            listing: list[list[str] | None] = []
+            for entry in self.pages.values():
+                listing.extend([None] * (entry["id"] + 1 - len(listing)))
+                listing[entry["id"]] = [entry["path"], entry["title"]]
+            _write_json(index_dir / PAGES_NAME, listing)
+
+    # deletes everything the index wrote, for builds without --search
+    def remove(self, roots: Sequence[Path]) -> None:
+        for root in roots:
+            index_dir = root / SEARCH_DIR
+            for name in [*(f"{shard}.json" for shard in self.shards), PAGES_NAME]:
+                (index_dir / name).unlink(missing_ok=True)
+            try:
+                index_dir.rmdir()
+            except OSError:
+                pass  # missing, or holds files that are not ours
+        self.pages.clear()
+        self.shards.clear()
+        self.state_path.unlink(missing_ok=True)
+
+
+# compact, shards are downloaded by browsers. Replaced rather than
+# rewritten so hardlinked copies in older generations stay intact
+def _write_json(path: Path, data: object) -> None:
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    _ = tmp_path.write_text(
+        json.dumps(data, separators=(",", ":"), ensure_ascii=False), encoding="utf-8"
+    )
+    os.replace(tmp_path, path)
+
+
+# ids not in `used`, smallest first, so removed pages leave no holes for
+# long. One pass over the ids for however many new pages an update adds
+def _free_ids(used: set[int]) -> Iterator[int]:
+    page_id = 0
+    while True:
+        if page_id not in used:
+            yield page_id
+        page_id += 1
@@ -0,0 +1,311 @@
+import json
+import os
+from collections import Counter
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path, PurePosixPath
+from typing import TypedDict, final
+from xml.sax.saxutils import escape
+
+from src.metadata import PageMeta
+from src.search import page_path
+
+SITEMAP_NAME = "sitemap.xml"
+
+# urls per sitemap file allowed by the sitemap protocol, past that
+# sitemap.xml becomes an index of sitemap-1.xml, sitemap-2.xml, ...
+MAX_URLS = 50_000
+
+# pages under content/blog/ make up the feed, written next to them
+FEED_DIR = "blog"
+
+FEED_NAME = "atom.xml"
+
+# newest entries kept in the feed
+FEED_ENTRIES = 50
+
+# bump when the state layout changes, older state is simply discarded
+STATE_FORMAT = 1
+
+_SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+# W3C datetime, second precision, always UTC
+def format_time(moment: datetime) -> str:
+    return moment.astimezone(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+# text and attribute values alike
+def _xml(value: str) -> str:
+    return escape(value, {'"': "&quot;"})
+
+
+# Atom wants full timestamps, front matter dates are often just 2024-05-01
+def _full_time(value: str) -> str:
+    return value if "T" in value else f"{value}T00:00:00Z"
+
+
+class SitemapEntry(TypedDict):
+    # source hash lastmod belongs to
+    hash: str
+    lastmod: str
+    # 0-based sitemap file the url lives in, kept so a change
+    # rewrites one file instead of shifting every later one
+    shard: int
+
+
+@dataclass
+class SitemapResult:
+    # content-relative source paths
+    changed: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    # sitemap files rewritten per output tree (the index counts as one)
+    files: int = 0
+    feed: bool = False
+
+
+@final
+class Sitemap:
+    """lastmod of every page kept between builds, and the sitemap and feed built from it"""
+
+    def __init__(self, state_path: Path, max_urls: int = MAX_URLS):
+        self.state_path: Path = state_path
+        self.max_urls: int = max_urls
+        # absolute urls need the origin, it is kept so watch mode can rebuild
+        self.site_url: str = ""
+        self.entries: dict[str, SitemapEntry] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if data.get("format") != STATE_FORMAT:
+            return
+        self.site_url = data.get("site_url", "")
+        self.entries = data.get("entries", {})
+
+    def save(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "format": STATE_FORMAT,
+            "site_url": self.site_url,
+            "entries": self.entries,
+        }
+        tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+        _ = tmp_path.write_text(json.dumps(data, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.state_path)
+
+    # brings lastmod up to date for `pages` (content-relative path -> metadata)
+    # and rewrites the sitemap files and feed holding changed entries, in
+    # every (basepath, output dir) target. A page seen for the first time
+    # takes its lastmod from its front matter date, else the file's mtime
+    def update(
+        self,
+        site_url: str,
+        content_dir: Path,
+        pages: Mapping[str, PageMeta],
+        targets: Sequence[tuple[str, Path]],
+        hash_source: Callable[[Path], str],
+        now: datetime | None = None,
+    ) -> SitemapResult:
+        result = SitemapResult()
+        stamp = format_time(now or datetime.now(UTC))
+        previous_count = self._shard_count()
+        touched: set[int] = set()
+
+        for rel_path in [key for key in self.entries if key not in pages]:
+            touched.add(self.entries.pop(rel_path)["shard"])
+            result.removed.append(rel_path)
+
+        # new pages fill the first shard with room left, old ones never move
+        sizes = Counter(entry["shard"] for entry in self.entries.values())
+        free_shard = 0
+
+        for rel_path, meta in pages.items():
+            source = content_dir / rel_path
+            source_hash = hash_source(source)
+            entry = self.entries.get(rel_path)
+            if entry is not None and entry["hash"] == source_hash:
+                continue
+
+            if entry is not None:
+                lastmod, shard = stamp, entry["shard"]
+            else:
+                lastmod = meta.date or format_time(
+                    datetime.fromtimestamp(source.stat().st_mtime, UTC)
+                )
+                while sizes[free_shard] >= self.max_urls:
+                    free_shard += 1
+                shard = free_shard
+                sizes[shard] += 1
+            self.entries[rel_path] = {
+                "hash": source_hash,
+                "lastmod": lastmod,
+                "shard": shard,
+            }
+            touched.add(shard)
+            result.changed.append(rel_path)
+
+        # a different origin changes every url, and going from one sitemap
+        # file to several (or back) changes what sitemap.xml is
+        shard_count = self._shard_count()
+        full = site_url != self.site_url or (previous_count > 1) != (shard_count > 1)
+        self.site_url = site_url
+        # shards past the end are what is left of a shrunken site
+        touched |= set(range(shard_count, previous_count))
+        feed_changed = any(
+            _in_feed(rel_path) for rel_path in (*result.changed, *result.removed)
+        )
+
+        for basepath, root in targets:
+            fresh = full or not (root / SITEMAP_NAME).exists()
+            shards = set(range(max(shard_count, previous_count))) if fresh else touched
+            result.files = self._write_sitemap(root, basepath, shards)
+            if fresh or feed_changed or not (root / FEED_DIR / FEED_NAME).exists():
+                result.feed = self._write_feed(root, basepath, pages)
+
+        self.save()
+        return result
+
+    def _shard_count(self) -> int:
+        return max((entry["shard"] for entry in self.entries.values()), default=0) + 1
+
+    def url(self, basepath: str, rel_path: str) -> str:
+        return self.site_url.rstrip("/") + basepath + page_path(PurePosixPath(rel_path))
+
+    # returns how many files were written
+    def _write_sitemap(self, root: Path, basepath: str, shards: set[int]) -> int:
+        shard_count = self._shard_count()
+        by_shard: dict[int, list[tuple[str, str]]] = {s: [] for s in shards}
+        for rel_path, entry in self.entries.items():
+            urls = by_shard.get(entry["shard"])
+            if urls is not None:
+                urls.append((self.url(basepath, rel_path), entry["lastmod"]))
+
+        root.mkdir(parents=True, exist_ok=True)
+        if shard_count == 1:
+            if 0 not in shards:
+                return 0
+            # files of a site that used to need several
+            for shard in shards:
+                (root / f"sitemap-{shard + 1}.xml").unlink(missing_ok=True)
+            _write_text(root / SITEMAP_NAME, _urlset(by_shard[0]))
+            return 1
+
+        written = 0
+        for shard, urls in sorted(by_shard.items()):
+            path = root / f"sitemap-{shard + 1}.xml"
+            if shard >= shard_count:
+                path.unlink(missing_ok=True)
+                continue
+            _write_text(path, _urlset(urls))
+            written += 1
+
+        lastmods: dict[int, str] = {}
+        for entry in self.entries.values():
+            shard = entry["shard"]
+            lastmods[shard] = max(lastmods.get(shard, ""), entry["lastmod"])
+        lines = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            f'<sitemapindex xmlns="{_SITEMAP_NS}">',
+        ]
+        for shard in range(shard_count):
+            loc = f"{self.site_url.rstrip('/')}{basepath}sitemap-{shard + 1}.xml"
+            # a shard emptied by removed pages has no lastmod, and an
+            # empty <lastmod> is not a valid date
+            lastmod = lastmods.get(shard)
+            lastmod_tag = f"<lastmod>{lastmod}</lastmod>" if lastmod else ""
+            lines.append(f"<sitemap><loc>{_xml(loc)}</loc>{lastmod_tag}</sitemap>")
+        lines.append("</sitemapindex>")
+        _write_text(root / SITEMAP_NAME, "\n".join(lines) + "\n")
+        return written + 1
+
+    # Atom feed of the newest blog posts, by front matter date and else lastmod
+    def _write_feed(
+        self, root: Path, basepath: str, pages: Mapping[str, PageMeta]
+    ) -> bool:
+        posts = [
+            (_full_time(meta.date or self.entries[rel_path]["lastmod"]), rel_path, meta)
+            for rel_path, meta in pages.items()
+            if _in_feed(rel_path)
+        ]
+        feed_path = root / FEED_DIR / FEED_NAME
+        if not posts:
+            feed_path.unlink(missing_ok=True)
+            return False
+        posts.sort(key=lambda post: (post[0], post[1]), reverse=True)
+        posts = posts[:FEED_ENTRIES]
+
+        home = pages.get("index.md")
+        site_title = home.title if home is not None and home.title else self.site_url
+        feed_url = f"{self.site_url.rstrip('/')}{basepath}{FEED_DIR}/{FEED_NAME}"
+        updated = max(
+            _full_time(self.entries[rel_path]["lastmod"]) for _, rel_path, _ in posts
+        )
+
+        lines = [
+            '<?xml version="1.0" encoding="utf-8"?>',
+            '<feed xmlns="http://www.w3.org/2005/Atom">',
+            f"<title>{_xml(site_title)}</title>",
+            f"<id>{_xml(feed_url)}</id>",
+            f'<link rel="self" href="{_xml(feed_url)}"/>',
+            f'<link href="{_xml(self.url(basepath, FEED_DIR + "/index.md"))}"/>',
+            f"<updated>{updated}</updated>",
+            f"<author><name>{_xml(site_title)}</name></author>",
+        ]
+        for _, rel_path, meta in posts:
+            url = _xml(self.url(basepath, rel_path))
+            lastmod = _full_time(self.entries[rel_path]["lastmod"])
+            lines.append("<entry>")
+            lines.append(f"<title>{_xml(meta.title or rel_path)}</title>")
+            lines.append(f'<link href="{url}"/>')
+            lines.append(f"<id>{url}</id>")
+            if meta.date:
+                lines.append(f"<published>{_full_time(meta.date)}</published>")
+            lines.append(f"<updated>{lastmod}</updated>")
+            author = meta.fields.get("author")
+            if isinstance(author, str):
+                lines.append(f"<author><name>{_xml(author)}</name></author>")
+            lines.append("</entry>")
+        lines.append("</feed>")
+        feed_path.parent.mkdir(parents=True, exist_ok=True)
+        _write_text(feed_path, "\n".join(lines) + "\n")
+        return True
+
+    # deletes everything written, for builds without a site url
+    def remove(self, roots: Sequence[Path]) -> None:
+        for root in roots:
+            for shard in range(self._shard_count()):
+                (root / f"sitemap-{shard + 1}.xml").unlink(missing_ok=True)
+            (root / SITEMAP_NAME).unlink(missing_ok=True)
+            (root / FEED_DIR / FEED_NAME).unlink(missing_ok=True)
+        self.entries.clear()
+        self.state_path.unlink(missing_ok=True)
+
+
+# blog posts, not the blog's own index page
+def _in_feed(rel_path: str) -> bool:
+    return rel_path.startswith(f"{FEED_DIR}/") and rel_path != f"{FEED_DIR}/index.md"
+
+
+def _urlset(urls: list[tuple[str, str]]) -> str:
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<urlset xmlns="{_SITEMAP_NS}">',
+        *(
+            f"<url><loc>{_xml(loc)}</loc><lastmod>{lastmod}</lastmod></url>"
+            for loc, lastmod in sorted(urls)
+        ),
+        "</urlset>",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+# replaced rather than rewritten so hardlinked copies in older generations stay intact
+def _write_text(path: Path, text: str) -> None:
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    _ = tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
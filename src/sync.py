@@ -0,0 +1,129 @@
+import errno
+import fcntl
+import os
+import shutil
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+
+from src.manifest import hash_file
+
+# ioctl number of FICLONE from linux/fs.h, shares extents copy-on-write
+FICLONE = 0x40049409
+
+
+class LinkMode(Enum):
+    COPY = "copy"
+    HARDLINK = "hardlink"
+    REFLINK = "reflink"
+
+
+@dataclass
+class SyncResult:
+    # destination-relative posix paths of every file the source holds
+    files: list[str] = field(default_factory=list)
+    copied: list[str] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+
+
+# quick check like rsync: same size and mtime means same file, with
+# checksum=True the contents are compared whenever the sizes agree
+def files_match(src: Path, dst: Path, mode: LinkMode, checksum: bool) -> bool:
+    try:
+        dst_stat = dst.stat()
+    except FileNotFoundError:
+        return False
+    src_stat = src.stat()
+
+    if mode is LinkMode.HARDLINK:
+        return os.path.samestat(src_stat, dst_stat)
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if checksum:
+        return hash_file(src) == hash_file(dst)
+    return src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        try:
+            _ = fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+        except OSError as e:
+            # different filesystems, or one without copy-on-write support
+            if e.errno in (errno.EXDEV, errno.EOPNOTSUPP, errno.EINVAL, errno.ENOTTY):
+                return False
+            raise
+    shutil.copystat(src, dst)
+    return True
+
+
+# puts src at dst through a temporary name, so readers never see a
+# half-written file and an existing hardlink at dst is replaced, not written through
+def place_file(src: Path, dst: Path, mode: LinkMode) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.sync-tmp")
+    tmp.unlink(missing_ok=True)
+
+    placed = False
+    if mode is LinkMode.HARDLINK:
+        try:
+            os.link(src, tmp)
+            placed = True
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                raise
+    elif mode is LinkMode.REFLINK:
+        placed = _reflink(src, tmp)
+
+    # plain copy is the fallback for every mode
+    if not placed:
+        _ = shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+
+# mirrors every file of src into dst, touching only files that changed.
+# `previous` lists what an earlier sync put into dst: those files are
+# deleted once they disappear from src, anything else in dst is left alone.
+# `rename` maps source-relative paths to different names in dst
+def sync_tree(
+    src: Path,
+    dst: Path,
+    previous: Iterable[str] = (),
+    mode: LinkMode = LinkMode.COPY,
+    checksum: bool = False,
+    rename: Mapping[str, str] | None = None,
+) -> SyncResult:
+    result = SyncResult()
+    for src_file in sorted(src.rglob("*")):
+        if not src_file.is_file():
+            continue
+        rel_path = src_file.relative_to(src).as_posix()
+        if rename is not None:
+            rel_path = rename.get(rel_path, rel_path)
+        result.files.append(rel_path)
+
+        dst_file = dst / rel_path
+        if files_match(src_file, dst_file, mode, checksum):
+            continue
+        print(f"Copying: {src_file} -> {dst_file}")
+        place_file(src_file, dst_file, mode)
+        result.copied.append(rel_path)
+
+    current = set(result.files)
+    for rel_path in sorted(set(previous) - current):
+        dst_file = dst / rel_path
+        print(f"Removing: {dst_file}")
+        dst_file.unlink(missing_ok=True)
+        result.deleted.append(rel_path)
+
+        # drop directories the deletion left empty
+        parent = dst_file.parent
+        while parent != dst and dst in parent.parents:
+            try:
+                parent.rmdir()
+            except OSError:
+                break
+            parent = parent.parent
+
+    return result
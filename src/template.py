@@ -0,0 +1,196 @@
+import re
+from collections.abc import Mapping
+from pathlib import Path
+from typing import final
+from src.assets import AssetMap
+from src.htmlnode import HTMLNode, HTMLSink
+
+# `{{ Name }}` is a variable slot, `{{> name }}` pulls in partials/name.html,
+# and every root-relative href/src gets the basepath spliced in at compile time
+# (and its fingerprinted name, for static assets)
+_TOKEN_RE = re.compile(
+    r"\{\{\s*(?P<partial>>)?\s*(?P<name>[\w.-]+)\s*\}\}"
+    r"|(?P<url>(?:href|src)=\")/(?P<path>[^\"?#]*)"
+)
+
+# partials including partials including partials... is fine, a cycle is not
+MAX_PARTIAL_DEPTH = 16
+
+# name of the directory next to the template that partials are loaded from
+PARTIALS_DIR = "partials"
+
+
+@final
+class Template:
+    """A template split into literal text and named slots, streamed into a sink"""
+
+    def __init__(
+        self,
+        literals: list[str],
+        slots: list[str],
+        dependencies: list[Path],
+        basepath: str = "/",
+        assets: AssetMap | None = None,
+    ):
+        # literals always has exactly one more entry than slots:
+        # literal, slot, literal, slot, ..., literal
+        self.literals: list[str] = literals
+        self.slots: list[str] = slots
+        # template file plus every partial it pulled in
+        self.dependencies: list[Path] = dependencies
+        # prefix already applied to the literals' root-relative links
+        self.basepath: str = basepath
+        # fingerprinted names, also already applied to the literals
+        self.assets: AssetMap | None = assets
+
+    # streams the page into a sink instead of joining it in memory, node
+    # values are serialized with their href/src values rebased like the
+    # literals' (text is never touched, code samples keep their urls).
+    # Slots without a value are left empty, so pages only have to provide
+    # the variables they actually use
+    def write(self, write: HTMLSink, values: Mapping[str, str | HTMLNode]) -> None:
+        url = url_writer(write, self.basepath, self.assets)
+        _ = write(self.literals[0])
+        for slot, literal in zip(self.slots, self.literals[1:]):
+            value = values.get(slot, "")
+            if isinstance(value, HTMLNode):
+                value.write_html(write, url)
+            else:
+                _ = write(value)
+            _ = write(literal)
+
+
+def compile_template(
+    text: str,
+    basepath: str = "/",
+    partials_dir: Path | None = None,
+    assets: AssetMap | None = None,
+) -> Template:
+    literals: list[str] = []
+    slots: list[str] = []
+    dependencies: list[Path] = []
+    _compile_into(
+        text, basepath, assets, partials_dir, literals, slots, dependencies, 0
+    )
+    return Template(literals, slots, dependencies, basepath, assets)
+
+
+def _compile_into(
+    text: str,
+    basepath: str,
+    assets: AssetMap | None,
+    partials_dir: Path | None,
+    literals: list[str],
+    slots: list[str],
+    dependencies: list[Path],
+    depth: int,
+) -> None:
+    if depth > MAX_PARTIAL_DEPTH:
+        raise ValueError(f"Partials nested deeper than {MAX_PARTIAL_DEPTH} levels")
+
+    # literal text is accumulated until the next slot, adjacent
+    # literals (including ones from partials) end up merged
+    if len(literals) == len(slots):
+        literals.append("")
+
+    pos = 0
+    for match in _TOKEN_RE.finditer(text):
+        literals[-1] += text[pos : match.start()]
+        pos = match.end()
+
+        if match.group("url") is not None:
+            path = match.group("path")
+            if assets is not None:
+                path = assets.get(path)
+            literals[-1] += match.group("url") + basepath + path
+        elif match.group("partial") is not None:
+            if partials_dir is None:
+                raise ValueError(
+                    f"Template uses partial '{match.group('name')}' but has no partials directory"
+                )
+            partial_path = partials_dir / f"{match.group('name')}.html"
+            if not partial_path.exists():
+                raise FileNotFoundError(f"Partial not found: {partial_path}")
+            dependencies.append(partial_path)
+            partial_text = partial_path.read_text(encoding="utf-8")
+            _compile_into(
+                partial_text,
+                basepath,
+                assets,
+                partials_dir,
+                literals,
+                slots,
+                dependencies,
+                depth + 1,
+            )
+        else:
+            slots.append(match.group("name"))
+            literals.append("")
+
+    literals[-1] += text[pos:]
+
+
+# one root-relative href/src value with the basepath (and the fingerprinted
+# name of a static asset) spliced in, query and fragment are kept as they are
+def rebase_url(url: str, basepath: str, assets: AssetMap | None = None) -> str:
+    end = len(url)
+    for mark in "?#":
+        index = url.find(mark)
+        if index != -1:
+            end = min(end, index)
+    path = url[1:end]
+    if assets is not None:
+        path = assets.get(path)
+    return basepath + path + url[end:]
+
+
+# the `url` sink nodes are written with: rebases each value into `write`,
+# None when there is nothing to rebase and values can go out as they are
+def url_writer(
+    write: HTMLSink, basepath: str, assets: AssetMap | None = None
+) -> HTMLSink | None:
+    if basepath == "/" and assets is None:
+        return None
+
+    def write_url(url: str) -> object:
+        return write(rebase_url(url, basepath, assets))
+
+    return write_url
+
+
+# (template path, basepath, asset map digest) -> (file stats it
+# was compiled from, compiled template)
+_template_cache: dict[
+    tuple[Path, str, str], tuple[list[tuple[int, int]], Template]
+] = {}
+
+
+def _stat_stamp(paths: list[Path]) -> list[tuple[int, int]]:
+    stamps: list[tuple[int, int]] = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            stamps.append((-1, -1))
+        else:
+            stamps.append((stat.st_mtime_ns, stat.st_size))
+    return stamps
+
+
+# compiles a template file once and hands back the cached copy
+# until the template or one of its partials changes on disk
+def load_template(
+    path: Path, basepath: str = "/", assets: AssetMap | None = None
+) -> Template:
+    key = (path, basepath, assets.digest if assets is not None else "")
+    cached = _template_cache.get(key)
+    if cached is not None:
+        stamp, template = cached
+        if _stat_stamp(template.dependencies) == stamp:
+            return template
+
+    text = path.read_text(encoding="utf-8")
+    template = compile_template(text, basepath, path.parent / PARTIALS_DIR, assets)
+    template.dependencies.insert(0, path)
+    _template_cache[key] = (_stat_stamp(template.dependencies), template)
+    return template
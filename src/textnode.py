@@ -12,6 +12,9 @@ class TextType(Enum):
 
 
 class TextNode:
+    # no per-instance __dict__, inline parsing creates one per text run
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text: str, text_type: TextType, url: str | None = None):
         self.text: str = text
         self.text_type: TextType = text_type
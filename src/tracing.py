@@ -0,0 +1,164 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import final
+
+# (name, start ns, duration ns, pid, tid, args, page the span ran for)
+TraceEvent = tuple[str, int, int, int, int, dict[str, str], str | None]
+
+
+@final
+class Tracer:
+    """Collects nested timing spans, exported as Chrome trace events"""
+
+    def __init__(self):
+        self.events: list[TraceEvent] = []
+        # page currently being generated, spans opened
+        # inside it are attributed to it in the summary
+        self.page: str | None = None
+
+    def add_events(self, events: list[TraceEvent]) -> None:
+        self.events.extend(events)
+
+    # chrome://tracing / Perfetto "complete" events, timestamps in microseconds
+    def chrome_trace(self) -> dict[str, object]:
+        trace_events: list[dict[str, object]] = []
+        for name, start, duration, pid, tid, args, _page in self.events:
+            trace_events.append(
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": start / 1000,
+                    "dur": duration / 1000,
+                    "pid": pid,
+                    "tid": tid,
+                    "args": args,
+                }
+            )
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _ = path.write_text(json.dumps(self.chrome_trace()), encoding="utf-8")
+
+    # page -> span name -> total milliseconds, times are inclusive so
+    # e.g. markdown_to_html_node already contains its inline parsing
+    def page_summary(self) -> dict[str, dict[str, float]]:
+        summary: dict[str, dict[str, float]] = {}
+        for name, _start, duration, _pid, _tid, _args, page in self.events:
+            if page is None:
+                continue
+            stages = summary.setdefault(page, {})
+            stages[name] = stages.get(name, 0.0) + duration / 1e6
+        return summary
+
+    def format_summary(self, limit: int = 20) -> str:
+        summary = self.page_summary()
+        columns: list[str] = []
+        for stages in summary.values():
+            for name in stages:
+                if name != "generate_page" and name not in columns:
+                    columns.append(name)
+
+        # slowest pages first
+        pages = sorted(
+            summary,
+            key=lambda page: summary[page].get("generate_page", 0.0),
+            reverse=True,
+        )[:limit]
+
+        widths = [max(len(column), 9) for column in columns]
+        header = f"{'page':<40} {'total ms':>9} " + " ".join(
+            f"{column:>{width}}" for column, width in zip(columns, widths)
+        )
+        lines = [header, "-" * len(header)]
+        for page in pages:
+            stages = summary[page]
+            cells = " ".join(
+                f"{stages.get(column, 0.0):>{width}.2f}"
+                for column, width in zip(columns, widths)
+            )
+            label = page if len(page) <= 40 else "..." + page[-37:]
+            lines.append(
+                f"{label:<40} {stages.get('generate_page', 0.0):>9.2f} {cells}"
+            )
+        return "\n".join(lines)
+
+
+@final
+class _Span:
+    __slots__ = ("args", "name", "outer_page", "start", "tracer")
+
+    def __init__(self, tracer: Tracer, name: str, args: dict[str, str]):
+        self.tracer: Tracer = tracer
+        self.name: str = name
+        self.args: dict[str, str] = args
+        self.start: int = 0
+        self.outer_page: str | None = None
+
+    def __enter__(self) -> "_Span":
+        self.outer_page = self.tracer.page
+        page = self.args.get("page")
+        if page is not None:
+            self.tracer.page = page
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        duration = time.perf_counter_ns() - self.start
+        self.tracer.events.append(
+            (
+                self.name,
+                self.start,
+                duration,
+                os.getpid(),
+                threading.get_native_id(),
+                self.args,
+                self.tracer.page,
+            )
+        )
+        self.tracer.page = self.outer_page
+
+
+@final
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        pass
+
+
+# shared do-nothing span, handed out while tracing is off
+_NO_SPAN = _NoSpan()
+
+_tracer: Tracer | None = None
+
+
+# `with span("stage", page=...):` times a block of code. With tracing off
+# this is one global lookup returning a shared no-op object.
+def span(name: str, page: str | None = None) -> _Span | _NoSpan:
+    tracer = _tracer
+    if tracer is None:
+        return _NO_SPAN
+    return _Span(tracer, name, {"page": page} if page is not None else {})
+
+
+def enable() -> Tracer:
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def disable() -> Tracer | None:
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def active() -> Tracer | None:
+    return _tracer
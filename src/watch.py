@@ -0,0 +1,330 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterable
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import override
+
+# endpoint the injected script listens on for reload events
+LIVERELOAD_PATH = "/__livereload"
+
+LIVERELOAD_SCRIPT = (
+    "<script>new EventSource("
+    f'"{LIVERELOAD_PATH}"'
+    ").onmessage = () => location.reload();</script>"
+)
+
+# inotify(7) event bits we care about
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_ISDIR = 0x40000000
+IN_Q_OVERFLOW = 0x4000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+)
+
+# struct inotify_event header: wd, mask, cookie, len
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Watches directory trees through Linux inotify, raises OSError if unavailable"""
+
+    def __init__(self, roots: list[Path]):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch: Callable[[int, bytes, int], int] = libc.inotify_add_watch
+        self.fd: int = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        # watch descriptor -> directory it belongs to
+        self.watches: dict[int, Path] = {}
+        # set when the kernel queue overflowed and events were lost
+        self.overflowed: bool = False
+
+        # directories are watched recursively, a single file
+        # through its (non-recursive) parent directory
+        self.trees: list[Path] = [root for root in roots if root.is_dir()]
+        for tree in self.trees:
+            self.watch_tree(tree)
+        for parent in {root.parent for root in roots if not root.is_dir()}:
+            self.add_watch(parent)
+
+    def add_watch(self, directory: Path) -> None:
+        wd = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            # usually ENOSPC from fs.inotify.max_user_watches
+            raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+        self.watches[wd] = directory
+
+    def watch_tree(self, root: Path) -> None:
+        self.add_watch(root)
+        for directory in root.rglob("*"):
+            if directory.is_dir():
+                self.add_watch(directory)
+
+    # blocks up to timeout seconds, returns paths touched in the meantime
+    def poll(self, timeout: float) -> set[Path]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changed: set[Path] = set()
+        data = os.read(self.fd, 1 << 16)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                self.overflowed = True
+                continue
+
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            path = directory / os.fsdecode(name) if name else directory
+            changed.add(path)
+
+            # new directories inside watched trees need watches of their own
+            if (
+                mask & IN_ISDIR
+                and mask & (IN_CREATE | IN_MOVED_TO)
+                and any(tree in path.parents for tree in self.trees)
+            ):
+                self.watch_tree(path)
+                changed.update(p for p in path.rglob("*") if p.is_file())
+
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback that compares mtimes and sizes of every file on each poll"""
+
+    def __init__(self, roots: Iterable[Path], interval: float = 0.5):
+        self.roots: list[Path] = list(roots)
+        self.interval: float = interval
+        self.snapshot: dict[Path, tuple[int, int]] = self.scan()
+
+    def scan(self) -> dict[Path, tuple[int, int]]:
+        snapshot: dict[Path, tuple[int, int]] = {}
+        for root in self.roots:
+            paths = [root] if root.is_file() else root.rglob("*")
+            for path in paths:
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue  # deleted while scanning
+                if path.is_file():
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self, timeout: float) -> set[Path]:
+        time.sleep(min(timeout, self.interval))
+        current = self.scan()
+        changed = {
+            path
+            for path in current.keys() | self.snapshot.keys()
+            if current.get(path) != self.snapshot.get(path)
+        }
+        self.snapshot = current
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+Watcher = InotifyWatcher | PollingWatcher
+
+
+def make_watcher(roots: list[Path], force_polling: bool = False) -> Watcher:
+    if not force_polling:
+        try:
+            return InotifyWatcher(roots)
+        except OSError as e:
+            print(f"inotify unavailable ({e}), falling back to polling")
+    return PollingWatcher(roots)
+
+
+# the root itself counts, an overflowing watcher reports whole roots
+def within(path: Path, root: Path) -> bool:
+    return path == root or root in path.parents
+
+
+# keeps reading events until nothing happened for `debounce` seconds, so
+# an editor saving a batch of files triggers one rebuild instead of many
+def collect_changes(watcher: Watcher, debounce: float) -> set[Path]:
+    changed = watcher.poll(timeout=1.0)
+    if not changed:
+        return changed
+    while True:
+        more = watcher.poll(timeout=debounce)
+        if not more:
+            return changed
+        changed |= more
+
+
+class ReloadNotifier:
+    """Wakes every connected browser once per finished rebuild"""
+
+    def __init__(self):
+        self.generation: int = 0
+        self.condition: threading.Condition = threading.Condition()
+
+    def notify(self) -> None:
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+    # returns True when a new generation arrived before the timeout
+    def wait(self, seen: int, timeout: float) -> bool:
+        with self.condition:
+            return self.condition.wait_for(lambda: self.generation != seen, timeout)
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    """Static file handler that injects the reload script into HTML pages"""
+
+    notifier: ReloadNotifier
+
+    @override
+    def do_GET(self):
+        if self.path == LIVERELOAD_PATH:
+            self.stream_reload_events()
+            return
+
+        path = Path(self.translate_path(self.path))
+        if path.is_dir():
+            if not self.path.split("?", 1)[0].endswith("/"):
+                super().do_GET()  # redirects to the trailing-slash url
+                return
+            path = path / "index.html"
+        if path.suffix != ".html" or not path.is_file():
+            super().do_GET()
+            return
+
+        # injected on the way out, the files in docs/ stay untouched
+        html = path.read_text(encoding="utf-8")
+        if "</body>" in html:
+            html = html.replace("</body>", LIVERELOAD_SCRIPT + "</body>", 1)
+        else:
+            html += LIVERELOAD_SCRIPT
+        body = html.encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        _ = self.wfile.write(body)
+
+    # server-sent events stream, one "reload" message per rebuild
+    def stream_reload_events(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+        seen = self.notifier.generation
+        try:
+            while True:
+                if self.notifier.wait(seen, timeout=15.0):
+                    seen = self.notifier.generation
+                    _ = self.wfile.write(b"data: reload\n\n")
+                else:
+                    _ = self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # browser went away
+
+    @override
+    def log_message(self, format: str, *args: object) -> None:
+        pass  # the build output is noisy enough
+
+
+def serve(directory: Path, port: int, notifier: ReloadNotifier) -> ThreadingHTTPServer:
+    handler = type(
+        "BoundLiveReloadHandler", (LiveReloadHandler,), {"notifier": notifier}
+    )
+    server = ThreadingHTTPServer(("", port), partial(handler, directory=str(directory)))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def watch(
+    roots: list[Path],
+    rebuild: Callable[[set[Path]], None],
+    serve_dir: Path | None = None,
+    port: int = 8888,
+    debounce: float = 0.2,
+    force_polling: bool = False,
+    rebuild_errors: tuple[type[Exception], ...] = (OSError, ValueError),
+) -> None:
+    notifier = ReloadNotifier()
+    server = None
+    if serve_dir is not None:
+        server = serve(serve_dir, port, notifier)
+        print(f"Serving {serve_dir} on http://localhost:{port}/ with live reload")
+
+    watcher = make_watcher(roots, force_polling)
+    print(f"Watching {', '.join(str(root) for root in roots)} for changes")
+    try:
+        while True:
+            changed = collect_changes(watcher, debounce)
+            # only files under the watched roots matter, editors
+            # drop swap files next to template.html all the time
+            changed = {
+                path for path in changed if any(within(path, root) for root in roots)
+            }
+            if isinstance(watcher, InotifyWatcher) and watcher.overflowed:
+                # events were dropped, rebuild as if everything changed
+                watcher.overflowed = False
+                changed = set(roots)
+            if not changed:
+                continue
+
+            try:
+                rebuild(changed)
+            except rebuild_errors as e:
+                # a broken page should not kill the watcher, anything
+                # else is a bug in the generator and is raised
+                print(f"Rebuild failed: {e}")
+                continue
+            notifier.notify()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        if server is not None:
+            server.shutdown()
@@ -0,0 +1,110 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.assets import AssetMap, build_asset_map, fingerprint_name
+from src.html_generation import generate_pages_recursive
+from src.sync import sync_tree
+from src.template import compile_template, rebase_url
+
+
+class TestAssetMap(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = Path(self.tmp.name) / "static"
+        (self.static / "images").mkdir(parents=True)
+        _ = (self.static / "index.css").write_text("body {}", encoding="utf-8")
+        _ = (self.static / "images" / "cat.png").write_bytes(b"png")
+        _ = (self.static / "favicon.ico").write_bytes(b"ico")
+        _ = (self.static / "404.html").write_text("<h1>404</h1>", encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fingerprint_name(self):
+        self.assertEqual(
+            fingerprint_name("images/cat.png", "3f2a9c01bd99"),
+            "images/cat.3f2a9c01bd.png",
+        )
+
+    def test_only_referenced_asset_types_renamed(self):
+        assets = build_asset_map(self.static)
+        self.assertEqual(sorted(assets.names), ["images/cat.png", "index.css"])
+        self.assertRegex(assets.get("index.css"), r"^index\.[0-9a-f]{10}\.css$")
+        self.assertEqual(assets.get("favicon.ico"), "favicon.ico")
+
+    def test_names_stable_until_content_changes(self):
+        first = build_asset_map(self.static)
+        self.assertEqual(build_asset_map(self.static).names, first.names)
+
+        _ = (self.static / "index.css").write_text("body { margin: 0 }", "utf-8")
+        second = build_asset_map(self.static)
+        self.assertNotEqual(second.get("index.css"), first.get("index.css"))
+        self.assertEqual(second.get("images/cat.png"), first.get("images/cat.png"))
+        self.assertNotEqual(second.digest, first.digest)
+
+    def test_sync_writes_fingerprinted_names(self):
+        assets = build_asset_map(self.static)
+        dst = Path(self.tmp.name) / "docs"
+        result = sync_tree(self.static, dst, rename=assets.names)
+        self.assertTrue((dst / assets.get("index.css")).exists())
+        self.assertFalse((dst / "index.css").exists())
+        self.assertTrue((dst / "favicon.ico").exists())
+
+        # a plain sync afterwards removes the fingerprinted copies
+        _ = sync_tree(self.static, dst, previous=result.files)
+        self.assertFalse((dst / assets.get("index.css")).exists())
+        self.assertTrue((dst / "index.css").exists())
+
+
+class TestReferenceRewriting(unittest.TestCase):
+    assets: AssetMap = AssetMap(
+        {"index.css": "index.abc.css", "images/cat.png": "images/cat.abc.png"}
+    )
+
+    def test_template_links_rewritten_at_compile_time(self):
+        template = compile_template(
+            '<link href="/index.css"><a href="/blog/">{{ Content }}</a>',
+            "/site/",
+            assets=self.assets,
+        )
+        parts: list[str] = []
+        template.write(parts.append, {"Content": "x"})
+        self.assertEqual(
+            "".join(parts),
+            '<link href="/site/index.abc.css"><a href="/site/blog/">x</a>',
+        )
+
+    def test_content_links_rewritten(self):
+        self.assertEqual(
+            rebase_url("/images/cat.png?v=2", "/", self.assets),
+            "/images/cat.abc.png?v=2",
+        )
+        self.assertEqual(
+            rebase_url("/images/dog.png#top", "/", self.assets), "/images/dog.png#top"
+        )
+
+    def test_generated_pages_use_fingerprinted_names(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "content").mkdir()
+            _ = (root / "content" / "index.md").write_text(
+                "# Cat\n\n![cat](/images/cat.png)", encoding="utf-8"
+            )
+            _ = (root / "template.html").write_text(
+                '<link href="/index.css">{{ Content }}', encoding="utf-8"
+            )
+            _ = generate_pages_recursive(
+                "/site/",
+                str(root / "content"),
+                str(root / "template.html"),
+                str(root / "docs"),
+                assets=self.assets,
+            )
+            html = (root / "docs" / "index.html").read_text(encoding="utf-8")
+            self.assertIn('href="/site/index.abc.css"', html)
+            self.assertIn('src="/site/images/cat.abc.png"', html)
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
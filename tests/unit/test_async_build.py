@@ -0,0 +1,117 @@
+import asyncio
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from src.async_build import SiteConfig, build_site, render_markdown
+from src.conversions import block_memo, markdown_to_document
+from src.html_generation import PageGenerationError, generate_pages_recursive
+from src.render_cache import RenderCache
+
+TEMPLATE = '<title>{{ Title }}</title><link href="/index.css">{{ Content }}'
+
+
+class TestAsyncBuild(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        self.template = self.root / "template.html"
+        _ = self.template.write_text(TEMPLATE, encoding="utf-8")
+        (self.root / "static").mkdir()
+        _ = (self.root / "static" / "index.css").write_text("body {}", "utf-8")
+
+        for i in range(20):
+            page_dir = self.content / f"page{i}"
+            page_dir.mkdir(parents=True)
+            _ = (page_dir / "index.md").write_text(
+                f"# Page {i}\n\nSome **bold** [link](/page{i}/) text", encoding="utf-8"
+            )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def config(
+        self,
+        output: str,
+        concurrency: int = 8,
+        render_cache: RenderCache | None = None,
+    ) -> SiteConfig:
+        return SiteConfig(
+            content_dir=self.content,
+            template_path=self.template,
+            output_dir=self.root / output,
+            static_dir=self.root / "static",
+            basepath="/base/",
+            concurrency=concurrency,
+            render_cache=render_cache,
+        )
+
+    async def test_output_matches_blocking_build(self):
+        blocking = generate_pages_recursive(
+            "/base/", str(self.content), str(self.template), str(self.root / "sync")
+        )
+        written = await build_site(self.config("async", concurrency=3))
+
+        self.assertEqual(
+            [page.relative_to(self.root / "async") for page in written],
+            [page.relative_to(self.root / "sync") for page in blocking],
+        )
+        for async_page, sync_page in zip(written, blocking):
+            self.assertEqual(
+                async_page.read_text(encoding="utf-8"),
+                sync_page.read_text(encoding="utf-8"),
+            )
+        self.assertTrue((self.root / "async" / "index.css").exists())
+
+    async def test_process_pool_and_render_cache(self):
+        cache = RenderCache(self.root / "cache")
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            first = await build_site(self.config("one", render_cache=cache), executor)
+        self.assertEqual(cache.stats().entries, 20)
+
+        second = await build_site(self.config("two", render_cache=cache))
+        for one, two in zip(first, second):
+            self.assertEqual(
+                one.read_text(encoding="utf-8"), two.read_text(encoding="utf-8")
+            )
+
+    async def test_error_names_source(self):
+        broken = self.content / "page7" / "index.md"
+        _ = broken.write_text("no title", encoding="utf-8")
+        with self.assertRaises(PageGenerationError) as context:
+            _ = await build_site(self.config("out"))
+        self.assertEqual(context.exception.source, str(broken))
+
+    async def test_cancellation(self):
+        task = asyncio.create_task(build_site(self.config("out", concurrency=1)))
+        await asyncio.sleep(0)
+        _ = task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            _ = await task
+        # pages are renamed into place whole, never left half-written
+        await asyncio.sleep(0.05)
+        for page in (self.root / "out").rglob("*.html"):
+            self.assertTrue(page.read_text(encoding="utf-8").startswith("<title>"))
+
+    async def test_render_markdown(self):
+        html = await render_markdown("# Hi\n\n**there**")
+        self.assertEqual(html, '<div><h1 id="hi">Hi</h1><p><b>there</b></p></div>')
+
+    async def test_concurrent_renders(self):
+        pages = [f"# Page {n}\n\nshared text\n\n- item {n % 3}" for n in range(50)]
+        expected = [
+            markdown_to_document(page, memo=None).node.to_html() for page in pages
+        ]
+        before = block_memo.stats()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            rendered = await asyncio.gather(
+                *(render_markdown(page, executor) for page in pages)
+            )
+        self.assertEqual(rendered, expected)
+        self.assertEqual(block_memo.stats(), before)
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
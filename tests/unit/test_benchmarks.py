@@ -0,0 +1,30 @@
+import unittest
+
+from benchmarks.corpus import CorpusShape, make_corpus
+from benchmarks.run import find_regressions
+from src.conversions import markdown_to_html_node
+
+
+class TestCorpus(unittest.TestCase):
+    def test_deterministic(self):
+        shape = CorpusShape(pages=3, paragraphs=2, paragraph_words=20)
+        self.assertEqual(make_corpus(shape), make_corpus(shape))
+
+    def test_pages_render(self):
+        for page in make_corpus(CorpusShape(pages=5)):
+            html = markdown_to_html_node(page).to_html()
+            self.assertIn("<pre><code>", html)
+            self.assertIn("<ol>", html)
+
+
+class TestFindRegressions(unittest.TestCase):
+    def test_threshold(self):
+        baseline = {"parse": 1.0, "render": 1.0, "gone": 1.0}
+        current = {"parse": 1.05, "render": 1.2, "new": 9.0}
+        self.assertEqual(
+            find_regressions(baseline, current, 0.1), [("render", 1.0, 1.2)]
+        )
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -0,0 +1,70 @@
+import gzip
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.compress import ENCODINGS, compress_file, compress_tree
+
+PAGE = "<html><body>" + "<p>repetitive text compresses well</p>" * 50 + "</body></html>"
+
+
+class TestCompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        (self.root / "blog").mkdir()
+        _ = (self.root / "index.html").write_text(PAGE, encoding="utf-8")
+        _ = (self.root / "blog" / "site.css").write_text("body{}" * 100, "utf-8")
+        _ = (self.root / "cat.png").write_bytes(b"\x89PNG" * 100)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sidecars_written_for_text_files_only(self):
+        records, result = compress_tree(self.root, {})
+        self.assertEqual(result.compressed, ["blog/site.css", "index.html"])
+        self.assertEqual(set(records), {"blog/site.css", "index.html"})
+        self.assertFalse((self.root / "cat.png.gz").exists())
+
+        gz = (self.root / "index.html.gz").read_bytes()
+        self.assertEqual(gzip.decompress(gz).decode("utf-8"), PAGE)
+        self.assertEqual(records["index.html"]["sidecars"], list(ENCODINGS))
+
+    def test_output_is_reproducible(self):
+        _ = compress_file(self.root / "index.html")
+        first = (self.root / "index.html.gz").read_bytes()
+        _ = compress_file(self.root / "index.html")
+        self.assertEqual((self.root / "index.html.gz").read_bytes(), first)
+
+    def test_unchanged_files_skipped(self):
+        records, _ = compress_tree(self.root, {})
+        _ = (self.root / "index.html").write_text(PAGE + "<!-- -->", "utf-8")
+        records, result = compress_tree(self.root, records, jobs=4)
+        self.assertEqual(result.compressed, ["index.html"])
+        self.assertEqual(result.unchanged, ["blog/site.css"])
+
+    def test_missing_sidecar_rewritten(self):
+        records, _ = compress_tree(self.root, {})
+        (self.root / "index.html.gz").unlink()
+        _, result = compress_tree(self.root, records)
+        self.assertEqual(result.compressed, ["index.html"])
+        self.assertTrue((self.root / "index.html.gz").exists())
+
+    def test_sidecar_dropped_when_not_smaller(self):
+        tiny = self.root / "tiny.txt"
+        _ = tiny.write_text("x", encoding="utf-8")
+        _ = (self.root / "tiny.txt.gz").write_bytes(b"stale")
+        self.assertEqual(compress_file(tiny), [])
+        self.assertFalse((self.root / "tiny.txt.gz").exists())
+
+    def test_sidecars_of_removed_files_deleted(self):
+        records, _ = compress_tree(self.root, {})
+        (self.root / "blog" / "site.css").unlink()
+        records, result = compress_tree(self.root, records)
+        self.assertEqual(result.removed, ["blog/site.css"])
+        self.assertFalse((self.root / "blog" / "site.css.gz").exists())
+        self.assertNotIn("blog/site.css", records)
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
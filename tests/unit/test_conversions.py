@@ -1,8 +1,17 @@
+import time
 import unittest
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import override
 
 from src.textnode import TextType, TextNode
 from src.conversions import text_node_to_html_node
-from src.conversions import markdown_to_html_node
+from src.conversions import markdown_to_html_node, text_to_children
+from src.conversions import BlockMemo, MemoStats
+from src.conversions import Heading, markdown_to_document
+from src.htmlnode import HTMLNode
+from src.md import BlockType
+from src.text_parsing import text_to_textnodes
 
 
 class TestConversions(unittest.TestCase):
@@ -51,6 +60,14 @@ class TestConversions(unittest.TestCase):
 
 
 class TestMDtoHTML(unittest.TestCase):
+    def test_text_to_children_tokenizers_agree(self):
+        text = "**b** _i_ `c` [l](/u) ![a](/p.png)"
+        default = [child.to_html() for child in text_to_children(text)]
+        multi_pass = [
+            child.to_html() for child in text_to_children(text, text_to_textnodes)
+        ]
+        self.assertEqual(default, multi_pass)
+
     def test_paragraphs(self):
         md = """
 This is **bolded** paragraph
@@ -83,6 +100,17 @@ the **same** even with inline stuff
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_codeblock_with_blank_lines(self):
+        md = "```\ndef f():\n\n    return 1\n```"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html, "<div><pre><code>def f():\n\n    return 1\n</code></pre></div>"
+        )
+
+    def test_accepts_line_iterable(self):
+        html = markdown_to_html_node(iter(["# Title", "", "text"])).to_html()
+        self.assertEqual(html, "<div><h1>Title</h1><p>text</p></div>")
+
     def test_headers(self):
         md = """
 # This is a h1
@@ -202,3 +230,101 @@ Check out [this link](https://example.com) and this image:
         html = node.to_html()
         self.assertIn('<a href="https://example.com">this link</a>', html)
         self.assertIn('<img src="https://example.com/image.png" alt="Alt text">', html)
+
+
+class _SlowEntries(OrderedDict[tuple[BlockType, str], HTMLNode]):
+    @override
+    def get(self, key: tuple[BlockType, str], default: None = None) -> HTMLNode | None:
+        node = super().get(key, default)
+        time.sleep(0.001)
+        return node
+
+
+class TestBlockMemo(unittest.TestCase):
+    def test_repeated_blocks_parsed_once(self):
+        memo = BlockMemo()
+        disclaimer = "> Opinions are **my own**"
+        page_a = markdown_to_html_node(f"# A\n\n{disclaimer}", memo=memo)
+        page_b = markdown_to_html_node(f"# B\n\n{disclaimer}", memo=memo)
+
+        self.assertEqual(memo.stats(), MemoStats(hits=1, misses=3))
+        assert page_a.children is not None and page_b.children is not None
+        self.assertIs(page_a.children[1], page_b.children[1])
+        self.assertEqual(
+            page_b.to_html(),
+            markdown_to_html_node(f"# B\n\n{disclaimer}", memo=None).to_html(),
+        )
+
+    def test_least_recently_used_evicted(self):
+        memo = BlockMemo(max_entries=2)
+        for markdown in ["a", "b", "a", "c", "a", "b"]:
+            _ = markdown_to_html_node(markdown, memo=memo)
+        # b was the least recently used block when c arrived
+        self.assertEqual(memo.stats(), MemoStats(hits=2, misses=4))
+        self.assertEqual(len(memo.entries), 2)
+
+    def test_shared_between_threads(self):
+        memo = BlockMemo(max_entries=2)
+        # sleeping in get lets other threads evict the entry before
+        # move_to_end, which used to raise KeyError
+        memo.entries = _SlowEntries()
+        pages = [f"text {n % 3}\n\n- item {n % 2}" for n in range(100)]
+        expected = [markdown_to_html_node(p, memo=None).to_html() for p in pages]
+
+        def render(page: str) -> str:
+            return markdown_to_html_node(page, memo=memo).to_html()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            self.assertEqual(list(executor.map(render, pages)), expected)
+        self.assertLessEqual(len(memo.entries), 2)
+
+    def test_hit_rate(self):
+        self.assertEqual(MemoStats(0, 0).hit_rate(), 0.0)
+        self.assertEqual(MemoStats(3, 1).hit_rate(), 0.75)
+        self.assertEqual(MemoStats(5, 5).since(MemoStats(2, 1)), MemoStats(3, 4))
+
+
+class TestDocument(unittest.TestCase):
+    def test_headings_and_anchors(self):
+        document = markdown_to_document(
+            "# Why **Tom**?\n\n## Intro\n\ntext\n\n## Intro\n\n### See [this](/x)"
+        )
+        self.assertEqual(
+            document.headings,
+            (
+                Heading(1, "Why Tom?", "why-tom"),
+                Heading(2, "Intro", "intro"),
+                Heading(2, "Intro", "intro-1"),
+                Heading(3, "See this", "see-this"),
+            ),
+        )
+        self.assertEqual(document.title, "Why Tom?")
+        self.assertIn('<h2 id="intro-1">Intro</h2>', document.node.to_html())
+
+    def test_toc_nests_by_level(self):
+        document = markdown_to_document("# T\n\n## A\n\n### A1\n\n#### A1a\n\n## B")
+        self.assertEqual(
+            document.toc.to_html(),
+            '<ul><li><a href="#a">A</a><ul><li><a href="#a1">A1</a><ul>'
+            '<li><a href="#a1a">A1a</a></li></ul></li></ul></li>'
+            '<li><a href="#b">B</a></li></ul>',
+        )
+        self.assertEqual(markdown_to_document("# T\n\ntext").toc.to_html(), "")
+
+    def test_title_rules(self):
+        with self.assertRaises(ValueError):
+            _ = markdown_to_document("## Not a title").title
+        with self.assertRaises(ValueError):
+            _ = markdown_to_document("# One\n\n# Two").title
+        # a `# ` line inside a code block is not a heading
+        self.assertEqual(markdown_to_document("# One\n\n```\n# x\n```").title, "One")
+
+    def test_memoized_headings_not_mutated(self):
+        memo = BlockMemo()
+        _ = markdown_to_document("# T\n\n## Shared", memo=memo)
+        page_b = markdown_to_document("# U\n\n## Other\n\n## Shared", memo=memo)
+        self.assertIn('<h2 id="shared">Shared</h2>', page_b.node.to_html())
+        self.assertEqual(
+            markdown_to_html_node("## Shared", memo=memo).to_html(),
+            "<div><h2>Shared</h2></div>",
+        )
@@ -0,0 +1,185 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.generations import GenerationStore
+from src.html_generation import generate_pages_recursive
+from src.manifest import BuildManifest
+from src.search import PAGES_NAME, SEARCH_DIR, SearchIndex
+
+
+class TestGenerationStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name).resolve()
+        self.link = self.root / "docs"
+        self.store = GenerationStore(self.root / "generations", self.link, keep=2)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def publish(self, files: dict[str, str]) -> Path:
+        staging = self.store.stage()
+        for name, text in files.items():
+            path = staging / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # replaced like the generator does, never written through
+            tmp_path = path.with_name(f".{path.name}.tmp")
+            _ = tmp_path.write_text(text, encoding="utf-8")
+            os.replace(tmp_path, path)
+        return self.store.activate(staging)
+
+    def test_first_generation_published_through_symlink(self):
+        generation = self.publish({"index.html": "one"})
+        self.assertTrue(self.link.is_symlink())
+        self.assertEqual(self.store.current(), generation)
+        self.assertFalse(os.path.isabs(os.readlink(self.link)))
+        self.assertEqual((self.link / "index.html").read_text(encoding="utf-8"), "one")
+
+    def test_unchanged_files_are_hardlinked(self):
+        first = self.publish({"index.html": "one", "css/site.css": "body {}"})
+        second = self.publish({"index.html": "two"})
+
+        self.assertTrue(
+            os.path.samefile(first / "css" / "site.css", second / "css" / "site.css")
+        )
+        self.assertEqual((first / "index.html").read_text(encoding="utf-8"), "one")
+        self.assertEqual((second / "index.html").read_text(encoding="utf-8"), "two")
+
+    def test_old_generations_pruned(self):
+        for i in range(5):
+            _ = self.publish({"index.html": str(i)})
+        names = [generation.name for generation in self.store.generations()]
+        self.assertEqual(names, ["000003", "000004", "000005"])
+
+    def test_rollback(self):
+        _ = self.publish({"index.html": "one"})
+        _ = self.publish({"index.html": "two"})
+        _ = self.store.rollback()
+        self.assertEqual((self.link / "index.html").read_text(encoding="utf-8"), "one")
+        _ = self.store.rollback("000002")
+        self.assertEqual((self.link / "index.html").read_text(encoding="utf-8"), "two")
+
+        with self.assertRaises(ValueError):
+            _ = self.store.rollback("000009")
+
+    def test_plain_directory_moved_aside_once(self):
+        self.link.mkdir()
+        _ = (self.link / "old.html").write_text("old", encoding="utf-8")
+        _ = self.publish({"index.html": "new"})
+        self.assertTrue(self.link.is_symlink())
+        self.assertEqual((self.link / "old.html").read_text(encoding="utf-8"), "old")
+        _ = self.store.rollback()
+        self.assertFalse((self.link / "index.html").exists())
+
+    def test_discarded_staging_leaves_live_generation(self):
+        generation = self.publish({"index.html": "one"})
+        staging = self.store.stage()
+        self.store.discard(staging)
+        self.assertEqual(self.store.generations(), [generation])
+        self.assertEqual(self.store.current(), generation)
+
+
+class TestStagedPages(unittest.TestCase):
+    def test_regenerated_page_does_not_touch_older_generation(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp).resolve()
+            content = root / "content"
+            content.mkdir()
+            template = root / "template.html"
+            _ = template.write_text("{{ Content }}", encoding="utf-8")
+            store = GenerationStore(root / "generations", root / "docs")
+
+            for text in ("one", "two"):
+                _ = (content / "index.md").write_text(f"# {text}", encoding="utf-8")
+                staging = store.stage()
+                _ = generate_pages_recursive(
+                    "/", str(content), str(template), str(staging)
+                )
+                _ = store.activate(staging)
+
+            first, second = store.generations()
+            self.assertIn("one", (first / "index.html").read_text(encoding="utf-8"))
+            self.assertIn("two", (second / "index.html").read_text(encoding="utf-8"))
+
+    def test_interrupted_build_does_not_mark_pages_fresh(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp).resolve()
+            content = root / "content"
+            content.mkdir()
+            template = root / "template.html"
+            _ = template.write_text("{{ Content }}", encoding="utf-8")
+            manifest_path = root / "manifest.json"
+            store = GenerationStore(root / "generations", root / "docs")
+
+            def build(text: str, interrupt: bool = False) -> None:
+                _ = (content / "index.md").write_text(f"# {text}", encoding="utf-8")
+                staging = store.stage(state=[manifest_path])
+                try:
+                    _ = generate_pages_recursive(
+                        "/",
+                        str(content),
+                        str(template),
+                        str(staging),
+                        manifest=BuildManifest.load(manifest_path),
+                    )
+                    if interrupt:
+                        # after the pages and the manifest, before the swap
+                        raise KeyboardInterrupt
+                except BaseException:
+                    store.discard(staging)
+                    raise
+                _ = store.activate(staging)
+
+            build("one")
+            with self.assertRaises(KeyboardInterrupt):
+                build("two", interrupt=True)
+            build("two")
+            html = (root / "docs" / "index.html").read_text(encoding="utf-8")
+            self.assertIn("two", html)
+
+    def test_search_after_rollback(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp).resolve()
+            content = root / "content"
+            content.mkdir()
+            template = root / "template.html"
+            _ = template.write_text("{{ Content }}", encoding="utf-8")
+            state = [root / "manifest.json", root / "search.json"]
+            store = GenerationStore(root / "generations", root / "docs")
+
+            def build(text: str) -> None:
+                _ = (content / "index.md").write_text(f"# {text}", encoding="utf-8")
+                staging = store.stage(state=state)
+                manifest = BuildManifest.load(state[0])
+                _ = generate_pages_recursive(
+                    "/", str(content), str(template), str(staging), manifest=manifest
+                )
+                _ = SearchIndex(state[1]).update(
+                    content, [staging], manifest.source_hash
+                )
+                _ = store.activate(staging)
+
+            def terms() -> set[str]:
+                index_dir = root / "docs" / SEARCH_DIR
+                return {
+                    term
+                    for shard in index_dir.glob("*.json")
+                    if shard.name != PAGES_NAME
+                    for term in json.loads(shard.read_text(encoding="utf-8"))
+                }
+
+            build("dragons")
+            build("wyverns")
+            _ = store.rollback(state=state)
+            self.assertEqual(terms(), {"dragons"})
+
+            # the restored generation is built on again from the same content
+            build("wyverns")
+            self.assertEqual(terms(), {"wyverns"})
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -0,0 +1,217 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.html_generation import PageGenerationError, generate_pages_recursive
+from src.manifest import BuildManifest
+
+TEMPLATE = '<title>{{ Title }}</title><link href="/index.css">{{ Content }}'
+
+
+class TestIncrementalBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        self.dest = self.root / "docs"
+        self.template = self.root / "template.html"
+        self.manifest_path = self.root / ".build" / "manifest.json"
+
+        (self.content / "blog" / "post").mkdir(parents=True)
+        _ = (self.content / "index.md").write_text("# Home\n\nHi", encoding="utf-8")
+        _ = (self.content / "blog" / "post" / "index.md").write_text(
+            "# Post\n\nBody", encoding="utf-8"
+        )
+        _ = self.template.write_text(TEMPLATE, encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, basepath: str = "/") -> list[Path]:
+        return generate_pages_recursive(
+            basepath,
+            str(self.content),
+            str(self.template),
+            str(self.dest),
+            manifest=BuildManifest.load(self.manifest_path),
+        )
+
+    def test_first_build_generates_everything(self):
+        generated = self.build()
+        self.assertEqual(len(generated), 2)
+        self.assertIn(
+            '<h1 id="home">Home</h1>',
+            (self.dest / "index.html").read_text(encoding="utf-8"),
+        )
+
+    def test_unchanged_build_is_noop(self):
+        _ = self.build()
+        self.assertEqual(self.build(), [])
+
+    def test_only_changed_page_rebuilt(self):
+        _ = self.build()
+        _ = (self.content / "index.md").write_text(
+            "# Home\n\nChanged", encoding="utf-8"
+        )
+        self.assertEqual(self.build(), [self.dest / "index.html"])
+
+    def test_template_change_rebuilds_all(self):
+        _ = self.build()
+        _ = self.template.write_text(TEMPLATE + "<footer></footer>", encoding="utf-8")
+        self.assertEqual(len(self.build()), 2)
+
+    def test_partial_change_rebuilds_all(self):
+        partials = self.root / "partials"
+        partials.mkdir()
+        _ = (partials / "footer.html").write_text(
+            "<footer>1</footer>", encoding="utf-8"
+        )
+        _ = self.template.write_text(TEMPLATE + "{{> footer }}", encoding="utf-8")
+        _ = self.build()
+        _ = (partials / "footer.html").write_text(
+            "<footer>22</footer>", encoding="utf-8"
+        )
+        self.assertEqual(len(self.build()), 2)
+        self.assertIn(
+            "<footer>22</footer>",
+            (self.dest / "index.html").read_text(encoding="utf-8"),
+        )
+
+    def test_basepath_change_rebuilds_all(self):
+        _ = self.build()
+        self.assertEqual(len(self.build("/site-architect/")), 2)
+
+    def test_missing_output_regenerated(self):
+        _ = self.build()
+        (self.dest / "index.html").unlink()
+        self.assertEqual(self.build(), [self.dest / "index.html"])
+
+    def test_deleted_source_output_removed(self):
+        _ = self.build()
+        (self.content / "blog" / "post" / "index.md").unlink()
+        _ = self.build()
+        self.assertFalse((self.dest / "blog" / "post" / "index.html").exists())
+        self.assertFalse((self.dest / "blog").exists())
+        self.assertTrue((self.dest / "index.html").exists())
+
+
+class TestParallelBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        self.template = self.root / "template.html"
+        _ = self.template.write_text(TEMPLATE, encoding="utf-8")
+
+        for i in range(12):
+            page_dir = self.content / f"page{i}"
+            page_dir.mkdir(parents=True)
+            _ = (page_dir / "index.md").write_text(
+                f"# Page {i}\n\nSome **bold** [link](/page{i}/) text", encoding="utf-8"
+            )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, dest: str, jobs: int) -> list[Path]:
+        return generate_pages_recursive(
+            "/base/",
+            str(self.content),
+            str(self.template),
+            str(self.root / dest),
+            jobs=jobs,
+        )
+
+    def test_parallel_output_matches_serial(self):
+        serial = self.build("serial", 1)
+        parallel = self.build("parallel", 4)
+        self.assertEqual(len(serial), 12)
+        for serial_page, parallel_page in zip(serial, parallel):
+            self.assertEqual(
+                serial_page.read_text(encoding="utf-8"),
+                parallel_page.read_text(encoding="utf-8"),
+            )
+
+    def test_errors_name_source_file(self):
+        broken = self.content / "page3" / "index.md"
+        _ = broken.write_text("no title here", encoding="utf-8")
+        for jobs in (1, 4):
+            with self.assertRaises(PageGenerationError) as context:
+                _ = self.build(f"out{jobs}", jobs)
+            self.assertEqual(context.exception.source, str(broken))
+            self.assertIn(str(broken), str(context.exception))
+
+
+class TestMultipleTargets(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        self.template = self.root / "template.html"
+        self.manifest_path = self.root / ".build" / "manifest.json"
+        _ = self.template.write_text(TEMPLATE, encoding="utf-8")
+
+        (self.content / "blog").mkdir(parents=True)
+        _ = (self.content / "index.md").write_text(
+            "# Home\n\n[post](/blog/post) ![cat](/cat.png)", encoding="utf-8"
+        )
+        _ = (self.content / "blog" / "post.md").write_text(
+            "# Post\n\nBody", encoding="utf-8"
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, manifest: bool = False) -> list[Path]:
+        return generate_pages_recursive(
+            "/",
+            str(self.content),
+            str(self.template),
+            str(self.root / "docs"),
+            manifest=BuildManifest.load(self.manifest_path) if manifest else None,
+            extra_targets=[
+                ("/site/", str(self.root / "site")),
+                ("/preview/", str(self.root / "preview")),
+            ],
+        )
+
+    def test_each_target_matches_its_own_build(self):
+        generated = self.build()
+        self.assertEqual(len(generated), 2)
+        targets = [("/", "docs"), ("/site/", "site"), ("/preview/", "preview")]
+        for basepath, dest in targets:
+            single = generate_pages_recursive(
+                basepath,
+                str(self.content),
+                str(self.template),
+                str(self.root / f"single-{dest}"),
+            )
+            for page in single:
+                rel_path = page.relative_to(self.root / f"single-{dest}")
+                self.assertEqual(
+                    (self.root / dest / rel_path).read_text(encoding="utf-8"),
+                    page.read_text(encoding="utf-8"),
+                )
+
+        html = (self.root / "preview" / "index.html").read_text(encoding="utf-8")
+        self.assertIn('href="/preview/index.css"', html)
+        self.assertIn('href="/preview/blog/post"', html)
+        self.assertIn('src="/preview/cat.png"', html)
+
+    def test_missing_extra_output_regenerated(self):
+        _ = self.build(manifest=True)
+        self.assertEqual(self.build(manifest=True), [])
+        (self.root / "preview" / "index.html").unlink()
+        self.assertEqual(self.build(manifest=True), [self.root / "docs" / "index.html"])
+        self.assertTrue((self.root / "preview" / "index.html").exists())
+
+    def test_deleted_source_removed_from_every_target(self):
+        _ = self.build(manifest=True)
+        (self.content / "blog" / "post.md").unlink()
+        _ = self.build(manifest=True)
+        for dest in ("docs", "site", "preview"):
+            self.assertFalse((self.root / dest / "blog").exists())
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -1,6 +1,7 @@
+import io
 import unittest
 
-from src.htmlnode import HTMLNode, LeafNode, ParentNode
+from src.htmlnode import HTMLNode, HTMLSink, LeafNode, ParentNode, SerializedNode
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -95,6 +96,73 @@ class TestHTMLNode(unittest.TestCase):
         parent_node = ParentNode("div", [])
         self.assertEqual(parent_node.to_html(), "<div></div>")
 
+    def test_nodes_have_no_instance_dict(self):
+        for node in (
+            HTMLNode("p"),
+            LeafNode(None, "text"),
+            ParentNode("div", [LeafNode("b", "x")]),
+        ):
+            self.assertFalse(hasattr(node, "__dict__"))
+
+    # Streaming serializer TESTS
+    def test_write_html_to_list_buffer(self):
+        node = ParentNode("p", [LeafNode("b", "bold"), LeafNode(None, " text")])
+        parts: list[str] = []
+        node.write_html(parts.append)
+        self.assertEqual(parts, ["<p>", "<b>bold</b>", " text", "</p>"])
+
+    def test_write_html_to_stringio(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("a", [LeafNode(None, "x")], {"href": "/y"}),
+                LeafNode("img", "", {"src": "/z.png"}),
+            ],
+            {"class": "c"},
+        )
+        buffer = io.StringIO()
+        node.write_html(buffer.write)
+        self.assertEqual(buffer.getvalue(), node.to_html())
+        self.assertEqual(
+            buffer.getvalue(),
+            '<div class="c"><a href="/y">x</a><img src="/z.png"></div>',
+        )
+
+    def test_serialized_node_replays_chunks(self):
+        node = ParentNode(
+            "p", [LeafNode("a", "x", {"href": "/y"}), LeafNode(None, "!")]
+        )
+        serialized = SerializedNode.of(node)
+        self.assertEqual(serialized.parts, ['<p><a href="', "/y", '">x</a>!</p>'])
+        self.assertEqual(serialized.to_html(), node.to_html())
+
+        parts: list[str] = []
+        serialized.write_html(parts.append, lambda url: parts.append(f"/b{url}"))
+        self.assertEqual("".join(parts), '<p><a href="/b/y">x</a>!</p>')
+
+    def test_url_sink_gets_root_relative_values_only(self):
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("a", 'href="/no"', {"class": "c", "href": "/y", "id": "i"}),
+                LeafNode("img", "", {"src": "https://x/z.png"}),
+                LeafNode("code", '<img src="/no.png">'),
+            ],
+        )
+        urls: list[str] = []
+        self.assertEqual(
+            "".join(node_parts(node, urls.append)),
+            '<p><a class="c" href="" id="i">href="/no"</a>'
+            '<img src="https://x/z.png"><code><img src="/no.png"></code></p>',
+        )
+        self.assertEqual(urls, ["/y"])
+
+
+def node_parts(node: HTMLNode, url: HTMLSink) -> list[str]:
+    parts: list[str] = []
+    node.write_html(parts.append, url)
+    return parts
+
 
 if __name__ == "__main__":
     _ = unittest.main()
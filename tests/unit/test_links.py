@@ -0,0 +1,126 @@
+import tempfile
+import unittest
+from pathlib import Path, PurePosixPath
+
+from src.links import (
+    LinkGraph,
+    LinkReport,
+    internal_target,
+    output_candidates,
+    page_links,
+    site_outputs,
+)
+from src.manifest import hash_file
+
+
+class TestPageLinks(unittest.TestCase):
+    def test_internal_target(self):
+        self.assertEqual(internal_target("/blog/tom", "about.html"), "blog/tom")
+        self.assertEqual(internal_target("/", "blog/tom/"), "")
+        self.assertEqual(
+            internal_target("../majesty/#intro", "blog/tom/"), "blog/majesty/"
+        )
+        self.assertEqual(
+            internal_target("cat%20.png?v=2", "blog/tom/"), "blog/tom/cat .png"
+        )
+        self.assertEqual(internal_target("images/a.png", "about.html"), "images/a.png")
+        for url in ("https://x.org/a", "//cdn.org/a.js", "mailto:me@x.org", "#top"):
+            self.assertIsNone(internal_target(url, "about.html"))
+
+    def test_output_candidates(self):
+        self.assertEqual(output_candidates(""), ("index.html",))
+        self.assertEqual(output_candidates("blog/tom/"), ("blog/tom/index.html",))
+        self.assertEqual(
+            output_candidates("blog/tom"), ("blog/tom/index.html", "blog/tom.html")
+        )
+        self.assertEqual(output_candidates("images/a.png"), ("images/a.png",))
+
+    def test_page_links(self):
+        markdown = (
+            "# Title with [a link](/a)\n\n"
+            "- [item](b.html) and ![pic](/images/p.png)\n\n"
+            "```\n[not a link](/code)\n```\n\n"
+            "> [quoted](https://x.org) [again](/a)"
+        )
+        self.assertEqual(
+            page_links(markdown, PurePosixPath("blog/tom/index.md")),
+            [("link", "a"), ("link", "blog/tom/b.html"), ("image", "images/p.png")],
+        )
+
+    def test_markup_across_quote_lines(self):
+        markdown = "> **bold\n> text** see [this](/a) and _that\n> one_"
+        self.assertEqual(
+            page_links(markdown, PurePosixPath("index.md")), [("link", "a")]
+        )
+
+
+class TestLinkGraph(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.content = root / "content"
+        self.static = root / "static"
+        (self.content / "blog" / "tom").mkdir(parents=True)
+        (self.static / "images").mkdir(parents=True)
+        _ = (self.static / "images" / "tom.png").write_bytes(b"png")
+        self.write("index.md", "# Home\n\n[Tom](/blog/tom) [About](/about)")
+        self.write("blog/tom/index.md", "# Tom\n\n[Home](/) ![tom](/images/tom.png)")
+        self.state = root / "links.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, text: str) -> None:
+        _ = (self.content / name).write_text(text, encoding="utf-8")
+
+    def check(self, pages: list[str]) -> tuple[LinkGraph, LinkReport]:
+        graph = LinkGraph(self.state)
+        report = graph.update(self.content, site_outputs(pages, self.static), hash_file)
+        return graph, report
+
+    def test_broken_and_backlinks(self):
+        graph, report = self.check(["index.html", "blog/tom/index.html"])
+        self.assertEqual(report.scanned, ["blog/tom/index.md", "index.md"])
+        self.assertEqual(
+            [(source, edge["target"]) for source, edge in graph.broken()],
+            [("index.md", "about")],
+        )
+        self.assertEqual(
+            graph.backlinks(),
+            {
+                "index.html": ["blog/tom/index.md"],
+                "images/tom.png": ["blog/tom/index.md"],
+                "blog/tom/index.html": ["index.md"],
+            },
+        )
+
+    def test_only_changed_edges_rechecked(self):
+        _ = self.check(["index.html", "blog/tom/index.html"])
+        graph, report = self.check(["index.html", "blog/tom/index.html"])
+        self.assertEqual((report.scanned, report.checked), ([], 0))
+
+        # a new page fixes the link to it without re-reading the page linking there
+        graph, report = self.check(["index.html", "blog/tom/index.html", "about.html"])
+        self.assertEqual((report.scanned, report.checked), ([], 1))
+        self.assertEqual(graph.broken(), [])
+
+        # an edited page has all of its links extracted and checked again
+        self.write("blog/tom/index.md", "# Tom\n\n[Gone](/gone/)")
+        graph, report = self.check(["index.html", "blog/tom/index.html", "about.html"])
+        self.assertEqual((report.scanned, report.checked), (["blog/tom/index.md"], 1))
+        self.assertEqual(
+            [(source, edge["target"]) for source, edge in graph.broken()],
+            [("blog/tom/index.md", "gone/")],
+        )
+
+        (self.content / "blog" / "tom" / "index.md").unlink()
+        graph, report = self.check(["index.html", "about.html"])
+        self.assertEqual(report.removed, ["blog/tom/index.md"])
+        self.assertEqual(
+            [(source, edge["target"]) for source, edge in graph.broken()],
+            [("index.md", "blog/tom")],
+        )
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -0,0 +1,147 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.html_generation import generate_pages_recursive
+from src.listings import find_sections, listing_node, plan_listings
+from src.manifest import BuildManifest
+from src.metadata import MetadataIndex, PageMeta
+
+
+def meta(title: str, date: str | None = None) -> PageMeta:
+    return PageMeta(title, date, [], {}, f"About {title}")
+
+
+class TestPlanListings(unittest.TestCase):
+    def test_sections(self):
+        pages = {
+            "index.md": meta("Home"),
+            "blog/tom/index.md": meta("Tom"),
+            "blog/notes.md": meta("Notes"),
+            "blog/tom/extra.md": meta("Extra"),
+            "docs/index.md": meta("Docs"),
+            "docs/setup.md": meta("Setup"),
+        }
+        # docs/ and tom/ have an index.md of their own
+        self.assertEqual(
+            find_sections(pages),
+            {"blog": ["blog/tom/index.md", "blog/notes.md"]},
+        )
+
+    def test_order_and_pages(self):
+        pages = {
+            "blog/a.md": meta("A"),
+            "blog/b.md": meta("B", "2024-01-01"),
+            "blog/c.md": meta("C", "2024-03-01"),
+        }
+        listings = plan_listings(pages, per_page=2)
+        self.assertEqual(
+            [[rel_path for rel_path, _ in listing.posts] for listing in listings],
+            [["blog/c.md", "blog/b.md"], ["blog/a.md"]],
+        )
+        self.assertEqual(
+            [listing.output_key for listing in listings],
+            ["blog/index.html", "blog/page/2/index.html"],
+        )
+
+        html = listing_node(listings[0]).to_html()
+        self.assertIn('<a href="/blog/c.html">C</a>', html)
+        self.assertIn('<time datetime="2024-03-01">2024-03-01</time>', html)
+        self.assertIn("<p>About C</p>", html)
+        self.assertIn('href="/blog/page/2/" rel="next"', html)
+        self.assertNotIn('rel="prev"', html)
+        self.assertIn('href="/blog/" rel="prev"', listing_node(listings[1]).to_html())
+
+    def test_title_is_plain_text(self):
+        pages = {"blog/a.md": meta("snake_case *notes")}
+        html = listing_node(plan_listings(pages)[0]).to_html()
+        self.assertIn('<a href="/blog/a.html">snake_case *notes</a>', html)
+
+
+class TestGeneratedListings(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        (self.content / "blog").mkdir(parents=True)
+        _ = (self.root / "template.html").write_text(
+            "<title>{{ Title }}</title>{{ Content }}", encoding="utf-8"
+        )
+        self.manifest = BuildManifest(self.root / "manifest.json")
+        self.index = MetadataIndex(self.root / "metadata.json")
+        for number in range(3):
+            self.post(f"post{number}", f"2024-0{number + 2}-01")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def post(self, name: str, date: str) -> None:
+        post_dir = self.content / "blog" / name
+        post_dir.mkdir()
+        _ = (post_dir / "index.md").write_text(
+            f"---\ndate: {date}\n---\n# {name}\n\nAll about {name}.", encoding="utf-8"
+        )
+
+    def build(self, listings: bool = True) -> list[str]:
+        generated = generate_pages_recursive(
+            "/",
+            str(self.content),
+            str(self.root / "template.html"),
+            str(self.root / "docs"),
+            manifest=self.manifest,
+            listings=self.index.collect(self.content) if listings else None,
+            per_page=2,
+        )
+        docs = self.root / "docs"
+        return sorted(path.relative_to(docs).as_posix() for path in generated)
+
+    def test_only_shifted_pages_rewritten(self):
+        self.assertEqual(
+            self.build(),
+            [
+                "blog/index.html",
+                "blog/page/2/index.html",
+                "blog/post0/index.html",
+                "blog/post1/index.html",
+                "blog/post2/index.html",
+            ],
+        )
+        html = (self.root / "docs/blog/index.html").read_text("utf-8")
+        self.assertIn("<title>Blog</title>", html)
+        self.assertIn("<p>All about post2.</p>", html)
+        self.assertEqual(self.build(), [])
+
+        # the oldest post only lands on the last page
+        self.post("old", "2024-01-01")
+        self.assertEqual(
+            self.build(), ["blog/old/index.html", "blog/page/2/index.html"]
+        )
+
+        # the newest one pushes a post down on every page, and adds a page
+        self.post("new", "2024-09-01")
+        self.assertEqual(
+            self.build(),
+            [
+                "blog/index.html",
+                "blog/new/index.html",
+                "blog/page/2/index.html",
+                "blog/page/3/index.html",
+            ],
+        )
+
+    def test_body_edit_leaves_listing_alone(self):
+        _ = self.build()
+        path = self.content / "blog" / "post0" / "index.md"
+        _ = path.write_text(path.read_text("utf-8") + "\n\nMore.", encoding="utf-8")
+        self.assertEqual(self.build(), ["blog/post0/index.html"])
+
+    def test_build_without_listings_removes_them(self):
+        _ = self.build()
+        _ = self.build(listings=False)
+        self.assertFalse((self.root / "docs/blog/index.html").exists())
+        self.assertFalse((self.root / "docs/blog/page").exists())
+        self.assertTrue((self.root / "docs/blog/post0/index.html").exists())
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -0,0 +1,71 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.manifest import BuildManifest, combine_hashes, hash_file
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_load_missing_is_empty(self):
+        manifest = BuildManifest.load(self.root / "nope.json")
+        self.assertEqual(manifest.pages, {})
+        self.assertEqual(manifest.sources, {})
+
+    def test_load_corrupt_is_empty(self):
+        path = self.root / "manifest.json"
+        _ = path.write_text("{not json", encoding="utf-8")
+        self.assertEqual(BuildManifest.load(path).pages, {})
+
+    def test_save_and_load_roundtrip(self):
+        path = self.root / "state" / "manifest.json"
+        manifest = BuildManifest(path)
+        manifest.record("index.html", "content/index.md", "abc")
+        manifest.save()
+
+        loaded = BuildManifest.load(path)
+        self.assertEqual(
+            loaded.pages,
+            {"index.html": {"source": "content/index.md", "digest": "abc"}},
+        )
+
+    def test_is_fresh_requires_output(self):
+        output = self.root / "index.html"
+        manifest = BuildManifest(self.root / "manifest.json")
+        manifest.record("index.html", "index.md", "abc")
+        self.assertFalse(manifest.is_fresh("index.html", "abc", output))
+
+        _ = output.write_text("<p></p>", encoding="utf-8")
+        self.assertTrue(manifest.is_fresh("index.html", "abc", output))
+        self.assertFalse(manifest.is_fresh("index.html", "def", output))
+
+    def test_source_hash_tracks_changes(self):
+        source = self.root / "page.md"
+        _ = source.write_text("# One", encoding="utf-8")
+        manifest = BuildManifest(self.root / "manifest.json")
+        first = manifest.source_hash(source)
+        self.assertEqual(first, hash_file(source))
+
+        _ = source.write_text("# Two, longer", encoding="utf-8")
+        self.assertNotEqual(manifest.source_hash(source), first)
+
+    def test_prune_returns_unseen_outputs(self):
+        manifest = BuildManifest(self.root / "manifest.json")
+        manifest.record("a.html", "a.md", "1")
+        manifest.record("b.html", "b.md", "2")
+        self.assertEqual(manifest.prune({"a.html"}), ["b.html"])
+        self.assertEqual(list(manifest.pages), ["a.html"])
+
+    def test_combine_hashes_is_order_sensitive(self):
+        self.assertNotEqual(combine_hashes("a", "b"), combine_hashes("b", "a"))
+        self.assertNotEqual(combine_hashes("ab", ""), combine_hashes("a", "b"))
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
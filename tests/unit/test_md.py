@@ -1,6 +1,14 @@
+import io
 import unittest
+from collections.abc import Iterator
 
-from src.md import markdown_to_blocks, block_to_blocktype, BlockType, extract_title
+from src.md import (
+    markdown_to_blocks,
+    block_to_blocktype,
+    BlockType,
+    extract_title,
+    iter_blocks,
+)
 
 
 class TestMarkdownParsing(unittest.TestCase):
@@ -166,3 +174,77 @@ class TestExtractTitle(unittest.TestCase):
     def test_extract_title_only_hash(self):
         markdown = "# \nSome content"
         self.assertEqual(extract_title(markdown), "")
+
+
+class TestIterBlocks(unittest.TestCase):
+    def test_matches_split_and_classify(self):
+        md = """
+# Heading
+
+This is **bolded** paragraph
+on two lines
+
+- This is a list
+- with items
+
+1. one
+2. two
+
+> quoted
+> text
+"""
+        expected = [(block_to_blocktype(b), b) for b in markdown_to_blocks(md)]
+        self.assertEqual(list(iter_blocks(md.split("\n"))), expected)
+
+    def test_fenced_code_keeps_blank_lines(self):
+        md = "```\nfirst\n\nsecond\n```\n\nafter"
+        self.assertEqual(
+            list(iter_blocks(md.split("\n"))),
+            [
+                (BlockType.CODE, "```\nfirst\n\nsecond\n```"),
+                (BlockType.TEXT, "after"),
+            ],
+        )
+
+    def test_unclosed_fence_is_text(self):
+        self.assertEqual(
+            list(iter_blocks(["```", "code here"])),
+            [(BlockType.TEXT, "```\ncode here")],
+        )
+
+    def test_whitespace_only_line_separates(self):
+        self.assertEqual(
+            list(iter_blocks(["First", "   ", "Second"])),
+            [(BlockType.TEXT, "First"), (BlockType.TEXT, "Second")],
+        )
+
+    def test_reads_open_file(self):
+        f = io.StringIO("# Title\n\n- a\n- b\n")
+        self.assertEqual(
+            list(iter_blocks(f)),
+            [(BlockType.HEADER, "# Title"), (BlockType.LIST, "- a\n- b")],
+        )
+
+    def test_lazy(self):
+        def lines() -> Iterator[str]:
+            yield "first block"
+            yield ""
+            raise AssertionError("read past the first block")
+
+        blocks = iter_blocks(lines())
+        self.assertEqual(next(blocks), (BlockType.TEXT, "first block"))
+
+    def test_ordered_list_must_count_up(self):
+        self.assertEqual(
+            list(iter_blocks(["1. a", "3. b"])), [(BlockType.TEXT, "1. a\n3. b")]
+        )
+
+    def test_trailing_whitespace_not_a_list_item(self):
+        for md in ("- ", "1.  ", "- a\n- ", "1. a\n2. "):
+            expected = [(block_to_blocktype(b), b) for b in markdown_to_blocks(md)]
+            self.assertEqual(list(iter_blocks(md.split("\n"))), expected, md)
+            self.assertEqual(expected[0][0], BlockType.TEXT)
+        # only the last line loses its trailing whitespace
+        self.assertEqual(
+            list(iter_blocks(["- ", "- a"])), [(BlockType.LIST, "- \n- a")]
+        )
@@ -0,0 +1,132 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.html_generation import generate_pages_recursive
+from src.metadata import (
+    EXCERPT_LENGTH,
+    MetadataIndex,
+    PageMeta,
+    parse_front_matter,
+    read_metadata,
+    split_front_matter,
+)
+
+POST = """---
+title: "Tom, again"
+date: 2024-05-01
+tags: [tolkien, essays]
+authors:
+  - Ann
+  - 'Bo'
+---
+# Why Tom Bombadil Was a Mistake
+
+text
+"""
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_fields(self):
+        fields, body = split_front_matter(POST)
+        self.assertEqual(
+            fields,
+            {
+                "title": "Tom, again",
+                "date": "2024-05-01",
+                "tags": ["tolkien", "essays"],
+                "authors": ["Ann", "Bo"],
+            },
+        )
+        self.assertEqual(body, "# Why Tom Bombadil Was a Mistake\n\ntext\n")
+
+    def test_no_front_matter(self):
+        self.assertEqual(split_front_matter("# Title"), ({}, "# Title"))
+        # a leading horizontal rule is content
+        markdown = "---\nnot: front matter, never closed"
+        self.assertEqual(split_front_matter(markdown), ({}, markdown))
+        self.assertIsNone(parse_front_matter(["---", "just text", "---"]))
+
+
+class TestReadMetadata(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = Path(self.tmp.name) / "content"
+        (self.content / "blog").mkdir(parents=True)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, text: str) -> Path:
+        path = self.content / name
+        _ = path.write_text(text, encoding="utf-8")
+        return path
+
+    def test_front_matter_title_wins(self):
+        meta = read_metadata(self.write("blog/tom.md", POST))
+        self.assertEqual(meta.title, "Tom, again")
+        self.assertEqual(meta.date, "2024-05-01")
+        self.assertEqual(meta.tags, ["tolkien", "essays"])
+
+    def test_heading_title_outside_code(self):
+        path = self.write("page.md", "```\n# comment\n```\n\n# Real Title\n\ntext")
+        self.assertEqual(
+            read_metadata(path), PageMeta("Real Title", None, [], {}, "text")
+        )
+
+    def test_only_read_up_to_first_paragraph(self):
+        # invalid utf-8 after the first paragraph is never decoded
+        path = self.content / "big.md"
+        _ = path.write_bytes(POST.encode("utf-8") + b"\n" + b"\xff\xfe" * 1000)
+        meta = read_metadata(path)
+        self.assertEqual(meta.title, "Tom, again")
+        self.assertEqual(meta.excerpt, "text")
+
+    def test_excerpt(self):
+        path = self.write(
+            "post.md",
+            "# Post\n\n[< Back Home](/)\n\n![cover](/c.png)\n\n> quote\n\n"
+            "A **bold** [claim](/x), _really_.\n\n" + "word " * 100,
+        )
+        self.assertEqual(read_metadata(path).excerpt, "A bold claim, really.")
+        long = read_metadata(self.write("long.md", "# Long\n\n" + "word " * 100))
+        self.assertTrue(long.excerpt.endswith("word…"))
+        self.assertLessEqual(len(long.excerpt), EXCERPT_LENGTH + 1)
+        summary = self.write("summary.md", "---\nsummary: Short\n---\n# S\n\ntext")
+        self.assertEqual(read_metadata(summary).excerpt, "Short")
+
+    def test_index_reuses_unchanged_entries(self):
+        _ = self.write("blog/tom.md", POST)
+        _ = self.write("index.md", "# Home")
+        index_path = Path(self.tmp.name) / "metadata.json"
+        pages = MetadataIndex(index_path).collect(self.content)
+        self.assertEqual(sorted(pages), ["blog/tom.md", "index.md"])
+
+        # unreadable content proves the cached entry was used
+        path = self.content / "index.md"
+        stat = path.stat()
+        _ = path.write_bytes(b"\xff\xfe\xfd\xfc\xfb\xfa")
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        cached = MetadataIndex(index_path).collect(self.content)
+        self.assertEqual(cached, pages)
+
+        (self.content / "blog" / "tom.md").unlink()
+        self.assertEqual(
+            list(MetadataIndex(index_path).collect(self.content)), ["index.md"]
+        )
+
+    def test_front_matter_not_rendered(self):
+        _ = self.write("index.md", POST)
+        template = Path(self.tmp.name) / "template.html"
+        _ = template.write_text("<title>{{ Title }}</title>{{ Content }}", "utf-8")
+        _ = generate_pages_recursive(
+            "/", str(self.content), str(template), str(Path(self.tmp.name) / "docs")
+        )
+        html = (Path(self.tmp.name) / "docs" / "index.html").read_text("utf-8")
+        self.assertTrue(html.startswith("<title>Tom, again</title><div><h1"))
+        self.assertNotIn("tags", html)
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
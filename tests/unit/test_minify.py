@@ -0,0 +1,102 @@
+import re
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.html_generation import generate_pages_recursive
+from src.minify import MinifyingSink, minify_html
+
+
+def minify_chunks(chunks: list[str]) -> str:
+    parts: list[str] = []
+    sink = MinifyingSink(parts.append)
+    for chunk in chunks:
+        sink.write(chunk)
+    sink.close()
+    return "".join(parts)
+
+
+class TestMinifyHTML(unittest.TestCase):
+    def test_whitespace_runs_collapsed(self):
+        self.assertEqual(
+            minify_html("<p>one   two\t three</p>\n\n  <p>four</p>"),
+            "<p>one two three</p>\n<p>four</p>",
+        )
+
+    def test_preformatted_content_untouched(self):
+        html = "<pre><code>if x:\n    y  =  1\n</code></pre>  <p>a  b</p>"
+        self.assertEqual(
+            minify_html(html),
+            "<pre><code>if x:\n    y  =  1\n</code></pre> <p>a b</p>",
+        )
+
+    def test_inline_code_untouched(self):
+        self.assertEqual(
+            minify_html("<p>run  <code>a  b</code>  now</p>"),
+            "<p>run <code>a  b</code> now</p>",
+        )
+
+    def test_runs_split_across_chunks(self):
+        self.assertEqual(
+            minify_chunks(["<p>one  ", "  ", "\n two</p>", "   "]),
+            "<p>one\ntwo</p> ",
+        )
+
+    def test_single_spaces_at_chunk_edges(self):
+        self.assertEqual(minify_chunks(["<p>one ", " two</p>"]), "<p>one two</p>")
+        self.assertEqual(minify_chunks(["<p>one ", "two ", "</p>"]), "<p>one two </p>")
+        self.assertEqual(minify_chunks(["a ", "\n", " b"]), "a\nb")
+
+    def test_any_split_matches_whole_document(self):
+        html = "<p>a b  c </p> \n<pre> x  </pre> <p> d\t e </p> "
+        # tags are never split, anywhere between them is fair game
+        cuts = [
+            pos
+            for pos in range(len(html) + 1)
+            if html.rfind("<", 0, pos) <= html.rfind(">", 0, pos)
+        ]
+        for cut in cuts:
+            for second in [pos for pos in cuts if pos >= cut]:
+                self.assertEqual(
+                    minify_chunks([html[:cut], html[cut:second], html[second:]]),
+                    minify_html(html),
+                )
+
+    def test_counts_characters(self):
+        sink = MinifyingSink(lambda _: None)
+        sink.write("<p>a    b</p>")
+        sink.close()
+        self.assertEqual((sink.chars_in, sink.chars_out), (13, 10))
+
+    def test_generated_pages_minified(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "content").mkdir()
+            _ = (root / "content" / "index.md").write_text(
+                "# Title\n\nsome   text\n\n```\nkeep   this\n```", encoding="utf-8"
+            )
+            _ = (root / "template.html").write_text(
+                "<html>\n    <body>\n        {{ Content }}\n    </body>\n</html>",
+                encoding="utf-8",
+            )
+            for name, minify in (("plain", False), ("minified", True)):
+                _ = generate_pages_recursive(
+                    "/",
+                    str(root / "content"),
+                    str(root / "template.html"),
+                    str(root / name),
+                    minify=minify,
+                )
+
+            plain = (root / "plain" / "index.html").read_text(encoding="utf-8")
+            minified = (root / "minified" / "index.html").read_text(encoding="utf-8")
+            self.assertLess(len(minified), len(plain))
+            self.assertIn("keep   this", minified)
+            self.assertEqual(
+                re.sub(r"\s+", " ", minified),
+                re.sub(r"\s+", " ", plain),
+            )
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.html_generation import generate_pages_recursive
+from src.render_cache import CachedRender, RenderCache
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = RenderCache(Path(self.tmp.name) / "cache")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_miss_then_hit(self):
+        self.assertIsNone(self.cache.get("# Hi"))
+        self.cache.put("# Hi", CachedRender(["<h1>Hi</h1>"], "Hi"))
+        self.assertEqual(self.cache.get("# Hi"), CachedRender(["<h1>Hi</h1>"], "Hi"))
+        self.assertIsNone(self.cache.get("# Hi!"))
+
+    def test_corrupt_entry_is_a_miss(self):
+        self.cache.put("# Hi", CachedRender(["<h1>Hi</h1>"], "Hi"))
+        _ = self.cache.entry_path(self.cache.key("# Hi")).write_text("{", "utf-8")
+        self.assertIsNone(self.cache.get("# Hi"))
+
+    def test_stats(self):
+        self.assertEqual(self.cache.stats().entries, 0)
+        self.cache.put("a", CachedRender(["<p>a</p>"], "a"))
+        self.cache.put("b", CachedRender(["<p>b</p>"], "b"))
+        stats = self.cache.stats()
+        self.assertEqual(stats.entries, 2)
+        self.assertGreater(stats.total_bytes, 0)
+
+    def test_gc_evicts_least_recently_used(self):
+        # same-length entries, so the cap below fits exactly two
+        for i, markdown in enumerate(["old", "use", "new"]):
+            self.cache.put(markdown, CachedRender([f"<p>{markdown}</p>"], markdown))
+            path = self.cache.entry_path(self.cache.key(markdown))
+            os.utime(path, (1000 + i, 1000 + i))
+        # reading an entry makes it the most recently used one
+        _ = self.cache.get("use")
+
+        entry_size = self.cache.stats().total_bytes // 3
+        removed = self.cache.gc(max_bytes=entry_size * 2)
+        self.assertEqual(removed, 1)
+        self.assertIsNone(self.cache.get("old"))
+        self.assertIsNotNone(self.cache.get("use"))
+        self.assertIsNotNone(self.cache.get("new"))
+
+    def test_gc_under_cap_removes_nothing(self):
+        self.cache.put("a", CachedRender(["<p>a</p>"], "a"))
+        self.assertEqual(self.cache.gc(), 0)
+
+
+class TestCachedBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        self.template = self.root / "template.html"
+        self.cache = RenderCache(self.root / ".build" / "render-cache")
+
+        self.content.mkdir()
+        _ = (self.content / "index.md").write_text(
+            "# Home\n\n[about](/about)", encoding="utf-8"
+        )
+        _ = self.template.write_text("{{ Content }}", encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, dest: str, basepath: str = "/", cache: bool = True) -> str:
+        _ = generate_pages_recursive(
+            basepath,
+            str(self.content),
+            str(self.template),
+            str(self.root / dest),
+            render_cache=self.cache if cache else None,
+        )
+        return (self.root / dest / "index.html").read_text(encoding="utf-8")
+
+    def test_cached_output_matches_uncached(self):
+        uncached = self.build("plain", cache=False)
+        self.assertEqual(self.build("first"), uncached)
+        self.assertEqual(self.cache.stats().entries, 1)
+        self.assertEqual(self.build("second"), uncached)
+
+    def test_hit_skips_rendering(self):
+        # planted entry for the exact markdown, served instead of a render
+        markdown = (self.content / "index.md").read_text(encoding="utf-8")
+        self.cache.put(markdown, CachedRender(["<p>from cache</p>"], "Home"))
+        self.assertEqual(self.build("second"), "<p>from cache</p>")
+
+    def test_entry_shared_across_basepaths(self):
+        _ = self.build("root")
+        html = self.build("sub", basepath="/site/")
+        self.assertIn('href="/site/about"', html)
+        self.assertEqual(self.cache.stats().entries, 1)
+
+    def test_code_not_rebased_on_hit(self):
+        _ = (self.content / "index.md").write_text(
+            '# Home\n\n[about](/about) `<a href="/x">`\n\n```\n<img src="/y.png">\n```',
+            encoding="utf-8",
+        )
+        _ = self.build("root")
+        html = self.build("sub", basepath="/site/")
+        self.assertIn('href="/site/about"', html)
+        self.assertIn('<code><a href="/x"></code>', html)
+        self.assertIn('<img src="/y.png">', html)
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
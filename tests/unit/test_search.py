@@ -0,0 +1,142 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path, PurePosixPath
+
+from src.manifest import hash_file
+from src.search import (
+    HEADING_WEIGHT,
+    PAGES_NAME,
+    SEARCH_DIR,
+    SearchIndex,
+    page_path,
+    page_terms,
+    shard_name,
+)
+
+
+class TestPageTerms(unittest.TestCase):
+    def test_headings_weighted(self):
+        terms = page_terms("# Rendering\n\nrendering is **fast**")
+        self.assertEqual(terms["rendering"], HEADING_WEIGHT + 1)
+        self.assertEqual(terms["fast"], 1)
+
+    def test_markup_and_urls_not_indexed(self):
+        terms = page_terms(
+            "- see [the docs](/docs/page)\n- ![a cat](/images/cat.png)\n\n> _quoted_"
+        )
+        self.assertEqual(set(terms), {"see", "the", "docs", "cat", "quoted"})
+
+    def test_markup_across_quote_lines(self):
+        terms = page_terms("> a **bold\n> claim** and _more\n> so_")
+        self.assertEqual(set(terms), {"bold", "claim", "and", "more", "so"})
+
+    def test_code_blocks_indexed(self):
+        self.assertIn("tokenize_inline", page_terms("```\ntokenize_inline(text)\n```"))
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name("rendering"), "re")
+        self.assertEqual(shard_name("élan"), "_l")
+
+    def test_page_path(self):
+        self.assertEqual(page_path(PurePosixPath("index.md")), "")
+        self.assertEqual(page_path(PurePosixPath("blog/tom/index.md")), "blog/tom/")
+        self.assertEqual(page_path(PurePosixPath("about.md")), "about.html")
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.content = root / "content"
+        self.content.mkdir()
+        self.docs = root / "docs"
+        self.state = root / "state.json"
+        self.write_page("index.md", "# Home\n\nwelcome home")
+        self.write_page("post.md", "# Dragons\n\nsmaug sleeps")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_page(self, name: str, markdown: str) -> None:
+        _ = (self.content / name).write_text(markdown, encoding="utf-8")
+
+    def update(self):
+        return SearchIndex(self.state).update(self.content, [self.docs], hash_file)
+
+    def shard(self, name: str) -> dict[str, list[int]]:
+        path = self.docs / SEARCH_DIR / f"{name}.json"
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def test_writes_pages_and_postings(self):
+        result = self.update()
+        self.assertEqual(result.indexed, ["index.md", "post.md"])
+        pages = json.loads((self.docs / SEARCH_DIR / PAGES_NAME).read_text("utf-8"))
+        self.assertEqual(pages, [["", "Home"], ["post.html", "Dragons"]])
+        # [page id, weight, ...], best match first
+        self.assertEqual(self.shard("ho")["home"], [0, HEADING_WEIGHT + 1])
+
+    def test_unchanged_pages_skipped(self):
+        _ = self.update()
+        result = self.update()
+        self.assertEqual((result.indexed, result.shards), ([], []))
+
+    def test_only_touched_shards_rewritten(self):
+        _ = self.update()
+        welcome = self.docs / SEARCH_DIR / "we.json"
+        welcome_mtime = welcome.stat().st_mtime_ns
+
+        self.write_page("post.md", "# Dragons\n\nsmaug wakes")
+        result = self.update()
+        self.assertEqual(result.indexed, ["post.md"])
+        self.assertEqual(set(result.shards), {"dr", "sm", "sl", "wa"})
+        self.assertEqual(welcome.stat().st_mtime_ns, welcome_mtime)
+        # emptied shards are deleted
+        self.assertFalse((self.docs / SEARCH_DIR / "sl.json").exists())
+        self.assertEqual(self.shard("wa"), {"wakes": [1, 1]})
+
+    def test_removed_page_dropped_and_id_reused(self):
+        _ = self.update()
+        (self.content / "index.md").unlink()
+        result = self.update()
+        self.assertEqual(result.removed, ["index.md"])
+        self.assertFalse((self.docs / SEARCH_DIR / "ho.json").exists())
+
+        self.write_page("new.md", "# New\n\nhome again")
+        _ = self.update()
+        self.assertEqual(self.shard("ho")["home"], [0, 1])
+
+    def test_new_pages_fill_holes_then_append(self):
+        _ = self.update()
+        (self.content / "index.md").unlink()
+        _ = self.update()
+
+        for name in ("a.md", "b.md", "c.md"):
+            self.write_page(name, f"# {name[0]}\n\nhoard")
+        index = SearchIndex(self.state)
+        _ = index.update(self.content, [self.docs], hash_file)
+        self.assertEqual(
+            {source: entry["id"] for source, entry in index.pages.items()},
+            {"a.md": 0, "b.md": 2, "c.md": 3, "post.md": 1},
+        )
+
+    def test_new_output_tree_gets_full_index(self):
+        _ = self.update()
+        preview = Path(self.tmp.name) / "preview"
+        _ = SearchIndex(self.state).update(
+            self.content, [self.docs, preview], hash_file
+        )
+        self.assertEqual(
+            sorted(p.name for p in (preview / SEARCH_DIR).iterdir()),
+            sorted(p.name for p in (self.docs / SEARCH_DIR).iterdir()),
+        )
+
+    def test_remove(self):
+        _ = self.update()
+        SearchIndex(self.state).remove([self.docs])
+        self.assertFalse((self.docs / SEARCH_DIR).exists())
+        self.assertFalse(self.state.exists())
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -0,0 +1,135 @@
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+from datetime import UTC, datetime
+from pathlib import Path
+
+from src.manifest import hash_file
+from src.metadata import MetadataIndex
+from src.sitemap import FEED_DIR, FEED_NAME, SITEMAP_NAME, Sitemap
+
+SITE = "https://example.com"
+NS = {"s": "http://www.sitemaps.org/schemas/sitemap/0.9"}
+ATOM = {"a": "http://www.w3.org/2005/Atom"}
+
+
+class TestSitemap(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.content = root / "content"
+        (self.content / "blog").mkdir(parents=True)
+        self.docs = root / "docs"
+        self.state = root / "sitemap.json"
+        self.write("index.md", "# Home")
+        self.write("blog/old.md", "---\ndate: 2024-01-01\n---\n# Old post")
+        self.write("blog/new.md", "---\ndate: 2024-06-01\nauthor: Ann\n---\n# New post")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str, text: str) -> None:
+        _ = (self.content / name).write_text(text, encoding="utf-8")
+
+    def update(self, max_urls: int = 50_000, day: int = 1):
+        pages = MetadataIndex(Path(self.tmp.name) / "meta.json").collect(self.content)
+        return Sitemap(self.state, max_urls).update(
+            SITE,
+            self.content,
+            pages,
+            [("/site/", self.docs)],
+            hash_file,
+            now=datetime(2025, 3, day, tzinfo=UTC),
+        )
+
+    def urls(self, name: str = SITEMAP_NAME) -> dict[str, str]:
+        tree = ET.parse(self.docs / name)
+        return {
+            url.findtext("s:loc", namespaces=NS) or "": url.findtext(
+                "s:lastmod", namespaces=NS
+            )
+            or ""
+            for url in tree.getroot().findall("s:url", NS)
+        }
+
+    def test_lastmod_from_date_then_from_changes(self):
+        _ = self.update()
+        urls = self.urls()
+        self.assertEqual(urls["https://example.com/site/blog/new.html"], "2024-06-01")
+        self.assertIn("https://example.com/site/", urls)
+
+        self.write("blog/old.md", "---\ndate: 2024-01-01\n---\n# Old post, edited")
+        result = self.update(day=2)
+        self.assertEqual(result.changed, ["blog/old.md"])
+        urls = self.urls()
+        self.assertEqual(
+            urls["https://example.com/site/blog/old.html"], "2025-03-02T00:00:00Z"
+        )
+        self.assertEqual(urls["https://example.com/site/blog/new.html"], "2024-06-01")
+
+    def test_unchanged_build_writes_nothing(self):
+        _ = self.update()
+        result = self.update()
+        self.assertEqual((result.changed, result.files, result.feed), ([], 0, False))
+
+    def test_shards_past_max_urls(self):
+        result = self.update(max_urls=2)
+        self.assertEqual(result.files, 3)  # two shards plus the index
+        index = ET.parse(self.docs / SITEMAP_NAME).getroot()
+        self.assertEqual(index.tag, f"{{{NS['s']}}}sitemapindex")
+        self.assertEqual(len(self.urls("sitemap-1.xml")), 2)
+        self.assertEqual(len(self.urls("sitemap-2.xml")), 1)
+
+        # a change only rewrites the shard holding the page
+        self.write("index.md", "# Home, edited")
+        self.assertEqual(self.update(max_urls=2, day=2).files, 2)
+
+        # shrinking back to one file turns sitemap.xml back into a urlset
+        (self.content / "index.md").unlink()
+        _ = self.update(max_urls=2)
+        self.assertEqual(len(self.urls()), 2)
+        self.assertFalse((self.docs / "sitemap-1.xml").exists())
+        self.assertFalse((self.docs / "sitemap-2.xml").exists())
+
+    def test_emptied_middle_shard_has_no_lastmod(self):
+        _ = self.update(max_urls=1)
+        (self.content / "blog" / "old.md").unlink()
+        _ = self.update(max_urls=1)
+        index = ET.parse(self.docs / SITEMAP_NAME).getroot()
+        lastmods = {
+            sitemap.findtext("s:loc", namespaces=NS): sitemap.findtext(
+                "s:lastmod", namespaces=NS
+            )
+            for sitemap in index.findall("s:sitemap", NS)
+        }
+        self.assertEqual(len(lastmods), 3)
+        self.assertIsNone(lastmods["https://example.com/site/sitemap-2.xml"])
+        self.assertEqual(
+            lastmods["https://example.com/site/sitemap-1.xml"], "2024-06-01"
+        )
+        self.assertTrue(lastmods["https://example.com/site/sitemap-3.xml"])
+
+    def test_feed_of_blog_posts_newest_first(self):
+        _ = self.update()
+        feed = ET.parse(self.docs / FEED_DIR / FEED_NAME).getroot()
+        entries = feed.findall("a:entry", ATOM)
+        self.assertEqual(
+            [entry.findtext("a:title", namespaces=ATOM) for entry in entries],
+            ["New post", "Old post"],
+        )
+        self.assertEqual(entries[0].findtext("a:author/a:name", namespaces=ATOM), "Ann")
+        self.assertEqual(feed.findtext("a:title", namespaces=ATOM), "Home")
+
+        # pages outside blog/ leave the feed alone
+        self.write("index.md", "# Home, edited")
+        self.assertFalse(self.update(day=2).feed)
+
+    def test_remove(self):
+        _ = self.update(max_urls=2)
+        Sitemap(self.state).remove([self.docs])
+        self.assertEqual(list(self.docs.glob("sitemap*.xml")), [])
+        self.assertFalse((self.docs / FEED_DIR / FEED_NAME).exists())
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.sync import LinkMode, sync_tree
+
+
+class TestSyncTree(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = Path(self.tmp.name) / "static"
+        self.dst = Path(self.tmp.name) / "docs"
+        (self.src / "images").mkdir(parents=True)
+        _ = (self.src / "index.css").write_text("body {}", encoding="utf-8")
+        _ = (self.src / "images" / "a.png").write_bytes(b"png-a")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_first_sync_copies_everything(self):
+        result = sync_tree(self.src, self.dst)
+        self.assertEqual(result.files, ["images/a.png", "index.css"])
+        self.assertEqual(result.copied, result.files)
+        self.assertEqual((self.dst / "images" / "a.png").read_bytes(), b"png-a")
+
+    def test_second_sync_copies_nothing(self):
+        first = sync_tree(self.src, self.dst)
+        second = sync_tree(self.src, self.dst, previous=first.files)
+        self.assertEqual(second.copied, [])
+        self.assertEqual(second.deleted, [])
+
+    def test_only_changed_file_copied(self):
+        first = sync_tree(self.src, self.dst)
+        _ = (self.src / "index.css").write_text("body { margin: 0 }", encoding="utf-8")
+        second = sync_tree(self.src, self.dst, previous=first.files)
+        self.assertEqual(second.copied, ["index.css"])
+
+    def test_removed_source_deleted_but_other_files_kept(self):
+        first = sync_tree(self.src, self.dst)
+        _ = (self.dst / "index.html").write_text("generated page", encoding="utf-8")
+        (self.src / "images" / "a.png").unlink()
+
+        second = sync_tree(self.src, self.dst, previous=first.files)
+        self.assertEqual(second.deleted, ["images/a.png"])
+        self.assertFalse((self.dst / "images").exists())
+        self.assertTrue((self.dst / "index.html").exists())
+
+    def test_checksum_skips_touched_but_identical_file(self):
+        first = sync_tree(self.src, self.dst)
+        css = self.src / "index.css"
+        stat = css.stat()
+        os.utime(css, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+
+        self.assertEqual(
+            sync_tree(self.src, self.dst, first.files, checksum=True).copied, []
+        )
+        self.assertEqual(
+            sync_tree(self.src, self.dst, first.files).copied, ["index.css"]
+        )
+
+    def test_hardlink_shares_inode(self):
+        _ = sync_tree(self.src, self.dst, mode=LinkMode.HARDLINK)
+        self.assertTrue(
+            os.path.samefile(self.src / "index.css", self.dst / "index.css")
+        )
+        again = sync_tree(self.src, self.dst, mode=LinkMode.HARDLINK)
+        self.assertEqual(again.copied, [])
+
+    def test_reflink_falls_back_to_copy(self):
+        _ = sync_tree(self.src, self.dst, mode=LinkMode.REFLINK)
+        self.assertEqual(
+            (self.dst / "index.css").read_text(encoding="utf-8"), "body {}"
+        )
+        self.assertFalse(
+            os.path.samefile(self.src / "index.css", self.dst / "index.css")
+        )
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.htmlnode import LeafNode, ParentNode
+from src.template import Template, compile_template, load_template, rebase_url
+
+
+def render(template: Template, values: dict[str, str]) -> str:
+    parts: list[str] = []
+    template.write(parts.append, values)
+    return "".join(parts)
+
+
+class TestCompileTemplate(unittest.TestCase):
+    def test_title_and_content(self):
+        template = compile_template(
+            "<title>{{ Title }}</title><article>{{ Content }}</article>"
+        )
+        self.assertEqual(template.slots, ["Title", "Content"])
+        self.assertEqual(
+            render(template, {"Title": "Hi", "Content": "<p>x</p>"}),
+            "<title>Hi</title><article><p>x</p></article>",
+        )
+
+    def test_arbitrary_slots_and_missing_values(self):
+        template = compile_template("{{author}} wrote {{ post.date }}")
+        self.assertEqual(render(template, {"author": "Tom"}), "Tom wrote ")
+
+    def test_basepath_applied_to_literals(self):
+        template = compile_template(
+            '<link href="/index.css"><img src="/a.png"><a href="https://x">',
+            "/site-architect/",
+        )
+        self.assertEqual(
+            render(template, {}),
+            '<link href="/site-architect/index.css"><img src="/site-architect/a.png"><a href="https://x">',
+        )
+
+    def test_slot_values_are_not_rebased(self):
+        template = compile_template("{{ Content }}", "/base/")
+        self.assertEqual(render(template, {"Content": 'href="/x"'}), 'href="/x"')
+
+    def test_write_streams_nodes_with_rebased_links(self):
+        template = compile_template(
+            '<title>{{ Title }}</title><link href="/i.css">{{ Content }}', "/b/"
+        )
+        content = ParentNode("p", [LeafNode("a", "x", {"href": "/post/"})])
+        parts: list[str] = []
+        template.write(parts.append, {"Title": "T", "Content": content})
+        self.assertEqual(
+            "".join(parts),
+            '<title>T</title><link href="/b/i.css"><p><a href="/b/post/">x</a></p>',
+        )
+
+    def test_partials(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            partials = Path(tmp)
+            _ = (partials / "nav.html").write_text(
+                '<nav><a href="/">{{ Title }}</a></nav>', encoding="utf-8"
+            )
+            template = compile_template(
+                "<body>{{> nav }}{{ Content }}</body>", "/b/", partials
+            )
+            self.assertEqual(template.dependencies, [partials / "nav.html"])
+            self.assertEqual(
+                render(template, {"Title": "T", "Content": "C"}),
+                '<body><nav><a href="/b/">T</a></nav>C</body>',
+            )
+
+    def test_missing_partial(self):
+        with tempfile.TemporaryDirectory() as tmp, self.assertRaises(FileNotFoundError):
+            _ = compile_template("{{> nope }}", "/", Path(tmp))
+
+    def test_recursive_partial(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            _ = (Path(tmp) / "loop.html").write_text("{{> loop }}", encoding="utf-8")
+            with self.assertRaises(ValueError):
+                _ = compile_template("{{> loop }}", "/", Path(tmp))
+
+    def test_rebase_url(self):
+        self.assertEqual(rebase_url("/x", "/p/"), "/p/x")
+        self.assertEqual(rebase_url("/", "/p/"), "/p/")
+        self.assertEqual(rebase_url("/a/b.png?v=2#top", "/p/"), "/p/a/b.png?v=2#top")
+
+    def test_text_in_nodes_is_not_rebased(self):
+        template = compile_template("{{ Content }}", "/b/")
+        content = ParentNode(
+            "p",
+            [
+                LeafNode("a", "x", {"href": "/post/"}),
+                LeafNode("code", '<a href="/x">'),
+            ],
+        )
+        parts: list[str] = []
+        template.write(parts.append, {"Content": content})
+        self.assertEqual(
+            "".join(parts),
+            '<p><a href="/b/post/">x</a><code><a href="/x"></code></p>',
+        )
+
+
+class TestLoadTemplate(unittest.TestCase):
+    def test_cached_until_file_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "template.html"
+            _ = path.write_text("<p>{{ Content }}</p>", encoding="utf-8")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+
+            _ = path.write_text("<div>{{ Content }}</div>", encoding="utf-8")
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            second = load_template(path)
+            self.assertIsNot(second, first)
+            self.assertEqual(render(second, {"Content": "x"}), "<div>x</div>")
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
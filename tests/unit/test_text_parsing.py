@@ -7,7 +7,9 @@ from src.text_parsing import (
     split_nodes_image,
     split_nodes_link,
     text_to_textnodes,
+    tokenize_inline,
 )
+import random
 
 
 class TestTextParsing(unittest.TestCase):
@@ -324,3 +326,66 @@ class TestTextParsing(unittest.TestCase):
     #     self.assertEqual(result[3].text_type, TextType.BOLD)
     #     self.assertEqual(result[4].text, "")
     #     self.assertEqual(result[4].text_type, TextType.NORMAL)
+
+
+class TestTokenizeInline(unittest.TestCase):
+    def assertSameAsMultiPass(self, text: str):
+        try:
+            expected = text_to_textnodes(text)
+        except ValueError:
+            with self.assertRaises(ValueError):
+                _ = tokenize_inline(text)
+            return
+        self.assertListEqual(tokenize_inline(text), expected)
+
+    def test_mixed_inline(self):
+        text = "This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)"
+        self.assertSameAsMultiPass(text)
+
+    def test_empty_text(self):
+        self.assertListEqual(tokenize_inline(""), [])
+
+    def test_delimiters_inside_links_are_literal(self):
+        self.assertListEqual(
+            tokenize_inline("[a_b**c](/x_y) _i_"),
+            [
+                TextNode("a_b**c", TextType.LINK, "/x_y"),
+                TextNode(" ", TextType.NORMAL),
+                TextNode("i", TextType.ITALIC),
+            ],
+        )
+
+    def test_weaker_delimiters_inside_bold_are_literal(self):
+        self.assertListEqual(
+            tokenize_inline("**a_b`c**"), [TextNode("a_b`c", TextType.BOLD)]
+        )
+
+    def test_stronger_delimiter_breaks_span(self):
+        with self.assertRaises(ValueError):
+            _ = tokenize_inline("_a **b** c_")
+        with self.assertRaises(ValueError):
+            _ = tokenize_inline("`a_b_c`")
+
+    def test_unclosed_delimiter(self):
+        with self.assertRaises(ValueError):
+            _ = tokenize_inline("this is **not closed")
+
+    def test_span_across_link(self):
+        with self.assertRaises(ValueError):
+            _ = tokenize_inline("**see [a](b)**")
+
+    def test_image_wins_over_overlapping_link(self):
+        self.assertSameAsMultiPass("[](]![`)]( ])")
+        self.assertSameAsMultiPass("([ax](![_) `!]()")
+
+    def test_many_delimiters_no_recursion_limit(self):
+        text = "a _b_ c **d** " * 5000
+        nodes = tokenize_inline(text)
+        self.assertEqual(len(nodes), 20001)
+
+    def test_random_inputs_match_multi_pass(self):
+        atoms = ["a", " ", "*", "**", "_", "`", "!", "[", "]", "(", ")", "![", "]("]
+        rng = random.Random(1234)
+        for _ in range(3000):
+            text = "".join(rng.choice(atoms) for _ in range(rng.randint(0, 16)))
+            self.assertSameAsMultiPass(text)
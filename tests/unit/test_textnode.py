@@ -30,6 +30,12 @@ class TestTextNode(unittest.TestCase):
             # This code should raise the exception
             _ = TextNode("This is a link", TextType.LINK)
 
+    def test_no_instance_dict(self):
+        node = TextNode("slotted", TextType.NORMAL)
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = 1  # pyright: ignore[reportAttributeAccessIssue]
+
 
 if __name__ == "__main__":
     _ = unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+from src import tracing
+from src.conversions import markdown_to_html_node
+from src.tracing import span
+
+
+class TestTracing(unittest.TestCase):
+    def tearDown(self):
+        _ = tracing.disable()
+
+    def test_disabled_span_is_shared_noop(self):
+        self.assertIsNone(tracing.active())
+        self.assertIs(span("a"), span("b", page="x"))
+        with span("a"):
+            pass
+
+    def test_nested_spans_attributed_to_page(self):
+        tracer = tracing.enable()
+        with span("generate_page", page="index.md"):
+            with span("read_markdown"):
+                pass
+            # unmemoized, so both blocks are really tokenized
+            _ = markdown_to_html_node("# Title\n\nSome **text**", memo=None)
+        with span("static_sync"):
+            pass
+        _ = tracing.disable()
+
+        names = [event[0] for event in tracer.events]
+        self.assertEqual(
+            names,
+            [
+                "read_markdown",
+                "tokenize_inline",
+                "tokenize_inline",
+                "markdown_to_html_node",
+                "generate_page",
+                "static_sync",
+            ],
+        )
+        pages = [event[6] for event in tracer.events]
+        self.assertEqual(pages, ["index.md"] * 5 + [None])
+
+        summary = tracer.page_summary()
+        self.assertEqual(list(summary), ["index.md"])
+        self.assertIn("tokenize_inline", summary["index.md"])
+        self.assertIn("index.md", tracer.format_summary())
+
+    def test_chrome_trace_events(self):
+        tracer = tracing.enable()
+        with span("outer", page="p"), span("inner"):
+            pass
+        _ = tracing.disable()
+
+        events = tracer.chrome_trace()["traceEvents"]
+        assert isinstance(events, list)
+        inner, outer = events
+        self.assertEqual(outer["ph"], "X")
+        self.assertEqual(outer["args"], {"page": "p"})
+        self.assertLessEqual(outer["ts"], inner["ts"])
+        self.assertGreaterEqual(outer["ts"] + outer["dur"], inner["ts"] + inner["dur"])
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -0,0 +1,111 @@
+import tempfile
+import unittest
+import urllib.request
+from pathlib import Path
+
+from src.watch import (
+    LIVERELOAD_SCRIPT,
+    InotifyWatcher,
+    PollingWatcher,
+    ReloadNotifier,
+    collect_changes,
+    serve,
+    within,
+)
+
+
+class TestWithin(unittest.TestCase):
+    def test_root_itself_counts(self):
+        static = Path("/site/static")
+        self.assertTrue(within(static, static))
+        self.assertTrue(within(static / "images" / "a.png", static))
+        self.assertFalse(within(Path("/site/static-old/a.png"), static))
+        self.assertFalse(within(Path("/site"), static))
+
+
+class TestPollingWatcher(unittest.TestCase):
+    def test_reports_created_modified_and_deleted(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            existing = root / "a.md"
+            _ = existing.write_text("one", encoding="utf-8")
+            watcher = PollingWatcher([root], interval=0)
+
+            _ = existing.write_text("changed", encoding="utf-8")
+            (root / "sub").mkdir()
+            created = root / "sub" / "b.md"
+            _ = created.write_text("new", encoding="utf-8")
+            self.assertEqual(watcher.poll(0), {existing, created})
+
+            created.unlink()
+            self.assertEqual(watcher.poll(0), {created})
+            self.assertEqual(watcher.poll(0), set())
+
+    def test_single_file_root(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            template = Path(tmp) / "template.html"
+            _ = template.write_text("x", encoding="utf-8")
+            watcher = PollingWatcher([template], interval=0)
+            _ = template.write_text("xy", encoding="utf-8")
+            self.assertEqual(watcher.poll(0), {template})
+
+
+class TestInotifyWatcher(unittest.TestCase):
+    def test_reports_changes_in_new_directories(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            try:
+                watcher = InotifyWatcher([root])
+            except OSError:
+                self.skipTest("inotify not available")
+            try:
+                (root / "post").mkdir()
+                _ = collect_changes(watcher, debounce=0.05)
+
+                page = root / "post" / "index.md"
+                _ = page.write_text("# Post", encoding="utf-8")
+                self.assertIn(page, collect_changes(watcher, debounce=0.05))
+            finally:
+                watcher.close()
+
+
+class TestLiveReloadServer(unittest.TestCase):
+    def test_injects_script_into_html_only(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            docs = Path(tmp)
+            _ = (docs / "index.html").write_text(
+                "<html><body><p>hi</p></body></html>", encoding="utf-8"
+            )
+            _ = (docs / "index.css").write_text("body {}", encoding="utf-8")
+
+            server = serve(docs, 0, ReloadNotifier())
+            port = server.server_address[1]
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/") as response:
+                    html = response.read().decode("utf-8")
+                with urllib.request.urlopen(
+                    f"http://127.0.0.1:{port}/index.css"
+                ) as response:
+                    css = response.read().decode("utf-8")
+            finally:
+                server.shutdown()
+                server.server_close()
+
+            self.assertEqual(
+                html, f"<html><body><p>hi</p>{LIVERELOAD_SCRIPT}</body></html>"
+            )
+            self.assertEqual(css, "body {}")
+            self.assertFalse(LIVERELOAD_SCRIPT in (docs / "index.html").read_text())
+
+
+class TestReloadNotifier(unittest.TestCase):
+    def test_wait_sees_new_generation(self):
+        notifier = ReloadNotifier()
+        self.assertFalse(notifier.wait(notifier.generation, timeout=0))
+        seen = notifier.generation
+        notifier.notify()
+        self.assertTrue(notifier.wait(seen, timeout=0))
+
+
+if __name__ == "__main__":
+    _ = unittest.main()